@@ -0,0 +1,47 @@
+import threading
+from collections import Counter
+
+
+# Contadores en memoria del proceso (ej: hits/misses del cache).
+# Con varios workers cada uno lleva sus propios contadores.
+_counters = Counter()
+_lock = threading.Lock()
+
+
+def incr(name, value=1):
+    """
+    Incrementa un contador.
+
+    Args:
+        name: Nombre del contador (ej: 'expenses.cache.hit')
+        value: Cantidad a sumar
+    """
+    with _lock:
+        _counters[name] += value
+
+
+def get(name):
+    """
+    Retorna el valor actual de un contador (0 si no existe).
+    """
+    with _lock:
+        return _counters[name]
+
+
+def snapshot():
+    """
+    Retorna una copia de todos los contadores.
+
+    Returns:
+        dict: {nombre: valor}
+    """
+    with _lock:
+        return dict(sorted(_counters.items()))
+
+
+def reset():
+    """
+    Pone todos los contadores en cero.
+    """
+    with _lock:
+        _counters.clear()
@@ -0,0 +1,153 @@
+import zlib
+from gzip import GzipFile
+
+from django.conf import settings
+from django.middleware.gzip import GZipMiddleware, re_accepts_gzip
+from django.utils.cache import patch_vary_headers
+from django.utils.text import StreamingBuffer
+
+from . import metrics
+
+
+class CompressionMiddleware(GZipMiddleware):
+    """
+    GZipMiddleware con umbral de tamaño, tipos permitidos y rutas excluidas.
+
+    - Solo comprime respuestas de COMPRESSION_MIN_LENGTH bytes o más.
+    - Solo comprime los tipos de COMPRESSION_CONTENT_TYPES (JSON, CSV,
+      NDJSON). El HTML de la API navegable y del admin queda fuera porque
+      incluye el token CSRF (ataque BREACH).
+    - No comprime las rutas de COMPRESSION_EXCLUDED_PATHS (ej: /api/auth/,
+      que devuelve los tokens JWT).
+    - Las respuestas en streaming (export CSV/NDJSON) se comprimen por
+      bloques: cada COMPRESSION_STREAM_FLUSH_SIZE bytes se envía lo
+      comprimido hasta ahí, sin esperar el archivo completo.
+
+    Los bytes antes y después de comprimir se suman en los contadores
+    'compression.bytes_in', 'compression.bytes_out' y
+    'compression.bytes_saved' (ver GET /api/metrics/).
+    """
+
+    default_min_length = 1024
+    default_content_types = (
+        'application/json',
+        'application/x-ndjson',
+        'text/csv',
+    )
+    default_excluded_paths = ('/api/auth/', '/admin/')
+    default_stream_flush_size = 16 * 1024
+
+    compress_level = 6
+
+    @property
+    def min_length(self):
+        return getattr(settings, 'COMPRESSION_MIN_LENGTH', self.default_min_length)
+
+    @property
+    def content_types(self):
+        return getattr(settings, 'COMPRESSION_CONTENT_TYPES', self.default_content_types)
+
+    @property
+    def excluded_paths(self):
+        return getattr(settings, 'COMPRESSION_EXCLUDED_PATHS', self.default_excluded_paths)
+
+    @property
+    def stream_flush_size(self):
+        return getattr(settings, 'COMPRESSION_STREAM_FLUSH_SIZE', self.default_stream_flush_size)
+
+    def should_compress(self, request, response):
+        """
+        Indica si la respuesta es candidata a comprimirse.
+
+        Accept-Encoding y Content-Encoding se revisan después, en
+        process_response(), que además agrega 'Vary: Accept-Encoding'.
+        """
+        if request.path.startswith(tuple(self.excluded_paths)):
+            return False
+
+        content_type = response.get('Content-Type', '').split(';')[0].strip().lower()
+        if content_type not in self.content_types:
+            return False
+
+        if response.streaming:
+            return not response.is_async
+        return len(response.content) >= self.min_length
+
+    def process_response(self, request, response):
+        if not self.should_compress(request, response):
+            return response
+
+        if not response.streaming:
+            size = len(response.content)
+            response = super().process_response(request, response)
+            if response.get('Content-Encoding') == 'gzip':
+                record(size, len(response.content))
+            return response
+
+        if response.has_header('Content-Encoding'):
+            return response
+
+        patch_vary_headers(response, ('Accept-Encoding',))
+        if not re_accepts_gzip.search(request.META.get('HTTP_ACCEPT_ENCODING', '')):
+            return response
+
+        response.streaming_content = self.compress_stream(response.streaming_content)
+        del response.headers['Content-Length']
+
+        etag = response.get('ETag')
+        if etag and etag.startswith('"'):
+            response.headers['ETag'] = 'W/' + etag
+        response.headers['Content-Encoding'] = 'gzip'
+        return response
+
+    def compress_stream(self, sequence):
+        """
+        Comprime un iterable de bytes enviando la salida por bloques.
+
+        Django comprime el streaming con compress_sequence(), pero zlib
+        retiene la salida hasta llenar su buffer interno. Aquí se fuerza
+        un Z_SYNC_FLUSH cada stream_flush_size bytes de entrada, así el
+        cliente recibe datos de forma continua y la memoria queda acotada.
+
+        Yields:
+            bytes: Partes del archivo gzip
+        """
+        buf = StreamingBuffer()
+        flush_size = self.stream_flush_size
+        bytes_in = bytes_out = pending = 0
+
+        try:
+            with GzipFile(mode='wb', compresslevel=self.compress_level, fileobj=buf, mtime=0) as zfile:
+                data = buf.read()
+                bytes_out += len(data)
+                yield data
+
+                for item in sequence:
+                    zfile.write(item)
+                    bytes_in += len(item)
+                    pending += len(item)
+                    if pending < flush_size:
+                        continue
+
+                    zfile.flush(zlib.Z_SYNC_FLUSH)
+                    pending = 0
+                    data = buf.read()
+                    if data:
+                        bytes_out += len(data)
+                        yield data
+
+            data = buf.read()
+            bytes_out += len(data)
+            yield data
+        finally:
+            record(bytes_in, bytes_out)
+
+
+def record(bytes_in, bytes_out):
+    """
+    Suma los bytes de una respuesta comprimida a las métricas.
+    """
+    metrics.incr('compression.responses')
+    metrics.incr('compression.bytes_in', bytes_in)
+    metrics.incr('compression.bytes_out', bytes_out)
+    metrics.incr('compression.bytes_saved', bytes_in - bytes_out)
@@ -0,0 +1,119 @@
+import io
+import re
+
+from django.conf import settings
+from rest_framework.parsers import JSONParser
+from rest_framework.renderers import JSONRenderer
+from rest_framework.settings import api_settings
+
+try:
+    import orjson
+except ImportError:  # Dependencia opcional: se usa json de la librería estándar
+    orjson = None
+
+
+# 19 dígitos seguidos o más: posible entero fuera de 64 bits, que orjson
+# rechaza o convierte a float según la versión
+LONG_NUMBER = re.compile(rb'\d{19,}')
+
+# Separadores de línea que JSONRenderer escapa para que el JSON sea
+# JavaScript válido (ver rest_framework.renderers.JSONRenderer)
+LINE_SEPARATORS = (
+    ('\u2028'.encode(), b'\\u2028'),
+    ('\u2029'.encode(), b'\\u2029'),
+)
+
+
+class FastJSONRenderer(JSONRenderer):
+    """
+    JSONRenderer que usa orjson si está instalado.
+
+    Produce los mismos bytes que JSONRenderer: las fechas, Decimal y
+    demás tipos que orjson no maneja igual que DRF se delegan al
+    encoder de DRF (encoders.JSONEncoder). Usa el JSONRenderer de DRF
+    (json de la librería estándar) cuando:
+    - orjson no está instalado,
+    - se pide indentación (?format=api o 'application/json; indent=4'),
+    - UNICODE_JSON o COMPACT_JSON están desactivados en REST_FRAMEWORK,
+    - orjson no puede codificar el dato (ej: enteros de más de 64 bits).
+
+    Uso en settings.REST_FRAMEWORK['DEFAULT_RENDERER_CLASSES']:
+        'config.renderers.FastJSONRenderer'
+    """
+
+    # datetime/date/time van al encoder de DRF (ej: '+00:00' -> 'Z')
+    orjson_options = (
+        orjson.OPT_PASSTHROUGH_DATETIME | orjson.OPT_NON_STR_KEYS
+        if orjson is not None else 0
+    )
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b''
+
+        if orjson is None or not self.can_use_orjson(accepted_media_type, renderer_context or {}):
+            return super().render(data, accepted_media_type, renderer_context)
+
+        try:
+            ret = orjson.dumps(data, default=self.default, option=self.orjson_options)
+        except (orjson.JSONEncodeError, OverflowError):
+            return super().render(data, accepted_media_type, renderer_context)
+
+        for separator, escaped in LINE_SEPARATORS:
+            ret = ret.replace(separator, escaped)
+        return ret
+
+    def can_use_orjson(self, accepted_media_type, renderer_context):
+        """
+        Indica si orjson genera el mismo formato que JSONRenderer.
+        """
+        return (
+            api_settings.UNICODE_JSON
+            and api_settings.COMPACT_JSON
+            and self.get_indent(accepted_media_type, renderer_context) is None
+        )
+
+    def default(self, obj):
+        """
+        Codifica los tipos que orjson no maneja (Decimal, fechas, lazy strings...).
+        """
+        return self.encoder_class().default(obj)
+
+
+class FastJSONParser(JSONParser):
+    """
+    JSONParser que usa orjson si está instalado.
+
+    Con orjson no instalado, un charset distinto de UTF-8 o STRICT_JSON
+    desactivado (orjson no acepta NaN/Infinity), usa el JSONParser de DRF.
+    Los cuerpos con números de 19 dígitos o más (posibles enteros de más
+    de 64 bits, que orjson rechaza o lee como float) y los que orjson no
+    puede leer pasan al JSONParser de DRF, igual que en FastJSONRenderer.
+
+    Uso en settings.REST_FRAMEWORK['DEFAULT_PARSER_CLASSES']:
+        'config.renderers.FastJSONParser'
+    """
+
+    renderer_class = FastJSONRenderer
+
+    def parse(self, stream, media_type=None, parser_context=None):
+        parser_context = parser_context or {}
+        encoding = parser_context.get('encoding', settings.DEFAULT_CHARSET)
+
+        if (
+            orjson is None
+            or not self.strict
+            or encoding.lower().replace('_', '-') not in ('utf-8', 'utf8')
+        ):
+            return super().parse(stream, media_type, parser_context)
+
+        body = stream.read()
+        if LONG_NUMBER.search(body):
+            return super().parse(io.BytesIO(body), media_type, parser_context)
+
+        try:
+            return orjson.loads(body)
+        except orjson.JSONDecodeError:
+            # El JSONParser de DRF decide si el cuerpo es válido para json
+            # y reporta el error con su mensaje
+            return super().parse(io.BytesIO(body), media_type, parser_context)
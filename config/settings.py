@@ -40,6 +40,7 @@ INSTALLED_APPS = [
     'django.contrib.sessions',
     'django.contrib.messages',
     'django.contrib.staticfiles',
+    'django.contrib.postgres',
     
     # Third party apps
     'rest_framework',
@@ -57,6 +58,7 @@ INSTALLED_APPS = [
 
 MIDDLEWARE = [
     'django.middleware.security.SecurityMiddleware',
+    'config.middleware.CompressionMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
      'corsheaders.middleware.CorsMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -102,6 +104,39 @@ DATABASES = {
 }
 
 
+# Cache
+# LocMem por defecto (un cache por proceso). En producción se puede usar
+# Redis con REDIS_URL=redis://host:6379/0 (requiere el paquete redis).
+
+REDIS_URL = config('REDIS_URL', default='')
+
+if REDIS_URL:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+            'LOCATION': REDIS_URL,
+        }
+    }
+else:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+            'LOCATION': 'expense-tracker',
+            'OPTIONS': {
+                'MAX_ENTRIES': 10000,  # Al llenarse se descartan las entradas más antiguas (LRU)
+            },
+        }
+    }
+
+# Cache de respuestas GET de /api/expenses/ (0 = desactivado)
+# Activo por defecto solo con Redis: con LocMem cada worker tiene su propio
+# cache y una escritura no invalida las respuestas guardadas en los demás
+EXPENSES_CACHE_ALIAS = config('EXPENSES_CACHE_ALIAS', default='default')
+EXPENSES_CACHE_TIMEOUT = config(
+    'EXPENSES_CACHE_TIMEOUT', default=60 if REDIS_URL else 0, cast=int
+)
+
+
 # Password validation
 # https://docs.djangoproject.com/en/5.0/ref/settings/#auth-password-validators
 
@@ -146,10 +181,13 @@ DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 # Custom User Model
 AUTH_USER_MODEL = 'users.CustomUser'
 
+# Login con una sola consulta a users (distingue cuentas desactivadas)
+AUTHENTICATION_BACKENDS = ['users.backends.EmailBackend']
+
 # REST Framework Configuration
 REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': (
-        'rest_framework_simplejwt.authentication.JWTAuthentication',
+        'users.authentication.CachedJWTAuthentication',
     ),
     'DEFAULT_PERMISSION_CLASSES': (
         'rest_framework.permissions.IsAuthenticated',
@@ -159,13 +197,43 @@ REST_FRAMEWORK = {
         'rest_framework.filters.SearchFilter',
         'rest_framework.filters.OrderingFilter',
     ),
+    # JSON con orjson si está instalado (pip install orjson); si no, json estándar
+    'DEFAULT_RENDERER_CLASSES': (
+        'config.renderers.FastJSONRenderer',
+        'rest_framework.renderers.BrowsableAPIRenderer',
+    ),
+    'DEFAULT_PARSER_CLASSES': (
+        'config.renderers.FastJSONParser',
+        'rest_framework.parsers.FormParser',
+        'rest_framework.parsers.MultiPartParser',
+    ),
     'DEFAULT_PAGINATION_CLASS': 'rest_framework.pagination.PageNumberPagination',
-    'PAGE_SIZE': 10,
+    'PAGE_SIZE': 10,  # Por defecto; /api/expenses/ acepta ?page_size= hasta EXPENSES_MAX_PAGE_SIZE
     
     # Documentación con Spectacular
     'DEFAULT_SCHEMA_CLASS': 'drf_spectacular.openapi.AutoSchema',
 }
 
+# Máximo de gastos por página en /api/expenses/ (?page_size=max usa este valor)
+EXPENSES_MAX_PAGE_SIZE = config('EXPENSES_MAX_PAGE_SIZE', default=500, cast=int)
+
+# /api/expenses/sync/ solo entrega cambios con más de estos segundos, para no
+# perder escrituras que confirman tarde con una fecha anterior al cursor
+EXPENSES_SYNC_SAFETY_MARGIN = config('EXPENSES_SYNC_SAFETY_MARGIN', default=5, cast=int)
+
+# Compresión gzip de respuestas (ver config/middleware.py)
+COMPRESSION_MIN_LENGTH = config('COMPRESSION_MIN_LENGTH', default=1024, cast=int)
+COMPRESSION_CONTENT_TYPES = ('application/json', 'application/x-ndjson', 'text/csv')
+COMPRESSION_EXCLUDED_PATHS = ('/api/auth/', '/admin/')
+
+# Cache del usuario autenticado por JWT, en segundos (0 = desactivado)
+USERS_AUTH_CACHE_ALIAS = config('USERS_AUTH_CACHE_ALIAS', default='default')
+USERS_AUTH_CACHE_TIMEOUT = config('USERS_AUTH_CACHE_TIMEOUT', default=60, cast=int)
+
+# Lecturas de /api/expenses/ autenticadas solo con los claims del JWT, sin
+# consultar users (ver users.authentication.TokenClaimsAuthentication)
+USERS_AUTH_TOKEN_CLAIMS = config('USERS_AUTH_TOKEN_CLAIMS', default=False, cast=bool)
+
 # JWT Configuration
 SIMPLE_JWT = {
     'ACCESS_TOKEN_LIFETIME': timedelta(minutes=config('JWT_ACCESS_TOKEN_LIFETIME', default=60, cast=int)),
@@ -173,6 +241,8 @@ SIMPLE_JWT = {
     'ROTATE_REFRESH_TOKENS': True,
     'BLACKLIST_AFTER_ROTATION': True,
     'AUTH_HEADER_TYPES': ('Bearer',),
+    # Revisa la blacklist con cache antes de consultar token_blacklist
+    'TOKEN_REFRESH_SERIALIZER': 'users.serializers.CachedTokenRefreshSerializer',
 }
 
 # CORS Configuration (para desarrollo)
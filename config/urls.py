@@ -22,11 +22,14 @@ from drf_spectacular.views import (
     SpectacularSwaggerView,
 )
 
+from .views import MetricsView
+
 urlpatterns = [
     path('admin/', admin.site.urls),
     
     path('api/auth/', include('users.urls')),
     path('api/expenses/', include('expenses.urls')),
+    path('api/metrics/', MetricsView.as_view(), name='metrics'),
     
      # Documentación
     path('api/schema/', SpectacularAPIView.as_view(), name='schema'),
@@ -0,0 +1,26 @@
+from rest_framework.views import APIView
+from rest_framework.response import Response
+from rest_framework.permissions import IsAdminUser
+
+from . import metrics
+
+
+class MetricsView(APIView):
+    """
+    Vista para consultar los contadores de rendimiento del proceso.
+
+    GET /api/metrics/
+
+    Solo para administradores (is_staff).
+    """
+
+    permission_classes = [IsAdminUser]
+
+    def get(self, request):
+        """
+        Retorna los contadores actuales.
+
+        Returns:
+            Response: {nombre_contador: valor}
+        """
+        return Response(metrics.snapshot())
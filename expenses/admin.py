@@ -1,5 +1,10 @@
+from collections import defaultdict
+
 from django.contrib import admin
-from .models import Expense
+from django.contrib.auth import get_user_model
+
+from .bulk import bulk_delete_expenses
+from .models import Expense, ExpenseRollup, ExpenseDeletion
 
 
 @admin.register(Expense)
@@ -40,4 +45,74 @@ class ExpenseAdmin(admin.ModelAdmin):
     readonly_fields = ['created_at', 'updated_at']
     
     # Paginación
-    list_per_page = 25
\ No newline at end of file
+    list_per_page = 25
+    
+    def delete_queryset(self, request, queryset):
+        """
+        Acción "Eliminar seleccionados".
+        
+        queryset.delete() no pasa por Expense.delete(): se elimina por
+        usuario con bulk_delete_expenses(), que actualiza los resúmenes,
+        registra las eliminaciones para la sincronización e invalida el
+        cache de cada usuario.
+        """
+        ids_by_user = defaultdict(list)
+        for user_id, expense_id in queryset.values_list('user_id', 'id'):
+            ids_by_user[user_id].append(expense_id)
+        
+        users = get_user_model().objects.in_bulk(list(ids_by_user))
+        for user_id, ids in ids_by_user.items():
+            bulk_delete_expenses(users[user_id], ids)
+
+
+@admin.register(ExpenseRollup)
+class ExpenseRollupAdmin(admin.ModelAdmin):
+    """
+    Admin de solo lectura para los resúmenes mensuales.
+    
+    Se reconstruyen con: python manage.py rebuild_expense_rollups
+    """
+    
+    list_display = [
+        'user',
+        'category',
+        'month',
+        'count',
+        'total',
+    ]
+    
+    list_filter = [
+        'category',
+        'month',
+    ]
+    
+    search_fields = [
+        'user__email',
+    ]
+    
+    readonly_fields = ['user', 'category', 'month', 'count', 'total']
+    
+    def has_add_permission(self, request):
+        return False
+
+
+@admin.register(ExpenseDeletion)
+class ExpenseDeletionAdmin(admin.ModelAdmin):
+    """
+    Admin de solo lectura para el registro de gastos eliminados.
+    """
+    
+    list_display = [
+        'expense_id',
+        'user',
+        'deleted_at',
+    ]
+    
+    search_fields = [
+        'user__email',
+    ]
+    
+    readonly_fields = ['user', 'expense_id', 'deleted_at']
+    
+    def has_add_permission(self, request):
+        return False
@@ -1,6 +1,23 @@
 from django.apps import AppConfig
+from django.conf import settings
+from django.db.models.signals import post_delete, post_save
 
 
 class ExpensesConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'expenses'
+    
+    def ready(self):
+        from .cache import reset_user_cache_on_create, reset_user_cache_on_delete
+        
+        # Invalidar el cache de respuestas al crear o eliminar usuarios
+        post_save.connect(
+            reset_user_cache_on_create,
+            sender=settings.AUTH_USER_MODEL,
+            dispatch_uid='expenses_reset_user_cache_save',
+        )
+        post_delete.connect(
+            reset_user_cache_on_delete,
+            sender=settings.AUTH_USER_MODEL,
+            dispatch_uid='expenses_reset_user_cache_delete',
+        )
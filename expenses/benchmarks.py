@@ -0,0 +1,292 @@
+import random
+import statistics
+import time
+from datetime import date, timedelta
+from decimal import Decimal
+
+from django.db import connection
+
+from .models import Expense
+from .rollups import rebuild_rollups
+
+
+# Suites disponibles: {nombre: función(user, options, write)}
+SUITES = {}
+
+# Palabras para generar títulos y descripciones de prueba
+MERCHANTS = [
+    'Mercado', 'Supermercado', 'Farmacia', 'Restaurante', 'Netflix', 'Spotify',
+    'Gasolina', 'Almacén', 'Panadería', 'Cine', 'Librería', 'Ferretería',
+    'Droguería', 'Carulla', 'Éxito', 'Olímpica', 'Rappi', 'Uber', 'Claro', 'Movistar',
+]
+DETAILS = [
+    'centro', 'norte', 'sur', 'mensual', 'semanal', 'familia', 'trabajo',
+    'regalo', 'urgente', 'domicilio', 'promoción', 'cumpleaños',
+]
+
+
+def register(name):
+    """
+    Decorador para registrar una suite de benchmark.
+    """
+    def decorator(func):
+        SUITES[name] = func
+        return func
+    return decorator
+
+
+def build_fixture(user, rows, batch_size=5000, seed=42):
+    """
+    Crea gastos aleatorios (pero reproducibles) para un usuario.
+
+    Args:
+        user: Usuario dueño de los gastos
+        rows: Cantidad de gastos a crear
+        batch_size: Filas por INSERT
+        seed: Semilla del generador aleatorio
+    """
+    rng = random.Random(seed)
+    categories = [code for code, name in Expense.CATEGORY_CHOICES]
+    today = date.today()
+    created = 0
+
+    while created < rows:
+        size = min(batch_size, rows - created)
+        Expense.objects.bulk_create([
+            Expense(
+                user=user,
+                title=f'{rng.choice(MERCHANTS)} {rng.choice(DETAILS)}',
+                amount=Decimal(rng.randint(100, 50000000)) / 100,
+                category=rng.choice(categories),
+                description=' '.join(rng.sample(DETAILS, 3)) if rng.random() < 0.5 else None,
+                date=today - timedelta(days=rng.randrange(3650)),
+            )
+            for _ in range(size)
+        ])
+        created += size
+
+    rebuild_rollups([user.id])
+
+    if connection.vendor == 'postgresql':
+        with connection.cursor() as cursor:
+            cursor.execute('ANALYZE expenses')
+
+
+def measure(func, repeat):
+    """
+    Ejecuta func repeat veces y retorna la mediana en milisegundos.
+    """
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        timings.append((time.perf_counter() - start) * 1000)
+    return statistics.median(timings)
+
+
+@register('search')
+def benchmark_search(user, options, write):
+    """
+    Compara la búsqueda por subcadena (ILIKE) con la full-text y la
+    aproximada por trigramas (ambas con índice GIN).
+
+    Mide la primera página (10 filas) y el total de resultados.
+    """
+    from .search import ExpenseFullTextSearchFilter
+    from .views import ExpenseViewSet
+
+    backend = ExpenseFullTextSearchFilter()
+    view = ExpenseViewSet()
+    queryset = Expense.objects.filter(user=user)
+
+    modes = ['substring']
+    if connection.vendor == 'postgresql':
+        modes += ['fulltext', 'fuzzy']
+    else:
+        write('Full-text y fuzzy requieren PostgreSQL: solo se mide substring.')
+
+    write(f'{"término":<20}{"modo":<12}{"página (ms)":>14}{"total (ms)":>14}{"filas":>10}')
+
+    for term in ['farmacia', 'mercado centro', 'netflix', 'farmcia']:
+        for mode in modes:
+            results = backend.get_modes()[mode](queryset, term, view)
+            if mode != 'substring':
+                results = results.order_by('-rank', '-date', '-created_at')
+
+            page_ms = measure(lambda: list(results[:10]), options['repeat'])
+            count_ms = measure(results.count, options['repeat'])
+            write(f'{term:<20}{mode:<12}{page_ms:>14.2f}{count_ms:>14.2f}{results.count():>10}')
+
+
+@register('list')
+def benchmark_list(user, options, write):
+    """
+    Compara ExpenseListSerializer (instancias + campos de DRF) con el
+    listado rápido (.values() + ExpenseListValuesSerializer).
+
+    Mide consulta + serialización de una página de 10, 100 y 1000 filas.
+    """
+    from .serializers import ExpenseListSerializer, ExpenseListValuesSerializer
+
+    queryset = Expense.objects.filter(user=user).order_by('-date', '-created_at', '-id')
+    values = queryset.values(*ExpenseListValuesSerializer.VALUES_FIELDS)
+
+    write(f'{"page_size":>10}{"serializer (ms)":>18}{"values (ms)":>14}{"speedup":>10}')
+
+    for page_size in [10, 100, 1000]:
+        model_ms = measure(
+            lambda: ExpenseListSerializer(queryset[:page_size], many=True).data,
+            options['repeat'],
+        )
+        values_ms = measure(
+            lambda: ExpenseListValuesSerializer(values[:page_size], many=True).data,
+            options['repeat'],
+        )
+        write(f'{page_size:>10}{model_ms:>18.2f}{values_ms:>14.2f}{model_ms / values_ms:>9.1f}x')
+
+
+@register('page_size')
+def benchmark_page_size(user, options, write):
+    """
+    Mide cuántas peticiones y cuánto tiempo toma descargar hasta 1000
+    gastos por la vista del listado con distintos ?page_size=.
+
+    Ejecuta la vista completa (autenticación, filtros, paginación y
+    renderizado) sin cache ni red: la latencia de red por petición se
+    suma aparte a cada viaje de ida y vuelta.
+    """
+    from django.test import RequestFactory, override_settings
+    from rest_framework.test import force_authenticate
+    from .views import ExpenseViewSet
+
+    view = ExpenseViewSet.as_view({'get': 'list'})
+    factory = RequestFactory()
+    target = min(Expense.objects.filter(user=user).count(), 1000)
+
+    def fetch_all(page_size):
+        requests = 0
+        fetched = 0
+        page = 1
+        while fetched < target:
+            request = factory.get('/api/expenses/', {'page': page, 'page_size': page_size})
+            force_authenticate(request, user=user)
+            response = view(request)
+            response.render()
+            requests += 1
+            fetched += len(response.data['results'])
+            page += 1
+            if not response.data['next']:
+                break
+        return requests
+
+    write(f'Descargando {target} gastos')
+    write(f'{"page_size":>10}{"peticiones":>12}{"total (ms)":>14}{"ms/petición":>14}')
+
+    with override_settings(EXPENSES_CACHE_TIMEOUT=0, ALLOWED_HOSTS=['testserver']):
+        for page_size in ['10', '50', '100', 'max']:
+            requests = fetch_all(page_size)
+            total_ms = measure(lambda: fetch_all(page_size), options['repeat'])
+            write(f'{page_size:>10}{requests:>12}{total_ms:>14.2f}{total_ms / requests:>14.2f}')
+
+
+@register('renderer')
+def benchmark_renderer(user, options, write):
+    """
+    Compara JSONRenderer (json estándar) con FastJSONRenderer (orjson)
+    al renderizar respuestas de /api/expenses/ de 10, 100 y 1000 filas.
+    """
+    from django.test import RequestFactory, override_settings
+    from rest_framework.renderers import JSONRenderer
+    from rest_framework.test import force_authenticate
+    from config import renderers
+    from .views import ExpenseViewSet
+
+    if renderers.orjson is None:
+        write('orjson no está instalado: FastJSONRenderer usa json estándar.')
+
+    view = ExpenseViewSet.as_view({'get': 'list'})
+    factory = RequestFactory()
+    standard = JSONRenderer()
+    fast = renderers.FastJSONRenderer()
+
+    write(f'{"page_size":>10}{"json (ms)":>12}{"orjson (ms)":>14}{"speedup":>10}{"bytes":>10}')
+
+    with override_settings(EXPENSES_CACHE_TIMEOUT=0, ALLOWED_HOSTS=['testserver']):
+        for page_size in [10, 100, 1000]:
+            request = factory.get('/api/expenses/', {'page_size': page_size})
+            force_authenticate(request, user=user)
+            data = view(request).data
+
+            if standard.render(data) != fast.render(data):
+                write(f'{page_size:>10}  ¡Las salidas no coinciden!')
+                continue
+
+            json_ms = measure(lambda: standard.render(data), options['repeat'])
+            fast_ms = measure(lambda: fast.render(data), options['repeat'])
+            write(
+                f'{page_size:>10}{json_ms:>12.3f}{fast_ms:>14.3f}'
+                f'{json_ms / fast_ms:>9.1f}x{len(fast.render(data)):>10}'
+            )
+
+
+@register('auth')
+def benchmark_auth(user, options, write):
+    """
+    Compara consultas y tiempo por petición GET según la autenticación:
+
+    - jwt: JWTAuthentication de simplejwt (consulta users siempre)
+    - cached: CachedJWTAuthentication con el usuario ya en cache
+    - claims: TokenClaimsAuthentication (USERS_AUTH_TOKEN_CLAIMS activo)
+
+    Usa un access token real en el header Authorization, sin cache de
+    respuestas para que cada petición ejecute la vista completa.
+    """
+    from django.test import RequestFactory, override_settings
+    from django.test.utils import CaptureQueriesContext
+    from rest_framework_simplejwt.authentication import JWTAuthentication
+    from users.authentication import CachedJWTAuthentication, TokenClaimsAuthentication
+    from users.tokens import tokens_for_user
+    from .views import ExpenseViewSet
+
+    factory = RequestFactory()
+    auth_header = f'Bearer {tokens_for_user(user)["access"]}'
+    expense_id = Expense.objects.filter(user=user).values_list('id', flat=True).first()
+
+    modes = [
+        ('jwt', JWTAuthentication),
+        ('cached', CachedJWTAuthentication),
+        ('claims', TokenClaimsAuthentication),
+    ]
+    endpoints = [
+        ('list', {'get': 'list'}, '/api/expenses/', {}),
+        ('retrieve', {'get': 'retrieve'}, f'/api/expenses/{expense_id}/', {'pk': expense_id}),
+    ]
+
+    write(f'{"endpoint":>10}{"auth":>8}{"consultas":>11}{"a users":>9}{"ms/petición":>14}')
+
+    with override_settings(
+        EXPENSES_CACHE_TIMEOUT=0,
+        USERS_AUTH_TOKEN_CLAIMS=True,
+        ALLOWED_HOSTS=['testserver'],
+    ):
+        for endpoint, actions, path, kwargs in endpoints:
+            for mode, authentication_class in modes:
+                view = ExpenseViewSet.as_view(actions, authentication_classes=[authentication_class])
+
+                def get():
+                    request = factory.get(path, HTTP_AUTHORIZATION=auth_header)
+                    response = view(request, **kwargs)
+                    response.render()
+                    return response
+
+                # Primera petición fuera de la medición (llena el cache del usuario)
+                get()
+                with CaptureQueriesContext(connection) as ctx:
+                    get()
+                user_queries = sum('"users"' in query['sql'] for query in ctx.captured_queries)
+
+                ms = measure(get, options['repeat'])
+                write(
+                    f'{endpoint:>10}{mode:>8}{len(ctx.captured_queries):>11}'
+                    f'{user_queries:>9}{ms:>14.3f}'
+                )
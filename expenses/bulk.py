@@ -0,0 +1,113 @@
+from django.db import transaction
+from django.utils import timezone
+
+from . import rollups
+from .cache import invalidate_user
+from .models import Expense, ExpenseDeletion
+
+
+def bulk_create_expenses(user, items, batch_size=500):
+    """
+    Crea varios gastos con INSERTs de varias filas.
+
+    Expense.objects.bulk_create() no pasa por Expense.save(), por eso
+    los resúmenes mensuales se actualizan (y el cache se invalida) aquí,
+    en la misma transacción.
+
+    Args:
+        user: Usuario dueño de los gastos
+        items: Lista de dicts ya validados (validated_data del serializer)
+        batch_size: Filas por INSERT
+
+    Returns:
+        list: Instancias de Expense creadas (con id)
+    """
+    expenses = [Expense(user=user, **item) for item in items]
+
+    with transaction.atomic():
+        created = Expense.objects.bulk_create(expenses, batch_size=batch_size)
+        rollups.apply_deltas(rollups.deltas_for(created))
+        invalidate_user(user.id)
+
+    return created
+
+
+def _lock(queryset):
+    """
+    Bloquea las filas (SELECT ... FOR UPDATE) hasta el fin de la transacción.
+
+    Evita que otra escritura cambie los gastos entre el cálculo de
+    los resúmenes y el UPDATE/DELETE.
+
+    Returns:
+        list: Ids de los gastos bloqueados
+    """
+    return list(queryset.select_for_update().values_list('id', flat=True))
+
+
+def bulk_update_expenses(user, ids, changes):
+    """
+    Aplica los mismos cambios a varios gastos con un solo UPDATE.
+
+    UPDATE expenses SET ... WHERE user_id = :user AND id IN (:ids)
+
+    Args:
+        user: Usuario dueño de los gastos (los ids de otros usuarios se ignoran)
+        ids: Lista de ids de gastos
+        changes: dict de campos validados a modificar
+
+    Returns:
+        int: Cantidad de gastos actualizados
+    """
+    queryset = Expense.objects.filter(user=user, id__in=ids)
+    affects_rollups = any(field in changes for field in ('category', 'date', 'amount'))
+
+    with transaction.atomic():
+        if affects_rollups:
+            _lock(queryset)
+            before = rollups.grouped_deltas(queryset, sign=-1)
+
+        # queryset.update() no actualiza auto_now: se asigna explícitamente
+        updated = queryset.update(updated_at=timezone.now(), **changes)
+
+        if affects_rollups and updated:
+            after = rollups.grouped_deltas(queryset)
+            rollups.apply_deltas(rollups.merge_deltas(before, after))
+
+        if updated:
+            invalidate_user(user.id)
+
+    return updated
+
+
+def bulk_delete_expenses(user, ids, batch_size=500):
+    """
+    Elimina varios gastos con un solo DELETE.
+
+    DELETE FROM expenses WHERE user_id = :user AND id IN (:ids)
+
+    Args:
+        user: Usuario dueño de los gastos (los ids de otros usuarios se ignoran)
+        ids: Lista de ids de gastos
+        batch_size: Filas por INSERT del registro de eliminaciones
+
+    Returns:
+        int: Cantidad de gastos eliminados
+    """
+    queryset = Expense.objects.filter(user=user, id__in=ids)
+
+    with transaction.atomic():
+        locked_ids = _lock(queryset)
+        deltas = rollups.grouped_deltas(queryset, sign=-1)
+        deleted, _ = queryset.delete()
+        rollups.apply_deltas(deltas)
+
+        if deleted:
+            # Registro de eliminaciones para la sincronización incremental
+            ExpenseDeletion.objects.bulk_create(
+                [ExpenseDeletion(user=user, expense_id=expense_id) for expense_id in locked_ids],
+                batch_size=batch_size,
+            )
+            invalidate_user(user.id)
+
+    return deleted
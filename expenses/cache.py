@@ -0,0 +1,159 @@
+import hashlib
+import time
+from functools import wraps
+from urllib.parse import urlencode
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db import transaction
+from rest_framework.response import Response
+
+from config import metrics
+
+
+# Métodos cuyas respuestas se pueden cachear
+CACHEABLE_METHODS = ('GET', 'HEAD')
+
+
+def get_cache():
+    """
+    Retorna el backend de cache configurado en EXPENSES_CACHE_ALIAS.
+    """
+    return caches[getattr(settings, 'EXPENSES_CACHE_ALIAS', 'default')]
+
+
+def get_timeout():
+    """
+    Retorna el TTL en segundos de las respuestas cacheadas (0 = desactivado).
+    """
+    return getattr(settings, 'EXPENSES_CACHE_TIMEOUT', 0)
+
+
+def generation_key(user_id):
+    return f'expenses:gen:{user_id}'
+
+
+def get_generation(user_id):
+    """
+    Retorna la generación actual de los gastos de un usuario.
+
+    La generación forma parte de la clave de cada respuesta cacheada:
+    al cambiar, las respuestas anteriores dejan de usarse y expiran
+    solas por TTL o por LRU.
+
+    Si no existe (nunca se pidió o fue invalidada) se inicia con la hora
+    actual en nanosegundos, que siempre es mayor que las anteriores.
+    """
+    cache = get_cache()
+    key = generation_key(user_id)
+    generation = cache.get(key)
+    if generation is None:
+        cache.add(key, time.time_ns(), timeout=None)
+        generation = cache.get(key)
+    return generation
+
+
+def _invalidate(user_ids):
+    get_cache().delete_many([generation_key(user_id) for user_id in user_ids])
+
+
+def invalidate_user(*user_ids):
+    """
+    Invalida las respuestas cacheadas de los usuarios.
+
+    Se invalida de inmediato y otra vez al confirmar la transacción, para
+    que un GET concurrente no guarde datos anteriores al COMMIT con la
+    generación nueva.
+
+    Args:
+        user_ids: Ids de los usuarios cuyos gastos cambiaron
+    """
+    user_ids = set(user_ids)
+    if not user_ids:
+        return
+    _invalidate(user_ids)
+    transaction.on_commit(lambda: _invalidate(user_ids))
+
+
+def response_key(request, generation):
+    """
+    Construye la clave de cache de una respuesta.
+
+    Combina usuario, generación, URL (con host, porque los links de
+    paginación son absolutos), formato de respuesta y los parámetros
+    ordenados, para que ?a=1&b=2 y ?b=2&a=1 compartan la entrada.
+    """
+    params = sorted(
+        (name, value)
+        for name, values in request.query_params.lists()
+        for value in values
+    )
+    renderer = getattr(request, 'accepted_renderer', None)
+    raw = '|'.join([
+        request.build_absolute_uri(request.path),
+        getattr(renderer, 'format', '') or '',
+        urlencode(params),
+    ])
+    digest = hashlib.sha1(raw.encode('utf-8')).hexdigest()
+    return f'expenses:resp:{request.user.id}:{generation}:{digest}'
+
+
+def cache_response(view_method):
+    """
+    Decorador para cachear las respuestas GET de ExpenseViewSet.
+
+    Solo se cachean respuestas 200 de usuarios autenticados. El contenido
+    se guarda antes de renderizar (response.data), así que el formato de
+    Decimal y fechas es el mismo con o sin cache.
+
+    Las escrituras sobre los gastos de un usuario llaman a
+    invalidate_user(), que cambia la generación de sus claves.
+    """
+    @wraps(view_method)
+    def wrapper(self, request, *args, **kwargs):
+        timeout = get_timeout()
+        if (
+            not timeout
+            or request.method not in CACHEABLE_METHODS
+            or not request.user.is_authenticated
+        ):
+            return view_method(self, request, *args, **kwargs)
+
+        cache = get_cache()
+        key = response_key(request, get_generation(request.user.id))
+        data = cache.get(key)
+
+        if data is not None:
+            metrics.incr('expenses.cache.hit')
+            return Response(data)
+
+        metrics.incr('expenses.cache.miss')
+        response = view_method(self, request, *args, **kwargs)
+
+        if response.status_code == 200 and not getattr(response, 'streaming', False):
+            cache.set(key, response.data, timeout)
+
+        return response
+
+    return wrapper
+
+
+def reset_user_cache_on_create(sender, instance, created, **kwargs):
+    """
+    Receptor de post_save del usuario.
+
+    Al crear un usuario se descarta cualquier generación previa con el
+    mismo id (ej: secuencias reiniciadas).
+    """
+    if created:
+        invalidate_user(instance.pk)
+
+
+def reset_user_cache_on_delete(sender, instance, **kwargs):
+    """
+    Receptor de post_delete del usuario.
+
+    Descarta sus respuestas cacheadas: el CASCADE borra los gastos sin
+    pasar por Expense.delete().
+    """
+    invalidate_user(instance.pk)
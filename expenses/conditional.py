@@ -0,0 +1,171 @@
+import hashlib
+from functools import wraps
+
+from django.db.models import Count, Max
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date, quote_etag
+from rest_framework import status
+from rest_framework.response import Response
+
+
+# Métodos de lectura (304) y de escritura que aceptan If-Match (412)
+SAFE_METHODS = ('GET', 'HEAD')
+WRITE_METHODS = ('PUT', 'PATCH')
+
+
+def make_etag(request, *parts):
+    """
+    Construye un ETag fuerte a partir de la URL y los valores dados.
+
+    Incluye el usuario, la ruta, los parámetros ordenados y el formato de
+    respuesta, porque cada combinación produce un JSON distinto.
+
+    Args:
+        request: Request de DRF
+        parts: Valores que identifican la versión de los datos
+
+    Returns:
+        str: ETag entre comillas (ej: '"3f2a..."')
+    """
+    params = sorted(
+        (name, value)
+        for name, values in request.query_params.lists()
+        for value in values
+    )
+    renderer = getattr(request, 'accepted_renderer', None)
+    raw = '|'.join(str(part) for part in (
+        request.user.id,
+        request.path,
+        params,
+        getattr(renderer, 'format', '') or '',
+        *parts,
+    ))
+    return quote_etag(hashlib.sha1(raw.encode('utf-8')).hexdigest())
+
+
+def queryset_validators(request, queryset):
+    """
+    Calcula ETag y Last-Modified de un listado con una sola consulta.
+
+    SELECT MAX(updated_at), COUNT(id) FROM expenses WHERE ...
+
+    Eliminar un gasto no cambia MAX(updated_at), por eso el ETag incluye
+    también COUNT(id). Se calcula siempre desde la BD: la generación del
+    cache es local a cada proceso con LocMem y no sirve como validador
+    entre workers.
+
+    Args:
+        request: Request de DRF
+        queryset: QuerySet de Expense ya filtrado
+
+    Returns:
+        tuple: (etag, last_modified) con last_modified como datetime o None
+    """
+    result = queryset.order_by().aggregate(
+        last_modified=Max('updated_at'),
+        count=Count('id'),
+    )
+    last_modified = result['last_modified']
+    etag = make_etag(
+        request,
+        last_modified.isoformat() if last_modified else '',
+        result['count'],
+    )
+    return etag, last_modified
+
+
+def object_validators(request, obj):
+    """
+    Calcula ETag y Last-Modified de un gasto a partir de updated_at.
+
+    Returns:
+        tuple: (etag, last_modified)
+    """
+    return make_etag(request, obj.pk, obj.updated_at.isoformat()), obj.updated_at
+
+
+def set_validators(response, etag, last_modified):
+    """
+    Agrega los headers ETag y Last-Modified a la respuesta.
+    """
+    if etag:
+        response['ETag'] = etag
+    if last_modified:
+        response['Last-Modified'] = http_date(last_modified.timestamp())
+    return response
+
+
+def accept_coded_etag(request, etag):
+    """
+    Acepta en If-Match el ETag propio debilitado por la compresión.
+
+    GZipMiddleware (ver config.middleware) convierte el ETag fuerte en
+    W/"..." al comprimir la respuesta, y Django rechaza los ETags débiles
+    en If-Match. La API solo emite ETags fuertes: un W/ con el mismo valor
+    solo pudo agregarlo la compresión, así que se compara como fuerte.
+    Cualquier otro ETag débil se sigue rechazando.
+
+    Args:
+        request: Request de DRF
+        etag: ETag fuerte de la versión actual
+    """
+    header = request.META.get('HTTP_IF_MATCH')
+    if not header or not etag:
+        return
+
+    weak = 'W/' + etag
+    tags = [tag.strip() for tag in header.split(',')]
+    if weak in tags:
+        request.META['HTTP_IF_MATCH'] = ', '.join(etag if tag == weak else tag for tag in tags)
+
+
+def conditional_response(get_validators, use_last_modified=True):
+    """
+    Decorador para responder 304/412 sin serializar los datos.
+
+    - GET/HEAD con If-None-Match (o If-Modified-Since) vigente -> 304.
+    - PUT/PATCH con If-Match (o If-Unmodified-Since) que no coincide -> 412.
+
+    Args:
+        get_validators: Función (view, request) -> (etag, last_modified)
+        use_last_modified: False para evaluar solo los ETags (ej: listados,
+            donde eliminar un gasto no cambia el máximo de updated_at)
+    """
+    def decorator(view_method):
+        @wraps(view_method)
+        def wrapper(self, request, *args, **kwargs):
+            if request.method not in SAFE_METHODS + WRITE_METHODS:
+                return view_method(self, request, *args, **kwargs)
+
+            etag, last_modified = get_validators(self, request)
+            precondition_date = last_modified if use_last_modified else None
+            accept_coded_etag(request, etag)
+
+            conditional = get_conditional_response(
+                request,
+                etag=etag,
+                last_modified=int(precondition_date.timestamp()) if precondition_date else None,
+            )
+
+            if conditional is not None and conditional.status_code == status.HTTP_304_NOT_MODIFIED:
+                return set_validators(conditional, etag, last_modified)
+
+            if conditional is not None:
+                return Response({
+                    'error': 'El recurso fue modificado por otra petición. Vuelve a consultarlo.'
+                }, status=status.HTTP_412_PRECONDITION_FAILED)
+
+            response = view_method(self, request, *args, **kwargs)
+
+            if not 200 <= response.status_code < 300:
+                return response
+
+            if request.method in WRITE_METHODS:
+                # Validadores de la nueva versión, para el próximo If-Match
+                etag, last_modified = get_validators(self, request)
+
+            return set_validators(response, etag, last_modified)
+
+        return wrapper
+
+    return decorator
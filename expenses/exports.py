@@ -0,0 +1,104 @@
+import csv
+import json
+
+from rest_framework import serializers
+
+from .models import Expense
+
+
+# Columnas del archivo exportado (en orden)
+EXPORT_FIELDS = [
+    'id',
+    'title',
+    'amount',
+    'category',
+    'description',
+    'date',
+    'created_at',
+    'updated_at',
+]
+
+# Columnas calculadas que se agregan a cada fila
+EXPORT_HEADER = EXPORT_FIELDS[:4] + ['category_display'] + EXPORT_FIELDS[4:]
+
+# Filas que se traen de la BD por cada viaje del cursor
+EXPORT_CHUNK_SIZE = 2000
+
+
+class Echo:
+    """
+    Buffer que solo devuelve lo que se escribe.
+
+    Permite usar csv.writer para generar filas una por una sin
+    acumular el archivo completo en memoria.
+    """
+
+    def write(self, value):
+        return value
+
+
+def iter_export_rows(queryset, chunk_size=EXPORT_CHUNK_SIZE):
+    """
+    Recorre los gastos como diccionarios con los valores ya formateados.
+
+    Usa values_list() + iterator(), así en PostgreSQL se lee con un
+    cursor del lado del servidor y la memoria no crece con la cantidad
+    de gastos.
+
+    Args:
+        queryset: QuerySet de Expense (ya filtrado y ordenado)
+        chunk_size: Filas por cada lectura del cursor
+
+    Yields:
+        dict: Fila con las columnas de EXPORT_HEADER
+    """
+    labels = dict(Expense.CATEGORY_CHOICES)
+    datetime_field = serializers.DateTimeField()
+
+    rows = queryset.values_list(*EXPORT_FIELDS).iterator(chunk_size=chunk_size)
+
+    for (expense_id, title, amount, category, description,
+         expense_date, created_at, updated_at) in rows:
+        yield {
+            'id': expense_id,
+            'title': title,
+            'amount': str(amount),
+            'category': category,
+            'category_display': labels.get(category, category),
+            'description': description or '',
+            'date': expense_date.isoformat(),
+            'created_at': datetime_field.to_representation(created_at),
+            'updated_at': datetime_field.to_representation(updated_at),
+        }
+
+
+def stream_csv(queryset):
+    """
+    Genera el CSV de gastos línea por línea.
+
+    Yields:
+        str: Encabezado y luego una línea por gasto
+    """
+    writer = csv.writer(Echo())
+    yield writer.writerow(EXPORT_HEADER)
+
+    for row in iter_export_rows(queryset):
+        yield writer.writerow([row[column] for column in EXPORT_HEADER])
+
+
+def stream_ndjson(queryset):
+    """
+    Genera los gastos en NDJSON (un objeto JSON por línea).
+
+    Yields:
+        str: Una línea JSON por gasto
+    """
+    for row in iter_export_rows(queryset):
+        yield json.dumps(row, ensure_ascii=False) + '\n'
+
+
+# Formatos disponibles: (generador, content type, extensión)
+EXPORT_FORMATS = {
+    'csv': (stream_csv, 'text/csv; charset=utf-8', 'csv'),
+    'ndjson': (stream_ndjson, 'application/x-ndjson; charset=utf-8', 'ndjson'),
+}
@@ -0,0 +1,121 @@
+import csv
+import io
+
+from rest_framework import serializers
+
+from .bulk import bulk_create_expenses
+from .serializers import ExpenseSerializer
+
+
+# Columnas que se leen del CSV (description es opcional)
+IMPORT_COLUMNS = ['title', 'amount', 'category', 'description', 'date']
+REQUIRED_COLUMNS = ['title', 'amount', 'category', 'date']
+
+# Filas válidas por cada INSERT
+IMPORT_BATCH_SIZE = 500
+
+# Máximo de errores detallados en el reporte (el conteo sigue siendo exacto)
+MAX_REPORTED_ERRORS = 1000
+
+
+class CSVImportError(ValueError):
+    """
+    El CSV no se pudo seguir leyendo a mitad del archivo (ej: bytes que
+    no son UTF-8, un campo demasiado grande o comillas mal cerradas).
+
+    Attributes:
+        row: Línea desde la que no se pudo leer
+        report: Reporte de las filas anteriores, que ya quedaron creadas
+    """
+
+    def __init__(self, message, row, report):
+        super().__init__(message)
+        self.row = row
+        self.report = report
+
+
+def import_expenses_csv(user, binary_file, batch_size=IMPORT_BATCH_SIZE):
+    """
+    Importa gastos desde un CSV leyéndolo fila por fila.
+
+    Cada fila se valida con las mismas reglas de ExpenseSerializer
+    (monto positivo, fecha no futura, descripción en gastos mayores a
+    $1,000,000). Las filas válidas se insertan con bulk_create en lotes
+    de batch_size; las inválidas se reportan con su número de línea.
+    La memoria usada depende del tamaño del lote, no del archivo.
+
+    Args:
+        user: Usuario dueño de los gastos
+        binary_file: Archivo abierto en modo binario (UTF-8, con o sin BOM)
+        batch_size: Filas por INSERT
+
+    Returns:
+        dict: {'created': int, 'failed': int, 'errors': [{'row': int, 'errors': dict}]}
+
+    Raises:
+        ValueError: Si el CSV no tiene las columnas obligatorias (no se crea nada)
+        CSVImportError: Si el archivo no se puede leer a mitad de camino; las
+            filas anteriores quedan creadas y se informan en el reporte
+    """
+    text = io.TextIOWrapper(binary_file, encoding='utf-8-sig', newline='')
+
+    try:
+        reader = csv.DictReader(text)
+        try:
+            fieldnames = reader.fieldnames or []
+        except (csv.Error, UnicodeDecodeError) as e:
+            raise ValueError(f'No se pudo leer el encabezado: {e}')
+
+        missing = [column for column in REQUIRED_COLUMNS if column not in fieldnames]
+        if missing:
+            raise ValueError(f'Faltan columnas en el CSV: {", ".join(missing)}')
+
+        validator = ExpenseSerializer()
+        report = {'created': 0, 'failed': 0, 'errors': []}
+        batch = []
+
+        # La línea 1 es el encabezado
+        line_number = 1
+        while True:
+            line_number += 1
+            try:
+                row = next(reader)
+            except StopIteration:
+                break
+            except (csv.Error, UnicodeDecodeError) as e:
+                # Se crean las filas válidas pendientes: así 'created' cubre
+                # todas las filas anteriores a line_number y el cliente puede
+                # reintentar desde esa línea sin duplicar gastos
+                if batch:
+                    report['created'] += len(bulk_create_expenses(user, batch, batch_size))
+                raise CSVImportError(
+                    f'No se pudo leer desde la línea {line_number}: {e}',
+                    line_number,
+                    report,
+                )
+
+            data = {
+                column: row[column].strip()
+                for column in IMPORT_COLUMNS
+                if row.get(column) and row[column].strip()
+            }
+
+            try:
+                batch.append(validator.run_validation(data))
+            except serializers.ValidationError as e:
+                report['failed'] += 1
+                if len(report['errors']) < MAX_REPORTED_ERRORS:
+                    report['errors'].append({'row': line_number, 'errors': e.detail})
+                continue
+
+            if len(batch) >= batch_size:
+                report['created'] += len(bulk_create_expenses(user, batch, batch_size))
+                batch = []
+
+        if batch:
+            report['created'] += len(bulk_create_expenses(user, batch, batch_size))
+
+        return report
+    finally:
+        # No cerrar el archivo original al liberar el wrapper de texto
+        text.detach()
@@ -0,0 +1,60 @@
+import uuid
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+
+from expenses.benchmarks import SUITES, build_fixture
+
+User = get_user_model()
+
+
+class Command(BaseCommand):
+    """
+    Ejecuta benchmarks de rendimiento sobre datos generados.
+
+    Crea un usuario temporal con --rows gastos, ejecuta la suite y
+    elimina los datos al terminar (salvo con --keep).
+
+    Uso:
+        python manage.py benchmark_expenses search --rows 1000000
+    """
+
+    help = 'Ejecuta una suite de benchmark sobre gastos generados.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('suite', choices=sorted(SUITES), help='Suite a ejecutar.')
+        parser.add_argument(
+            '--rows',
+            type=int,
+            default=10000,
+            help='Cantidad de gastos a generar (por defecto 10000).',
+        )
+        parser.add_argument(
+            '--repeat',
+            type=int,
+            default=5,
+            help='Repeticiones por medición; se reporta la mediana (por defecto 5).',
+        )
+        parser.add_argument(
+            '--keep',
+            action='store_true',
+            help='No eliminar el usuario ni los gastos generados.',
+        )
+
+    def handle(self, *args, **options):
+        user = User.objects.create_user(
+            email=f'benchmark-{uuid.uuid4().hex[:12]}@example.com',
+            password=None,
+            first_name='Benchmark',
+            last_name='User',
+        )
+
+        try:
+            self.stdout.write(f'Generando {options["rows"]} gastos para {user.email}...')
+            build_fixture(user, options['rows'])
+
+            self.stdout.write(f'Suite: {options["suite"]}')
+            SUITES[options['suite']](user, options, self.stdout.write)
+        finally:
+            if not options['keep']:
+                user.delete()
@@ -0,0 +1,54 @@
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+
+from expenses.imports import CSVImportError, import_expenses_csv, IMPORT_BATCH_SIZE
+
+User = get_user_model()
+
+
+class Command(BaseCommand):
+    """
+    Importa gastos de un usuario desde un archivo CSV.
+
+    Columnas: title, amount, category, description (opcional), date
+
+    Uso:
+        python manage.py import_expenses usuario@example.com gastos.csv
+    """
+
+    help = 'Importa gastos desde un archivo CSV para un usuario.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('email', help='Email del dueño de los gastos.')
+        parser.add_argument('path', help='Ruta del archivo CSV (UTF-8).')
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=IMPORT_BATCH_SIZE,
+            help=f'Filas por INSERT (por defecto {IMPORT_BATCH_SIZE}).',
+        )
+
+    def handle(self, *args, **options):
+        try:
+            user = User.objects.get(email=options['email'])
+        except User.DoesNotExist:
+            raise CommandError(f'No existe el usuario {options["email"]}.')
+
+        try:
+            with open(options['path'], 'rb') as csv_file:
+                report = import_expenses_csv(user, csv_file, options['batch_size'])
+        except OSError as e:
+            raise CommandError(f'No se pudo leer el archivo: {e}')
+        except CSVImportError as e:
+            raise CommandError(
+                f'{e}. Gastos importados antes de esa línea: {e.report["created"]}.'
+            )
+        except ValueError as e:
+            raise CommandError(str(e))
+
+        for error in report['errors']:
+            self.stderr.write(f'Fila {error["row"]}: {dict(error["errors"])}')
+
+        self.stdout.write(self.style.SUCCESS(
+            f'Gastos importados: {report["created"]}. Filas con errores: {report["failed"]}.'
+        ))
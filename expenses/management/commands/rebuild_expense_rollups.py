@@ -0,0 +1,42 @@
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+
+from expenses.rollups import rebuild_rollups
+
+User = get_user_model()
+
+
+class Command(BaseCommand):
+    """
+    Reconstruye los resúmenes mensuales de gastos (ExpenseRollup).
+
+    Uso:
+        python manage.py rebuild_expense_rollups
+        python manage.py rebuild_expense_rollups --email usuario@example.com
+    """
+
+    help = 'Reconstruye los resúmenes mensuales de gastos desde la tabla expenses.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--email',
+            action='append',
+            dest='emails',
+            help='Reconstruir solo los resúmenes de este usuario (se puede repetir).',
+        )
+
+    def handle(self, *args, **options):
+        user_ids = None
+
+        if options['emails']:
+            user_ids = list(
+                User.objects.filter(email__in=options['emails']).values_list('id', flat=True)
+            )
+            if len(user_ids) != len(set(options['emails'])):
+                raise CommandError('Alguno de los usuarios indicados no existe.')
+
+        created = rebuild_rollups(user_ids)
+
+        self.stdout.write(self.style.SUCCESS(
+            f'Resúmenes reconstruidos: {created}'
+        ))
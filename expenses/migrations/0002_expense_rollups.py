@@ -0,0 +1,62 @@
+# Generated by Django 5.2.18 on 2026-10-18 10:54
+
+import django.core.validators
+import django.db.models.deletion
+from decimal import Decimal
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import Count, Sum
+from django.db.models.functions import TruncMonth
+
+
+def build_rollups(apps, schema_editor):
+    """Crea los resúmenes mensuales de los gastos existentes."""
+    Expense = apps.get_model('expenses', 'Expense')
+    ExpenseRollup = apps.get_model('expenses', 'ExpenseRollup')
+
+    rows = (
+        Expense.objects
+        .order_by()
+        .annotate(month=TruncMonth('date'))
+        .values('user_id', 'category', 'month')
+        .annotate(count=Count('id'), total=Sum('amount'))
+    )
+    ExpenseRollup.objects.bulk_create(
+        [ExpenseRollup(**row) for row in rows.iterator()],
+        batch_size=1000,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('expenses', '0001_initial'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='expense',
+            name='amount',
+            field=models.DecimalField(decimal_places=2, help_text='Monto del gasto en pesos', max_digits=10, validators=[django.core.validators.MinValueValidator(Decimal('0.01'))], verbose_name='monto'),
+        ),
+        migrations.CreateModel(
+            name='ExpenseRollup',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('category', models.CharField(choices=[('GROCERIES', 'Comestibles'), ('LEISURE', 'Entretenimiento'), ('ELECTRONICS', 'Electrónicos'), ('UTILITIES', 'Servicios Públicos'), ('CLOTHING', 'Ropa'), ('HEALTH', 'Salud'), ('OTHERS', 'Otros')], max_length=20, verbose_name='categoría')),
+                ('month', models.DateField(help_text='Primer día del mes del resumen', verbose_name='mes')),
+                ('count', models.IntegerField(default=0, verbose_name='cantidad de gastos')),
+                ('total', models.DecimalField(decimal_places=2, default=Decimal('0.00'), max_digits=14, verbose_name='monto total')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='expense_rollups', to=settings.AUTH_USER_MODEL, verbose_name='usuario')),
+            ],
+            options={
+                'verbose_name': 'resumen de gastos',
+                'verbose_name_plural': 'resúmenes de gastos',
+                'db_table': 'expense_rollups',
+                'ordering': ['-month', 'category'],
+                'constraints': [models.UniqueConstraint(fields=('user', 'category', 'month'), name='unique_expense_rollup')],
+            },
+        ),
+        migrations.RunPython(build_rollups, migrations.RunPython.noop),
+    ]
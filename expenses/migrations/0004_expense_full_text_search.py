@@ -0,0 +1,77 @@
+# Generated by Django 5.2.18 on 2026-10-18 11:00
+
+import django.contrib.postgres.indexes
+import django.contrib.postgres.search
+from django.conf import settings
+from django.db import migrations
+
+
+# El vector se calcula en la BD para que también se actualice con
+# bulk_create() y queryset.update(), que no pasan por Expense.save()
+CREATE_TRIGGER_SQL = """
+CREATE OR REPLACE FUNCTION expenses_search_vector_update() RETURNS trigger AS $$
+BEGIN
+    NEW.search_vector :=
+        setweight(to_tsvector('spanish', coalesce(NEW.title, '')), 'A') ||
+        setweight(to_tsvector('spanish', coalesce(NEW.description, '')), 'B');
+    RETURN NEW;
+END
+$$ LANGUAGE plpgsql;
+
+CREATE TRIGGER expenses_search_vector_trigger
+BEFORE INSERT OR UPDATE OF title, description ON expenses
+FOR EACH ROW EXECUTE FUNCTION expenses_search_vector_update();
+
+UPDATE expenses SET search_vector =
+    setweight(to_tsvector('spanish', coalesce(title, '')), 'A') ||
+    setweight(to_tsvector('spanish', coalesce(description, '')), 'B');
+
+CREATE INDEX expenses_search_vector_gin ON expenses USING gin (search_vector);
+"""
+
+DROP_TRIGGER_SQL = """
+DROP INDEX IF EXISTS expenses_search_vector_gin;
+DROP TRIGGER IF EXISTS expenses_search_vector_trigger ON expenses;
+DROP FUNCTION IF EXISTS expenses_search_vector_update();
+"""
+
+
+def create_search_trigger(apps, schema_editor):
+    """Crea el trigger, llena los vectores existentes y crea el índice GIN."""
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    schema_editor.execute(CREATE_TRIGGER_SQL)
+
+
+def drop_search_trigger(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    schema_editor.execute(DROP_TRIGGER_SQL)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('expenses', '0003_keyset_pagination_indexes'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='expense',
+            name='search_vector',
+            field=django.contrib.postgres.search.SearchVectorField(editable=False, null=True, verbose_name='vector de búsqueda'),
+        ),
+        # El índice GIN y el trigger solo existen en PostgreSQL
+        migrations.SeparateDatabaseAndState(
+            state_operations=[
+                migrations.AddIndex(
+                    model_name='expense',
+                    index=django.contrib.postgres.indexes.GinIndex(fields=['search_vector'], name='expenses_search_vector_gin'),
+                ),
+            ],
+            database_operations=[
+                migrations.RunPython(create_search_trigger, drop_search_trigger),
+            ],
+        ),
+    ]
@@ -0,0 +1,44 @@
+# Generated by Django 5.2.18 on 2026-10-18 11:07
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('expenses', '0005_expense_title_trigram'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ExpenseDeletion',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('expense_id', models.BigIntegerField(verbose_name='id del gasto')),
+                ('deleted_at', models.DateTimeField(default=django.utils.timezone.now, verbose_name='fecha de eliminación')),
+            ],
+            options={
+                'verbose_name': 'gasto eliminado',
+                'verbose_name_plural': 'gastos eliminados',
+                'db_table': 'expense_deletions',
+                'ordering': ['deleted_at', 'id'],
+            },
+        ),
+        migrations.AddIndex(
+            model_name='expense',
+            index=models.Index(fields=['user', 'updated_at', 'id'], name='expenses_user_id_86a1dd_idx'),
+        ),
+        migrations.AddField(
+            model_name='expensedeletion',
+            name='user',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='expense_deletions', to=settings.AUTH_USER_MODEL, verbose_name='usuario'),
+        ),
+        migrations.AddIndex(
+            model_name='expensedeletion',
+            index=models.Index(fields=['user', 'deleted_at', 'id'], name='expense_del_user_id_e5595d_idx'),
+        ),
+    ]
@@ -1,10 +1,25 @@
-from django.db import models
+from django.db import models, transaction
+from django.contrib.postgres.indexes import GinIndex
+from django.contrib.postgres.search import SearchVectorField
 from django.core.validators import MinValueValidator
+from django.utils import timezone
 from django.utils.translation import gettext_lazy as _
 from django.conf import settings
 from decimal import Decimal
 
 
+class ExpenseManager(models.Manager):
+    """
+    Manager por defecto de Expense.
+    
+    No carga search_vector: solo lo usa PostgreSQL para la búsqueda
+    full-text y no se expone en la API.
+    """
+    
+    def get_queryset(self):
+        return super().get_queryset().defer('search_vector')
+
+
 class Expense(models.Model):
     """
     Modelo para registrar gastos de usuarios.
@@ -77,6 +92,20 @@ class Expense(models.Model):
         auto_now=True      # Se actualiza en cada save()
     )
     
+    # Vector de búsqueda full-text (título con peso A, descripción con peso B).
+    # Lo mantiene un trigger de PostgreSQL en cada INSERT/UPDATE,
+    # incluyendo bulk_create y queryset.update().
+    search_vector = SearchVectorField(
+        _('vector de búsqueda'),
+        null=True,
+        editable=False
+    )
+    
+    objects = ExpenseManager()
+    
+    # Campos que determinan el resumen mensual (ExpenseRollup) del gasto
+    ROLLUP_FIELDS = ('user_id', 'category', 'date', 'amount')
+    
     class Meta:
         db_table = 'expenses'
         verbose_name = _('gasto')
@@ -89,6 +118,20 @@ class Expense(models.Model):
             models.Index(fields=['category']),          # Búsquedas por categoría
             models.Index(fields=['date']),              # Búsquedas por fecha
             models.Index(fields=['-date']),             # Ordenamiento descendente
+            
+            # Paginación keyset: (user, ordering..., id) para cada ordering
+            models.Index(fields=['user', '-date', '-created_at', '-id']),
+            models.Index(fields=['user', 'amount', 'id']),
+            models.Index(fields=['user', 'created_at', 'id']),
+            
+            # Sincronización incremental: cambios desde (updated_at, id)
+            models.Index(fields=['user', 'updated_at', 'id']),
+            
+            # Búsqueda full-text (?q=)
+            GinIndex(fields=['search_vector'], name='expenses_search_vector_gin'),
+            
+            # Búsqueda aproximada por título (?q=...&search_mode=fuzzy)
+            GinIndex(fields=['title'], opclasses=['gin_trgm_ops'], name='expenses_title_trgm_gin'),
         ]
     
     def __str__(self):
@@ -98,9 +141,184 @@ class Expense(models.Model):
         """
         return f"{self.title} - ${self.amount} ({self.date})"
     
+    def _get_rollup_values(self):
+        """
+        Retorna (user_id, category, date, amount) si están cargados.
+        
+        Returns:
+            tuple | None: None si alguno de los campos está diferido
+        """
+        try:
+            return tuple(self.__dict__[name] for name in self.ROLLUP_FIELDS)
+        except KeyError:
+            return None
+    
+    def _get_stored_rollup_values(self, lock=False):
+        """
+        Lee (user_id, category, date, amount) guardados en la BD.
+        
+        Args:
+            lock: Bloquear la fila (SELECT ... FOR UPDATE) hasta el fin de
+                la transacción, para que dos escrituras concurrentes no
+                descuenten el mismo valor anterior del resumen
+        
+        Returns:
+            tuple | None: None si la fila no existe
+        """
+        queryset = Expense.objects.filter(pk=self.pk).order_by()
+        if lock:
+            queryset = queryset.select_for_update()
+        rows = list(queryset.values_list(*self.ROLLUP_FIELDS))
+        return rows[0] if rows else None
+    
+    def save(self, *args, **kwargs):
+        """
+        Guarda el gasto, actualiza los resúmenes mensuales del usuario
+        e invalida sus respuestas cacheadas.
+        
+        Los valores anteriores se leen de la BD con la fila bloqueada. Si
+        la instancia tiene campos diferidos (.only()/.defer()) o se pasa
+        update_fields, los valores nuevos también se leen de la BD después
+        del UPDATE: lo que no se guardó no debe cambiar el resumen.
+        """
+        from . import rollups
+        from .cache import invalidate_user
+        
+        with transaction.atomic():
+            previous = None if self._state.adding else self._get_stored_rollup_values(lock=True)
+            super().save(*args, **kwargs)
+            
+            current = self._get_rollup_values()
+            if current is None or kwargs.get('update_fields') is not None:
+                current = self._get_stored_rollup_values()
+            
+            rollups.apply_change(previous, current)
+            # previous[:1] es el dueño anterior (si el gasto cambió de usuario)
+            invalidate_user(self.user_id, *(previous[:1] if previous else ()))
+    
+    def delete(self, *args, **kwargs):
+        """
+        Elimina el gasto, descuenta su monto de los resúmenes mensuales,
+        registra la eliminación para la sincronización e invalida las
+        respuestas cacheadas del usuario.
+        """
+        from . import rollups
+        from .cache import invalidate_user
+        
+        expense_id = self.pk
+        
+        with transaction.atomic():
+            previous = self._get_stored_rollup_values(lock=True)
+            result = super().delete(*args, **kwargs)
+            rollups.apply_change(previous, None)
+            ExpenseDeletion.objects.create(user_id=self.user_id, expense_id=expense_id)
+            invalidate_user(self.user_id)
+        
+        return result
+    
     def get_category_display_custom(self):
         """
         Método personalizado para mostrar la categoría.
         Django ya tiene get_category_display(), este es solo de ejemplo.
         """
-        return dict(self.CATEGORY_CHOICES).get(self.category, self.category)
\ No newline at end of file
+        return dict(self.CATEGORY_CHOICES).get(self.category, self.category)
+
+
+class ExpenseRollup(models.Model):
+    """
+    Resumen materializado de gastos por usuario, categoría y mes.
+    
+    Guarda el conteo y la suma de los gastos para que las estadísticas
+    se calculen sobre (categorías × meses) filas en lugar de todos los gastos.
+    Se mantiene al crear, actualizar o eliminar gastos y se puede
+    reconstruir con: python manage.py rebuild_expense_rollups
+    """
+    
+    user = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        related_name='expense_rollups',
+        verbose_name=_('usuario')
+    )
+    
+    category = models.CharField(
+        _('categoría'),
+        max_length=20,
+        choices=Expense.CATEGORY_CHOICES
+    )
+    
+    month = models.DateField(
+        _('mes'),
+        help_text=_('Primer día del mes del resumen')
+    )
+    
+    count = models.IntegerField(
+        _('cantidad de gastos'),
+        default=0
+    )
+    
+    total = models.DecimalField(
+        _('monto total'),
+        max_digits=14,           # Suma de muchos gastos de hasta 10 dígitos
+        decimal_places=2,
+        default=Decimal('0.00')
+    )
+    
+    class Meta:
+        db_table = 'expense_rollups'
+        verbose_name = _('resumen de gastos')
+        verbose_name_plural = _('resúmenes de gastos')
+        ordering = ['-month', 'category']
+        constraints = [
+            models.UniqueConstraint(
+                fields=['user', 'category', 'month'],
+                name='unique_expense_rollup'
+            ),
+        ]
+    
+    def __str__(self):
+        """
+        Ejemplo: "GROCERIES 2024-01 - 3 gastos ($50000.00)"
+        """
+        return f"{self.category} {self.month:%Y-%m} - {self.count} gastos (${self.total})"
+
+
+class ExpenseDeletion(models.Model):
+    """
+    Registro (tombstone) de un gasto eliminado.
+    
+    Permite que la sincronización incremental (/api/expenses/sync/)
+    informe a los clientes offline qué gastos deben borrar, aunque
+    la fila del gasto ya no exista.
+    """
+    
+    user = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        related_name='expense_deletions',
+        verbose_name=_('usuario')
+    )
+    
+    # Id del gasto eliminado (sin FK: la fila ya no existe)
+    expense_id = models.BigIntegerField(_('id del gasto'))
+    
+    deleted_at = models.DateTimeField(
+        _('fecha de eliminación'),
+        default=timezone.now
+    )
+    
+    class Meta:
+        db_table = 'expense_deletions'
+        verbose_name = _('gasto eliminado')
+        verbose_name_plural = _('gastos eliminados')
+        ordering = ['deleted_at', 'id']
+        indexes = [
+            # Sincronización: WHERE user = :user AND (deleted_at, id) > :cursor
+            models.Index(fields=['user', 'deleted_at', 'id']),
+        ]
+    
+    def __str__(self):
+        """
+        Ejemplo: "Gasto 42 eliminado (2024-01-15 10:30)"
+        """
+        return f"Gasto {self.expense_id} eliminado ({self.deleted_at:%Y-%m-%d %H:%M})"
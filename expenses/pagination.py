@@ -0,0 +1,401 @@
+import json
+from base64 import urlsafe_b64decode, urlsafe_b64encode
+from collections import namedtuple
+
+from django.conf import settings
+from django.core.paginator import EmptyPage, InvalidPage, Page, Paginator
+from django.db import connection
+from django.db.models import Q, Sum
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import CursorPagination, PageNumberPagination
+from rest_framework.response import Response
+from rest_framework.utils.urls import replace_query_param
+
+from .models import Expense, ExpenseRollup
+
+
+# Posición de un cursor: valores de las columnas de ordenamiento de la
+# fila límite y la dirección (reverse=True para la página anterior)
+KeysetCursor = namedtuple('KeysetCursor', ['position', 'reverse'])
+
+
+# Ordenamiento completo (único) para cada opción de ordering_fields.
+# Todas las columnas van en la misma dirección para que un índice
+# compuesto (user, col1, col2, id) sirva en ambos sentidos.
+KEYSET_ORDERINGS = {
+    '-date': ('-date', '-created_at', '-id'),
+    'date': ('date', 'created_at', 'id'),
+    '-amount': ('-amount', '-id'),
+    'amount': ('amount', 'id'),
+    '-created_at': ('-created_at', '-id'),
+    'created_at': ('created_at', 'id'),
+}
+
+
+class PageSizeMixin:
+    """
+    Permite elegir el tamaño de página con ?page_size=, con un máximo.
+
+    - ?page_size=50  -> 50 filas (hasta EXPENSES_MAX_PAGE_SIZE)
+    - ?page_size=max -> EXPENSES_MAX_PAGE_SIZE filas
+    - Valores mayores al máximo se recortan; valores inválidos usan PAGE_SIZE.
+    """
+
+    page_size_query_param = 'page_size'
+    max_page_size_keyword = 'max'
+    default_max_page_size = 500
+
+    @property
+    def max_page_size(self):
+        # Se lee en cada petición para respetar override_settings en tests
+        return getattr(settings, 'EXPENSES_MAX_PAGE_SIZE', self.default_max_page_size)
+
+    def get_page_size(self, request):
+        requested = request.query_params.get(self.page_size_query_param)
+        if requested == self.max_page_size_keyword:
+            return self.max_page_size
+        return super().get_page_size(request)
+
+
+class ExpenseCursorPagination(PageSizeMixin, CursorPagination):
+    """
+    Paginación por cursor (keyset) para el listado de gastos.
+
+    En lugar de OFFSET N + COUNT(*), cada página filtra por los valores
+    de la última fila vista:
+
+        WHERE date <= :date AND (date < :date
+              OR (date = :date AND created_at < :created_at)
+              OR (date = :date AND created_at = :created_at AND id < :id))
+        ORDER BY date DESC, created_at DESC, id DESC LIMIT page_size + 1
+
+    Así la página N cuesta lo mismo que la página 1. El cursor es opaco
+    para el cliente: solo debe seguir los links 'next' y 'previous'.
+
+    Uso: GET /api/expenses/?pagination=cursor&ordering=-amount
+    """
+
+    ordering_param = 'ordering'
+    default_ordering = '-date'
+    keyset_orderings = KEYSET_ORDERINGS
+    invalid_cursor_message = 'Cursor inválido.'
+
+    def paginate_queryset(self, queryset, request, view=None):
+        """
+        Retorna la página de resultados después (o antes) del cursor.
+        """
+        self.request = request
+        self.page_size = self.get_page_size(request)
+        if not self.page_size:
+            return None
+
+        self.base_url = request.build_absolute_uri()
+        self.ordering = self.get_ordering(request, queryset, view)
+        self.cursor = self.decode_cursor(request)
+
+        reverse = self.cursor is not None and self.cursor.reverse
+        if self.cursor is not None:
+            queryset = queryset.filter(
+                self.get_keyset_filter(self.cursor.position, reverse)
+            )
+
+        ordering = self.ordering
+        if reverse:
+            ordering = tuple(self._flip(field) for field in ordering)
+
+        # Pedir una fila extra para saber si hay más páginas
+        results = list(queryset.order_by(*ordering)[:self.page_size + 1])
+        has_more = len(results) > self.page_size
+        self.page = results[:self.page_size]
+
+        if reverse:
+            self.page.reverse()
+            self.has_next = True
+            self.has_previous = has_more
+        else:
+            self.has_next = has_more
+            self.has_previous = self.cursor is not None
+
+        return self.page
+
+    def get_ordering(self, request, queryset, view):
+        """
+        Retorna el ordenamiento completo según el parámetro ?ordering=.
+
+        Solo se usa el primer campo pedido; si no es válido se usa el
+        ordenamiento por defecto (-date, -created_at, -id).
+        """
+        requested = request.query_params.get(self.ordering_param, '')
+        first = requested.split(',')[0].strip()
+        return self.keyset_orderings.get(first, self.keyset_orderings[self.default_ordering])
+
+    def get_keyset_filter(self, position, reverse=False):
+        """
+        Construye el filtro para las filas posteriores a la posición.
+
+        Args:
+            position: Valores de las columnas de ordenamiento de la fila límite
+            reverse: True para obtener las filas anteriores
+
+        Returns:
+            Q: Comparación lexicográfica de (col1, col2, ..., id)
+        """
+        keyset = Q()
+        equal = {}
+
+        for field, value in zip(self.ordering, position):
+            name = field.lstrip('-')
+            descending = field.startswith('-') != reverse
+            keyset |= Q(**equal, **{f'{name}__{"lt" if descending else "gt"}': value})
+            equal[name] = value
+
+        # Cota sobre la primera columna para que el índice haga un range scan
+        first = self.ordering[0]
+        descending = first.startswith('-') != reverse
+        bound = Q(**{f'{first.lstrip("-")}__{"lte" if descending else "gte"}': position[0]})
+
+        return bound & keyset
+
+    def get_next_link(self):
+        if not self.has_next or not self.page:
+            return None
+        return self.encode_cursor(KeysetCursor(
+            position=self._get_position(self.page[-1]),
+            reverse=False,
+        ))
+
+    def get_previous_link(self):
+        if not self.has_previous or not self.page:
+            return None
+        return self.encode_cursor(KeysetCursor(
+            position=self._get_position(self.page[0]),
+            reverse=True,
+        ))
+
+    def decode_cursor(self, request):
+        """
+        Decodifica el cursor de la URL.
+
+        Raises:
+            NotFound: Si el cursor no es válido
+        """
+        encoded = request.query_params.get(self.cursor_query_param)
+        if encoded is None:
+            return None
+
+        try:
+            data = json.loads(urlsafe_b64decode(encoded.encode('ascii')))
+            raw_position = data['p']
+            if len(raw_position) != len(self.ordering):
+                raise ValueError('Cursor de otro ordenamiento')
+            position = [
+                Expense._meta.get_field(field.lstrip('-')).to_python(value)
+                for field, value in zip(self.ordering, raw_position)
+            ]
+            if any(value is None for value in position):
+                raise ValueError('Cursor incompleto')
+            return KeysetCursor(position=position, reverse=bool(data.get('r')))
+        except Exception:
+            raise NotFound(self.invalid_cursor_message)
+
+    def encode_cursor(self, cursor):
+        """
+        Codifica el cursor y lo agrega a la URL actual.
+        """
+        data = {'p': [self._to_json(value) for value in cursor.position]}
+        if cursor.reverse:
+            data['r'] = 1
+
+        encoded = urlsafe_b64encode(
+            json.dumps(data, separators=(',', ':')).encode('ascii')
+        ).decode('ascii')
+        return replace_query_param(self.base_url, self.cursor_query_param, encoded)
+
+    def _get_position(self, row):
+        """
+        Retorna los valores de las columnas de ordenamiento de una fila.
+        """
+        names = [field.lstrip('-') for field in self.ordering]
+        if isinstance(row, dict):
+            return [row[name] for name in names]
+        return [getattr(row, name) for name in names]
+
+    @staticmethod
+    def _to_json(value):
+        if isinstance(value, int):
+            return value
+        if hasattr(value, 'isoformat'):
+            return value.isoformat()
+        return str(value)
+
+    @staticmethod
+    def _flip(field):
+        return field[1:] if field.startswith('-') else f'-{field}'
+
+
+class LookaheadPage(Page):
+    """
+    Página que sabe si hay una siguiente sin depender del COUNT(*).
+    """
+
+    def __init__(self, object_list, number, paginator, has_more):
+        super().__init__(object_list, number, paginator)
+        self.has_more = has_more
+
+    def has_next(self):
+        return self.has_more
+
+
+class CountedPaginator(Paginator):
+    """
+    Paginador de Django que recibe el total ya calculado (exacto o estimado).
+
+    Cada página pide page_size + 1 filas para saber si existe una
+    siguiente, así un total estimado no recorta ni oculta resultados.
+    """
+
+    def __init__(self, object_list, per_page, count, **kwargs):
+        super().__init__(object_list, per_page, **kwargs)
+        # Reemplaza el cached_property que ejecutaría el COUNT(*)
+        self.__dict__['count'] = count
+
+    def validate_number(self, number):
+        """
+        Valida solo que la página sea >= 1: con un total estimado
+        puede haber datos más allá de num_pages.
+        """
+        try:
+            number = int(number)
+        except (TypeError, ValueError):
+            raise InvalidPage('El número de página no es un entero.')
+        if number < 1:
+            raise EmptyPage('El número de página es menor a 1.')
+        return number
+
+    def page(self, number):
+        number = self.validate_number(number)
+        bottom = (number - 1) * self.per_page
+        object_list = list(self.object_list[bottom:bottom + self.per_page + 1])
+
+        if not object_list and number > 1:
+            raise EmptyPage('Esa página no contiene resultados.')
+
+        return LookaheadPage(
+            object_list[:self.per_page],
+            number,
+            self,
+            has_more=len(object_list) > self.per_page,
+        )
+
+
+class ExpensePageNumberPagination(PageSizeMixin, PageNumberPagination):
+    """
+    Paginación por número de página sin COUNT(*) exacto en cada request.
+
+    El campo 'count' se obtiene de la forma más barata posible:
+    - Sin filtros: suma de los resúmenes mensuales del usuario
+      (ExpenseRollup), que se mantienen con cada escritura.
+    - Con filtros en PostgreSQL: estimación del planner (EXPLAIN). Si la
+      estimación es menor a exact_count_threshold se hace el COUNT exacto.
+    - ?count=exact fuerza el COUNT(*) exacto.
+
+    La respuesta incluye 'count_estimated' para indicar si el total es
+    aproximado. El tamaño de página se elige con ?page_size= (ver
+    PageSizeMixin).
+    """
+
+    count_query_param = 'count'
+    exact_count_threshold = 1000
+
+    # Parámetros que no filtran el queryset (no cambian el total)
+    unfiltered_params = {
+        'page',
+        'page_size',
+        'ordering',
+        'pagination',
+        'count',
+        'format',
+        'fields',
+        'omit',
+    }
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        page_size = self.get_page_size(request)
+        if not page_size:
+            return None
+
+        count, self.count_estimated = self.get_count(queryset, request)
+        paginator = CountedPaginator(queryset, page_size, count)
+        page_number = self.get_page_number(request, paginator)
+
+        try:
+            self.page = paginator.page(page_number)
+        except InvalidPage as exc:
+            msg = self.invalid_page_message.format(
+                page_number=page_number, message=str(exc)
+            )
+            raise NotFound(msg)
+
+        if paginator.num_pages > 1 and self.template is not None:
+            self.display_page_controls = True
+
+        return list(self.page)
+
+    def get_count(self, queryset, request):
+        """
+        Calcula el total de resultados.
+
+        Returns:
+            tuple: (total, es_estimado)
+        """
+        if request.query_params.get(self.count_query_param) == 'exact':
+            return queryset.count(), False
+
+        if self.is_unfiltered(request):
+            total = ExpenseRollup.objects.filter(user_id=request.user.id).aggregate(
+                total=Sum('count')
+            )['total']
+            return total or 0, False
+
+        estimate = self.estimate_count(queryset)
+        if estimate is None or estimate < self.exact_count_threshold:
+            return queryset.count(), False
+
+        return estimate, True
+
+    def is_unfiltered(self, request):
+        """
+        Indica si el request lista todos los gastos del usuario.
+        """
+        return set(request.query_params) <= self.unfiltered_params
+
+    def estimate_count(self, queryset):
+        """
+        Retorna la cantidad de filas estimada por el planner de PostgreSQL.
+
+        Returns:
+            int | None: None si la base de datos no es PostgreSQL
+        """
+        if connection.vendor != 'postgresql':
+            return None
+
+        plan = json.loads(queryset.order_by().explain(format='json'))
+        return int(plan[0]['Plan']['Plan Rows'])
+
+    def get_paginated_response(self, data):
+        return Response({
+            'count': self.page.paginator.count,
+            'count_estimated': self.count_estimated,
+            'next': self.get_next_link(),
+            'previous': self.get_previous_link(),
+            'results': data,
+        })
+
+    def get_paginated_response_schema(self, schema):
+        response_schema = super().get_paginated_response_schema(schema)
+        response_schema['properties']['count_estimated'] = {
+            'type': 'boolean',
+            'example': False,
+        }
+        return response_schema
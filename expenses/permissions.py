@@ -20,8 +20,9 @@ class IsOwner(permissions.BasePermission):
         Returns:
             bool: True si tiene permiso, False si no
         """
-        # Permitir cualquier método si el usuario es el dueño
-        return obj.user == request.user
+        # Permitir cualquier método si el usuario es el dueño.
+        # Se comparan ids para no cargar obj.user desde la BD.
+        return obj.user_id == request.user.id
 
 
 class IsOwnerOrReadOnly(permissions.BasePermission):
@@ -37,4 +38,4 @@ class IsOwnerOrReadOnly(permissions.BasePermission):
             return True
         
         # Métodos de escritura (POST, PUT, PATCH, DELETE) solo para el dueño
-        return obj.user == request.user
\ No newline at end of file
+        return obj.user_id == request.user.id
\ No newline at end of file
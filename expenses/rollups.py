@@ -0,0 +1,191 @@
+from collections import defaultdict
+from decimal import Decimal
+
+from django.db import IntegrityError, transaction
+from django.db.models import Count, F, Sum
+from django.db.models.functions import TruncMonth
+
+from .cache import invalidate_user
+from .models import Expense, ExpenseRollup
+
+
+def month_of(value):
+    """
+    Retorna el primer día del mes de una fecha.
+
+    Args:
+        value: date del gasto
+
+    Returns:
+        date: Fecha truncada al mes (ej: 2024-01-15 -> 2024-01-01)
+    """
+    return value.replace(day=1)
+
+
+def _add(deltas, values, sign):
+    """
+    Suma (o resta) un gasto a las diferencias acumuladas.
+
+    Args:
+        deltas: dict {(user_id, category, month): [count, amount]}
+        values: tupla (user_id, category, date, amount) o None
+        sign: 1 para sumar, -1 para restar
+    """
+    if values is None:
+        return
+
+    user_id, category, expense_date, amount = values
+    delta = deltas[(user_id, category, month_of(expense_date))]
+    delta[0] += sign
+    delta[1] += sign * Decimal(amount)
+
+
+def apply_deltas(deltas):
+    """
+    Aplica diferencias de conteo y monto a los resúmenes.
+
+    Cada diferencia se aplica con UPDATE ... SET count = count + N
+    para que escrituras concurrentes no se pisen. Si el resumen
+    todavía no existe se crea.
+
+    Args:
+        deltas: dict {(user_id, category, month): (count, amount)}
+    """
+    for (user_id, category, month), (count, amount) in deltas.items():
+        if not count and not amount:
+            continue
+
+        lookup = {'user_id': user_id, 'category': category, 'month': month}
+        changes = {'count': F('count') + count, 'total': F('total') + amount}
+
+        if ExpenseRollup.objects.filter(**lookup).update(**changes):
+            continue
+
+        if count < 0:
+            # Nada que descontar: el resumen ya no existe (ej: usuario eliminado)
+            continue
+
+        try:
+            with transaction.atomic():
+                ExpenseRollup.objects.create(count=count, total=amount, **lookup)
+        except IntegrityError:
+            # Otro proceso creó el resumen al mismo tiempo
+            ExpenseRollup.objects.filter(**lookup).update(**changes)
+
+
+def apply_change(previous, current):
+    """
+    Actualiza los resúmenes cuando un gasto cambia.
+
+    Args:
+        previous: (user_id, category, date, amount) antes del cambio, o None si es nuevo
+        current: (user_id, category, date, amount) después del cambio, o None si se eliminó
+    """
+    if previous == current:
+        return
+
+    deltas = defaultdict(lambda: [0, Decimal('0')])
+    _add(deltas, previous, -1)
+    _add(deltas, current, 1)
+    apply_deltas(deltas)
+
+
+def deltas_for(expenses, sign=1):
+    """
+    Calcula las diferencias de una lista de gastos en memoria.
+
+    Args:
+        expenses: Iterable de instancias de Expense
+        sign: 1 para sumar los gastos, -1 para restarlos
+
+    Returns:
+        dict: {(user_id, category, month): [count, amount]}
+    """
+    deltas = defaultdict(lambda: [0, Decimal('0')])
+    for expense in expenses:
+        _add(deltas, expense._get_rollup_values(), sign)
+    return deltas
+
+
+def merge_deltas(*all_deltas):
+    """
+    Combina varios diccionarios de diferencias en uno solo.
+
+    Returns:
+        dict: {(user_id, category, month): [count, amount]}
+    """
+    merged = defaultdict(lambda: [0, Decimal('0')])
+    for deltas in all_deltas:
+        for key, (count, amount) in deltas.items():
+            merged[key][0] += count
+            merged[key][1] += amount
+    return merged
+
+
+def grouped_deltas(queryset, sign=1):
+    """
+    Calcula las diferencias de un queryset de gastos con una consulta agrupada.
+
+    Se usa en operaciones masivas (bulk) que no pasan por Expense.save().
+
+    Args:
+        queryset: QuerySet de Expense
+        sign: 1 para sumar los gastos, -1 para restarlos
+
+    Returns:
+        dict: {(user_id, category, month): (count, amount)}
+    """
+    rows = (
+        queryset
+        .order_by()
+        .annotate(month=TruncMonth('date'))
+        .values('user_id', 'category', 'month')
+        .annotate(count=Count('id'), total=Sum('amount'))
+    )
+    return {
+        (row['user_id'], row['category'], row['month']): (sign * row['count'], sign * row['total'])
+        for row in rows
+    }
+
+
+def rebuild_rollups(user_ids=None):
+    """
+    Reconstruye los resúmenes desde la tabla de gastos.
+
+    Repara cualquier diferencia causada por escrituras que no pasaron
+    por Expense.save()/delete() (ej: queryset.update() desde el shell).
+
+    Args:
+        user_ids: Lista de ids de usuario a reconstruir (None = todos)
+
+    Returns:
+        int: Cantidad de resúmenes creados
+    """
+    expenses = Expense.objects.all()
+    rollups = ExpenseRollup.objects.all()
+
+    if user_ids is not None:
+        expenses = expenses.filter(user_id__in=user_ids)
+        rollups = rollups.filter(user_id__in=user_ids)
+
+    with transaction.atomic():
+        # Las estadísticas cacheadas salen de los resúmenes: invalidarlas
+        invalidate_user(*rollups.order_by().values_list('user_id', flat=True).distinct())
+        rollups.delete()
+        created = ExpenseRollup.objects.bulk_create(
+            [
+                ExpenseRollup(
+                    user_id=user_id,
+                    category=category,
+                    month=month,
+                    count=count,
+                    total=total,
+                )
+                for (user_id, category, month), (count, total)
+                in grouped_deltas(expenses).items()
+            ],
+            batch_size=1000,
+        )
+        invalidate_user(*{rollup.user_id for rollup in created})
+
+    return len(created)
@@ -0,0 +1,109 @@
+from functools import reduce
+from operator import or_
+
+from django.contrib.postgres.search import SearchQuery, SearchRank, TrigramWordSimilarity
+from django.db import connections
+from django.db.models import F, Q
+from rest_framework import serializers
+from rest_framework.filters import BaseFilterBackend
+
+
+class ExpenseFullTextSearchFilter(BaseFilterBackend):
+    """
+    Búsqueda de gastos con ?q= usando los índices GIN de PostgreSQL.
+
+    Modos (?search_mode=):
+    - fulltext (por defecto): search_vector @@ websearch_to_tsquery(q),
+      usa el índice GIN y ordena por relevancia (ts_rank).
+    - fuzzy: similitud por trigramas (pg_trgm) sobre el título, tolera
+      errores de tipeo ("farmcia" -> "Farmacia"). Usa el índice GIN
+      gin_trgm_ops y ordena por similitud.
+    - substring: ILIKE '%q%' sobre search_fields (igual que ?search=).
+
+    En bases de datos distintas a PostgreSQL siempre se usa substring.
+    Si se envía ?ordering= se respeta ese orden en lugar de la relevancia.
+    """
+
+    search_param = 'q'
+    mode_param = 'search_mode'
+    search_config = 'spanish'
+    default_mode = 'fulltext'
+
+    def get_modes(self):
+        """
+        Retorna los modos de búsqueda disponibles: {nombre: método}.
+        """
+        return {
+            'fulltext': self.fulltext_search,
+            'fuzzy': self.fuzzy_search,
+            'substring': self.substring_search,
+        }
+
+    def filter_queryset(self, request, queryset, view):
+        term = request.query_params.get(self.search_param, '').strip()
+        if not term:
+            return queryset
+
+        modes = self.get_modes()
+        mode = request.query_params.get(self.mode_param, self.default_mode)
+        if mode not in modes:
+            raise serializers.ValidationError({
+                self.mode_param: f'Modo no soportado. Opciones: {", ".join(modes)}.'
+            })
+
+        if connections[queryset.db].vendor != 'postgresql':
+            mode = 'substring'
+
+        queryset = modes[mode](queryset, term, view)
+
+        if mode != 'substring' and not request.query_params.get('ordering'):
+            queryset = queryset.order_by('-rank', '-date', '-created_at')
+
+        return queryset
+
+    def fulltext_search(self, queryset, term, view):
+        """
+        Filtra con el índice GIN de search_vector y anota la relevancia.
+        """
+        query = SearchQuery(term, config=self.search_config, search_type='websearch')
+        return queryset.filter(search_vector=query).annotate(
+            rank=SearchRank(F('search_vector'), query)
+        )
+
+    def fuzzy_search(self, queryset, term, view):
+        """
+        Filtra por similitud de palabras (title <% q) y anota la similitud.
+
+        Se usa word similarity para que el término coincida con una
+        palabra del título aunque el título tenga más palabras.
+        """
+        return queryset.filter(title__trigram_word_similar=term).annotate(
+            rank=TrigramWordSimilarity(term, 'title')
+        )
+
+    def substring_search(self, queryset, term, view):
+        """
+        Búsqueda por subcadena (ILIKE) en los search_fields de la vista.
+        """
+        fields = getattr(view, 'search_fields', None) or ['title']
+        return queryset.filter(
+            reduce(or_, (Q(**{f'{field}__icontains': term}) for field in fields))
+        )
+
+    def get_schema_operation_parameters(self, view):
+        return [
+            {
+                'name': self.search_param,
+                'required': False,
+                'in': 'query',
+                'description': 'Búsqueda full-text en título y descripción.',
+                'schema': {'type': 'string'},
+            },
+            {
+                'name': self.mode_param,
+                'required': False,
+                'in': 'query',
+                'description': 'Modo de búsqueda: ' + ', '.join(self.get_modes()) + '.',
+                'schema': {'type': 'string', 'enum': list(self.get_modes())},
+            },
+        ]
@@ -1,9 +1,53 @@
 from rest_framework import serializers
+from rest_framework.settings import api_settings
+from rest_framework import ISO_8601
+from django.conf import settings
 from django.utils import timezone
 from .models import Expense
+from .sync import decode_cursor, encode_cursor
 
 
-class ExpenseSerializer(serializers.ModelSerializer):
+# Máximo de gastos por petición en las operaciones masivas
+BULK_MAX_ITEMS = 500
+
+# Máximo de cambios por flujo en cada respuesta de sincronización
+SYNC_MAX_LIMIT = 1000
+
+
+class SparseFieldsMixin:
+    """
+    Limita los campos del serializer a context['fields'] (?fields= / ?omit=).
+    
+    Si context['fields'] es None se devuelven todos los campos.
+    """
+    
+    def get_fields(self):
+        fields = super().get_fields()
+        selected = self.context.get('fields')
+        if selected is not None:
+            for name in list(fields):
+                if name not in selected:
+                    fields.pop(name)
+        return fields
+
+
+class OwnerEmailField(serializers.EmailField):
+    """
+    Email del dueño del gasto (solo lectura).
+    
+    Si el dueño es el usuario autenticado se toma de request.user, que
+    ya está cargado, en lugar de consultar la tabla users por cada gasto.
+    """
+    
+    def get_attribute(self, instance):
+        request = self.context.get('request')
+        user = getattr(request, 'user', None)
+        if user is not None and user.is_authenticated and instance.user_id == user.id:
+            return user.email
+        return super().get_attribute(instance)
+
+
+class ExpenseSerializer(SparseFieldsMixin, serializers.ModelSerializer):
     """
     Serializer para el modelo Expense.
     
@@ -12,7 +56,7 @@ class ExpenseSerializer(serializers.ModelSerializer):
     """
     
     # Campos de solo lectura (calculados)
-    user_email = serializers.EmailField(source='user.email', read_only=True)
+    user_email = OwnerEmailField(source='user.email', read_only=True)
     category_display = serializers.CharField(source='get_category_display', read_only=True)
     
     class Meta:
@@ -100,7 +144,7 @@ class ExpenseSerializer(serializers.ModelSerializer):
     # ya maneja la asignación del usuario. Si se necesita, se puede agregar después.
 
 
-class ExpenseListSerializer(serializers.ModelSerializer):
+class ExpenseListSerializer(SparseFieldsMixin, serializers.ModelSerializer):
     """
     Serializer simplificado para listar gastos.
     
@@ -122,6 +166,99 @@ class ExpenseListSerializer(serializers.ModelSerializer):
         ]
 
 
+# Nombre legible de cada categoría, calculado una sola vez
+CATEGORY_LABELS = dict(Expense.CATEGORY_CHOICES)
+
+
+def _format_datetime(value):
+    """
+    Formatea un datetime igual que DateTimeField de DRF (ISO 8601).
+    """
+    if settings.USE_TZ:
+        # Zona horaria activa (igual que DateTimeField.enforce_timezone)
+        value = value.astimezone(timezone.get_current_timezone())
+    value = value.isoformat()
+    if value.endswith('+00:00'):
+        value = value[:-6] + 'Z'
+    return value
+
+
+class ExpenseListValuesSerializer(serializers.BaseSerializer):
+    """
+    Versión rápida de ExpenseListSerializer para el listado.
+    
+    Recibe filas de queryset.values(*VALUES_FIELDS) en lugar de instancias
+    y arma el mismo JSON sin la maquinaria de campos de DRF:
+    category_display sale de CATEGORY_LABELS y amount/date/created_at se
+    formatean igual que DecimalField, DateField y DateTimeField.
+    
+    Con context['fields'] (ver SparseFieldsMixin) solo se arman esos
+    campos, y las filas solo necesitan las columnas de values_fields_for().
+    
+    Solo es equivalente con el formato por defecto de DRF (decimales como
+    texto y fechas ISO 8601); ver is_compatible().
+    """
+    
+    # Columnas a pedir con .values() (category_display se calcula)
+    VALUES_FIELDS = ('id', 'title', 'amount', 'category', 'date', 'created_at')
+    
+    # Cómo se arma cada campo a partir de la fila
+    FORMATTERS = {
+        'id': lambda row: row['id'],
+        'title': lambda row: row['title'],
+        # La BD ya devuelve el Decimal con 2 decimales (DecimalField)
+        'amount': lambda row: f"{row['amount']:f}",
+        'category': lambda row: row['category'],
+        'category_display': lambda row: CATEGORY_LABELS.get(row['category'], row['category']),
+        'date': lambda row: row['date'].isoformat(),
+        'created_at': lambda row: _format_datetime(row['created_at']),
+    }
+    
+    @staticmethod
+    def is_compatible():
+        """
+        Indica si el formato rápido coincide con el de ExpenseListSerializer.
+        """
+        return (
+            api_settings.COERCE_DECIMAL_TO_STRING
+            and not settings.USE_THOUSAND_SEPARATOR
+            and api_settings.DATE_FORMAT.lower() == ISO_8601
+            and api_settings.DATETIME_FORMAT.lower() == ISO_8601
+        )
+    
+    @classmethod
+    def values_fields_for(cls, fields=None):
+        """
+        Retorna las columnas necesarias para armar los campos pedidos.
+        
+        Args:
+            fields: Nombres de los campos de salida (None = todos)
+        """
+        if fields is None:
+            return cls.VALUES_FIELDS
+        columns = {'category' if name == 'category_display' else name for name in fields}
+        return tuple(column for column in cls.VALUES_FIELDS if column in columns)
+    
+    def to_representation(self, row):
+        fields = self.context.get('fields')
+        if fields is not None:
+            return {
+                name: formatter(row)
+                for name, formatter in self.FORMATTERS.items()
+                if name in fields
+            }
+        
+        return {
+            'id': row['id'],
+            'title': row['title'],
+            'amount': f"{row['amount']:f}",
+            'category': row['category'],
+            'category_display': CATEGORY_LABELS.get(row['category'], row['category']),
+            'date': row['date'].isoformat(),
+            'created_at': _format_datetime(row['created_at']),
+        }
+
+
 class ExpenseStatsSerializer(serializers.Serializer):
     """
     Serializer para estadísticas de gastos.
@@ -132,4 +269,136 @@ class ExpenseStatsSerializer(serializers.Serializer):
     total_expenses = serializers.IntegerField()
     total_amount = serializers.DecimalField(max_digits=10, decimal_places=2)
     average_amount = serializers.DecimalField(max_digits=10, decimal_places=2)
-    by_category = serializers.DictField()
\ No newline at end of file
+    by_category = serializers.DictField()
+
+
+class ExpenseTimeseriesQuerySerializer(serializers.Serializer):
+    """
+    Valida los parámetros de la serie de tiempo de gastos.
+    
+    Los filtros de ExpenseFilter (category, min_amount, etc.) se aplican
+    aparte; start_date y end_date también definen el rango de la serie.
+    """
+    
+    granularity = serializers.ChoiceField(
+        choices=['day', 'week', 'month'],
+        default='month'
+    )
+    start_date = serializers.DateField(required=False)
+    end_date = serializers.DateField(required=False)
+    
+    def validate(self, attrs):
+        """Valida que el rango de fechas sea coherente."""
+        start_date = attrs.get('start_date')
+        end_date = attrs.get('end_date')
+        
+        if start_date and end_date and start_date > end_date:
+            raise serializers.ValidationError({
+                'end_date': 'La fecha de fin debe ser posterior a la de inicio.'
+            })
+        return attrs
+
+
+class ExpenseTimeseriesCategorySerializer(serializers.Serializer):
+    """
+    Totales de una categoría dentro de un período.
+    """
+    
+    total_expenses = serializers.IntegerField()
+    total_amount = serializers.DecimalField(max_digits=14, decimal_places=2)
+
+
+class ExpenseTimeseriesSerializer(serializers.Serializer):
+    """
+    Serializer para un período de la serie de tiempo de gastos.
+    """
+    
+    period = serializers.DateField()
+    total_expenses = serializers.IntegerField()
+    total_amount = serializers.DecimalField(max_digits=14, decimal_places=2)
+    by_category = serializers.DictField(child=ExpenseTimeseriesCategorySerializer())
+
+
+class ExpenseBulkDeleteSerializer(serializers.Serializer):
+    """
+    Valida la lista de ids para operaciones masivas.
+    """
+    
+    ids = serializers.ListField(
+        child=serializers.IntegerField(min_value=1),
+        allow_empty=False,
+        max_length=BULK_MAX_ITEMS
+    )
+
+
+class ExpenseBulkUpdateSerializer(ExpenseBulkDeleteSerializer):
+    """
+    Valida la actualización masiva: ids + cambios a aplicar.
+    
+    Los cambios se validan con ExpenseSerializer (parcial), así se
+    mantienen las mismas reglas que en PATCH /api/expenses/{id}/.
+    """
+    
+    changes = serializers.DictField()
+    
+    def validate_changes(self, value):
+        """
+        Valida los cambios con las reglas de ExpenseSerializer.
+        
+        Raises:
+            ValidationError: Si algún campo es inválido o no hay cambios
+        """
+        serializer = ExpenseSerializer(data=value, partial=True)
+        serializer.is_valid(raise_exception=True)
+        
+        if not serializer.validated_data:
+            raise serializers.ValidationError(
+                'Debe indicar al menos un campo a modificar.'
+            )
+        return serializer.validated_data
+
+
+class ExpenseSyncQuerySerializer(serializers.Serializer):
+    """
+    Valida los parámetros de la sincronización incremental.
+    
+    since acepta el cursor devuelto por la sincronización anterior o una
+    fecha ISO 8601. Sin since se sincronizan todos los gastos.
+    """
+    
+    since = serializers.CharField(required=False, allow_blank=True)
+    limit = serializers.IntegerField(min_value=1, max_value=SYNC_MAX_LIMIT, default=500)
+    
+    def validate_since(self, value):
+        """
+        Convierte el cursor o la fecha en un SyncCursor.
+        
+        Raises:
+            ValidationError: Si no es un cursor ni una fecha válida
+        """
+        try:
+            return decode_cursor(value)
+        except ValueError as e:
+            raise serializers.ValidationError(str(e))
+    
+    def to_internal_value(self, data):
+        attrs = super().to_internal_value(data)
+        attrs.setdefault('since', decode_cursor(None))
+        return attrs
+
+
+class ExpenseSyncSerializer(serializers.Serializer):
+    """
+    Respuesta de la sincronización incremental.
+    
+    El cliente aplica 'changed' (crear/actualizar) y 'deleted' (borrar),
+    guarda 'cursor' y repite mientras 'has_more' sea true.
+    """
+    
+    changed = ExpenseSerializer(many=True)
+    deleted = serializers.ListField(child=serializers.IntegerField())
+    cursor = serializers.SerializerMethodField()
+    has_more = serializers.BooleanField()
+    
+    def get_cursor(self, obj) -> str:
+        return encode_cursor(obj['cursor'])
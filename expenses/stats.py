@@ -0,0 +1,337 @@
+from datetime import timedelta
+from decimal import Decimal
+
+from django.db.models import Sum, Avg, Count, Q
+from django.db.models.functions import TruncDay, TruncWeek, TruncMonth
+
+from .models import Expense, ExpenseRollup
+
+
+# Estrategias disponibles para calcular estadísticas
+GROUP_BY = 'group_by'
+CONDITIONAL = 'conditional'
+
+
+def _empty_by_category():
+    """
+    Retorna el breakdown por categoría con todas las categorías en cero.
+
+    Returns:
+        dict: {nombre_categoria: 0}
+    """
+    return {name: 0 for code, name in Expense.CATEGORY_CHOICES}
+
+
+def _build_stats(total_expenses, total_amount, by_category, average_amount=None):
+    """
+    Arma el diccionario de estadísticas con el formato de la API.
+
+    Si no se recibe el promedio, se calcula a partir del total y el conteo.
+    """
+    if total_amount is None:
+        total_amount = 0
+
+    if average_amount is None:
+        average_amount = (
+            Decimal(total_amount) / total_expenses if total_expenses else 0
+        )
+
+    return {
+        'total_expenses': total_expenses,
+        'total_amount': total_amount,
+        'average_amount': average_amount,
+        'by_category': by_category,
+    }
+
+
+def _stats_from_rows(rows):
+    """
+    Arma las estadísticas a partir de filas agrupadas por categoría.
+
+    Args:
+        rows: Iterable de dicts con 'category', 'count' y 'total'
+
+    Returns:
+        dict: Estadísticas de gastos
+    """
+    labels = dict(Expense.CATEGORY_CHOICES)
+    by_category = _empty_by_category()
+    total_expenses = 0
+    total_amount = Decimal('0')
+
+    for row in rows:
+        if not row['count']:
+            continue
+        total_expenses += row['count']
+        total_amount += row['total']
+        name = labels.get(row['category'], row['category'])
+        by_category[name] = row['total']
+
+    return _build_stats(total_expenses, total_amount, by_category)
+
+
+def stats_group_by(queryset):
+    """
+    Calcula las estadísticas con una sola consulta agrupada por categoría.
+
+    SELECT category, COUNT(id), SUM(amount) ... GROUP BY category
+
+    Los totales generales se obtienen sumando las filas agrupadas
+    (como máximo una por categoría).
+
+    Args:
+        queryset: QuerySet de Expense (ya filtrado por usuario)
+
+    Returns:
+        dict: Estadísticas de gastos
+    """
+    rows = (
+        queryset
+        .order_by()  # Quitar el ordering del modelo para no romper el GROUP BY
+        .values('category')
+        .annotate(count=Count('id'), total=Sum('amount'))
+    )
+    return _stats_from_rows(rows)
+
+
+def stats_from_rollups(user):
+    """
+    Calcula las estadísticas desde los resúmenes mensuales (ExpenseRollup).
+
+    El costo depende de (categorías × meses) y no de la cantidad de gastos.
+
+    Args:
+        user: Usuario dueño de los gastos
+
+    Returns:
+        dict: Estadísticas de gastos
+    """
+    rows = (
+        ExpenseRollup.objects
+        .filter(user_id=user.pk)
+        .order_by()
+        .values('category')
+        .annotate(count=Sum('count'), total=Sum('total'))
+    )
+    return _stats_from_rows(rows)
+
+
+def stats_conditional(queryset):
+    """
+    Calcula las estadísticas con una sola consulta de agregación condicional.
+
+    SELECT COUNT(id), SUM(amount), AVG(amount),
+           SUM(amount) FILTER (WHERE category = ...), ...
+
+    Útil cuando se prefiere una única fila de resultado.
+
+    Args:
+        queryset: QuerySet de Expense (ya filtrado por usuario)
+
+    Returns:
+        dict: Estadísticas de gastos
+    """
+    per_category = {
+        f'category_{code}': Sum('amount', filter=Q(category=code))
+        for code, name in Expense.CATEGORY_CHOICES
+    }
+
+    result = queryset.order_by().aggregate(
+        total_expenses=Count('id'),
+        total_amount=Sum('amount'),
+        average_amount=Avg('amount'),
+        **per_category
+    )
+
+    by_category = {
+        name: result[f'category_{code}'] or 0
+        for code, name in Expense.CATEGORY_CHOICES
+    }
+
+    return _build_stats(
+        result['total_expenses'],
+        result['total_amount'],
+        by_category,
+        average_amount=result['average_amount'] or 0,
+    )
+
+
+# Granularidades disponibles para las series de tiempo
+TRUNC_FUNCTIONS = {
+    'day': TruncDay,
+    'week': TruncWeek,
+    'month': TruncMonth,
+}
+
+# Límite de períodos para no generar series gigantes con ceros
+MAX_TIMESERIES_BUCKETS = 1000
+
+
+def bucket_start(value, granularity):
+    """
+    Trunca una fecha al inicio de su período (igual que Trunc* en la BD).
+
+    Args:
+        value: date a truncar
+        granularity: 'day', 'week' (lunes) o 'month'
+
+    Returns:
+        date: Inicio del período
+    """
+    if granularity == 'week':
+        return value - timedelta(days=value.weekday())
+    if granularity == 'month':
+        return value.replace(day=1)
+    return value
+
+
+def next_bucket(value, granularity):
+    """
+    Retorna el inicio del período siguiente.
+    """
+    if granularity == 'week':
+        return value + timedelta(days=7)
+    if granularity == 'month':
+        return (value.replace(day=28) + timedelta(days=4)).replace(day=1)
+    return value + timedelta(days=1)
+
+
+def iter_buckets(start, end, granularity):
+    """
+    Genera los inicios de período entre start y end (inclusive).
+    """
+    current = bucket_start(start, granularity)
+    while current <= end:
+        yield current
+        current = next_bucket(current, granularity)
+
+
+def count_buckets(start, end, granularity):
+    """
+    Cuenta los períodos entre start y end sin generarlos.
+    """
+    start = bucket_start(start, granularity)
+    end = bucket_start(end, granularity)
+    if end < start:
+        return 0
+    if granularity == 'week':
+        return (end - start).days // 7 + 1
+    if granularity == 'month':
+        return (end.year - start.year) * 12 + end.month - start.month + 1
+    return (end - start).days + 1
+
+
+def _empty_bucket(period):
+    """
+    Retorna un período sin gastos (todas las categorías en cero).
+    """
+    return {
+        'period': period,
+        'total_expenses': 0,
+        'total_amount': Decimal('0'),
+        'by_category': {
+            name: {'total_expenses': 0, 'total_amount': Decimal('0')}
+            for code, name in Expense.CATEGORY_CHOICES
+        },
+    }
+
+
+def compute_timeseries(queryset, granularity, start=None, end=None):
+    """
+    Calcula sumas y conteos por período y categoría en una sola consulta.
+
+    SELECT DATE_TRUNC(granularity, date), category, COUNT(id), SUM(amount)
+    ... GROUP BY 1, 2
+
+    Los períodos sin gastos se completan con ceros. Si no se indican
+    start/end, la serie va desde el primer hasta el último período con datos.
+
+    Args:
+        queryset: QuerySet de Expense (ya filtrado)
+        granularity: 'day', 'week' o 'month'
+        start: Fecha inicial de la serie (opcional)
+        end: Fecha final de la serie (opcional)
+
+    Returns:
+        list: Períodos ordenados con totales y breakdown por categoría
+
+    Raises:
+        ValueError: Si la granularidad no existe o la serie es demasiado larga
+    """
+    try:
+        trunc = TRUNC_FUNCTIONS[granularity]
+    except KeyError:
+        raise ValueError(f'Granularidad desconocida: {granularity}')
+
+    if start and end and count_buckets(start, end, granularity) > MAX_TIMESERIES_BUCKETS:
+        raise ValueError(
+            f'La serie no puede tener más de {MAX_TIMESERIES_BUCKETS} períodos.'
+        )
+
+    rows = list(
+        queryset
+        .order_by()
+        .annotate(period=trunc('date'))
+        .values('period', 'category')
+        .annotate(count=Count('id'), total=Sum('amount'))
+        .order_by('period')
+    )
+
+    if not rows and not (start and end):
+        return []
+
+    start = start or rows[0]['period']
+    end = end or rows[-1]['period']
+
+    if count_buckets(start, end, granularity) > MAX_TIMESERIES_BUCKETS:
+        raise ValueError(
+            f'La serie no puede tener más de {MAX_TIMESERIES_BUCKETS} períodos.'
+        )
+
+    buckets = {
+        period: _empty_bucket(period)
+        for period in iter_buckets(start, end, granularity)
+    }
+    labels = dict(Expense.CATEGORY_CHOICES)
+
+    for row in rows:
+        bucket = buckets.get(row['period'])
+        if bucket is None:
+            continue
+        name = labels.get(row['category'], row['category'])
+        bucket['total_expenses'] += row['count']
+        bucket['total_amount'] += row['total']
+        bucket['by_category'][name] = {
+            'total_expenses': row['count'],
+            'total_amount': row['total'],
+        }
+
+    return list(buckets.values())
+
+
+STRATEGIES = {
+    GROUP_BY: stats_group_by,
+    CONDITIONAL: stats_conditional,
+}
+
+
+def compute_stats(queryset, strategy=GROUP_BY):
+    """
+    Calcula count, suma, promedio y breakdown por categoría en una consulta.
+
+    Args:
+        queryset: QuerySet de Expense
+        strategy: 'group_by' (por defecto) o 'conditional'
+
+    Returns:
+        dict: Estadísticas listas para ExpenseStatsSerializer
+
+    Raises:
+        ValueError: Si la estrategia no existe
+    """
+    try:
+        handler = STRATEGIES[strategy]
+    except KeyError:
+        raise ValueError(f'Estrategia de estadísticas desconocida: {strategy}')
+
+    return handler(queryset)
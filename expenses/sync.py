@@ -0,0 +1,148 @@
+import json
+from base64 import urlsafe_b64decode, urlsafe_b64encode
+from collections import namedtuple
+from datetime import datetime, timedelta, timezone as dt_timezone
+
+from django.conf import settings
+from django.db.models import Q
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+from .models import Expense, ExpenseDeletion
+
+
+# Posición de la sincronización en cada flujo: (fecha, id) del último
+# gasto modificado y de la última eliminación entregados al cliente
+SyncCursor = namedtuple('SyncCursor', ['changed', 'deleted'])
+
+# Cursor inicial: sincronización completa
+EPOCH = (datetime(1970, 1, 1, tzinfo=dt_timezone.utc), 0)
+
+
+def get_safety_margin():
+    """
+    Retorna el margen de EXPENSES_SYNC_SAFETY_MARGIN (segundos) como timedelta.
+    """
+    return timedelta(seconds=getattr(settings, 'EXPENSES_SYNC_SAFETY_MARGIN', 0))
+
+
+def encode_cursor(cursor):
+    """
+    Codifica el cursor como texto opaco para el cliente.
+    """
+    data = {
+        'c': [cursor.changed[0].isoformat(), cursor.changed[1]],
+        'd': [cursor.deleted[0].isoformat(), cursor.deleted[1]],
+    }
+    return urlsafe_b64encode(
+        json.dumps(data, separators=(',', ':')).encode('ascii')
+    ).decode('ascii')
+
+
+def decode_cursor(value):
+    """
+    Decodifica el parámetro ?since=.
+
+    Acepta el cursor devuelto por la sincronización anterior o una
+    fecha ISO 8601 (ej: 2024-01-15T10:30:00Z).
+
+    Args:
+        value: Texto del parámetro, o None para sincronizar todo
+
+    Returns:
+        SyncCursor: Posición desde donde continuar
+
+    Raises:
+        ValueError: Si el valor no es un cursor ni una fecha válida
+    """
+    if not value:
+        return SyncCursor(changed=EPOCH, deleted=EPOCH)
+
+    moment = parse_datetime(value)
+    if moment is not None:
+        if timezone.is_naive(moment):
+            moment = timezone.make_aware(moment)
+        return SyncCursor(changed=(moment, 0), deleted=(moment, 0))
+
+    try:
+        data = json.loads(urlsafe_b64decode(value.encode('ascii')))
+        return SyncCursor(
+            changed=_position(data['c']),
+            deleted=_position(data['d']),
+        )
+    except Exception:
+        raise ValueError('Cursor inválido.')
+
+
+def _position(raw):
+    moment = parse_datetime(raw[0])
+    if moment is None:
+        raise ValueError('Fecha inválida')
+    return moment, int(raw[1])
+
+
+def _after(field, position):
+    """
+    Filtro (field, id) > position, con cota sobre field para usar el índice.
+    """
+    moment, last_id = position
+    return Q(**{f'{field}__gte': moment}) & (
+        Q(**{f'{field}__gt': moment}) | Q(**{field: moment, 'id__gt': last_id})
+    )
+
+
+def changes_since(user, cursor, limit=500):
+    """
+    Retorna los gastos modificados y eliminados después del cursor.
+
+    Cada flujo se recorre por keyset sobre (updated_at, id) y
+    (deleted_at, id), así el costo depende de los cambios y no del
+    historial del usuario. Un gasto creado y luego eliminado entre dos
+    sincronizaciones solo aparece en 'deleted'.
+
+    updated_at y deleted_at se asignan al guardar, no al confirmar la
+    transacción: una escritura que confirma tarde puede quedar con una
+    fecha anterior a la última entregada. Por eso ambos flujos se cortan
+    en el horizonte (ahora menos EXPENSES_SYNC_SAFETY_MARGIN segundos):
+    ninguna página, tampoco las intermedias, deja el cursor en fechas
+    donde todavía puede confirmarse otra escritura. Los cambios más
+    recientes que el margen llegan en la siguiente sincronización.
+
+    Args:
+        user: Usuario dueño de los gastos
+        cursor: SyncCursor de la sincronización anterior
+        limit: Máximo de filas por flujo
+
+    Returns:
+        dict: {'changed': [Expense], 'deleted': [ids], 'cursor': SyncCursor,
+               'has_more': bool}
+    """
+    horizon = timezone.now() - get_safety_margin()
+
+    changed = list(
+        Expense.objects
+        .filter(_after('updated_at', cursor.changed), user_id=user.pk, updated_at__lte=horizon)
+        .order_by('updated_at', 'id')[:limit + 1]
+    )
+    deleted = list(
+        ExpenseDeletion.objects
+        .filter(_after('deleted_at', cursor.deleted), user_id=user.pk, deleted_at__lte=horizon)
+        .order_by('deleted_at', 'id')
+        .values_list('deleted_at', 'id', 'expense_id')[:limit + 1]
+    )
+
+    has_more = len(changed) > limit or len(deleted) > limit
+    changed = changed[:limit]
+    deleted = deleted[:limit]
+
+    next_cursor = SyncCursor(
+        changed=(changed[-1].updated_at, changed[-1].id) if changed else cursor.changed,
+        deleted=deleted[-1][:2] if deleted else cursor.deleted,
+    )
+
+    return {
+        'changed': changed,
+        'deleted': [expense_id for _, _, expense_id in deleted],
+        'cursor': next_cursor,
+        'has_more': has_more,
+    }
@@ -1,4 +1,4 @@
-from django.test import TestCase
+from django.test import TestCase, override_settings
 from django.contrib.auth import get_user_model
 from django.urls import reverse
 from django.utils import timezone
@@ -553,3 +553,2327 @@ class ExpenseSerializerTest(TestCase):
         self.assertFalse(serializer.is_valid())
         self.assertIn('description', serializer.errors)
 
+
+class ExpenseStatsEngineTest(TestCase):
+    """Tests para el cálculo de estadísticas en una sola consulta"""
+    
+    def setUp(self):
+        """Configuración inicial"""
+        self.user = User.objects.create_user(
+            email='engine@example.com',
+            password='Password123!',
+            first_name='Engine',
+            last_name='User'
+        )
+        
+        for amount, category in [
+            ('10000.00', 'GROCERIES'),
+            ('20000.00', 'GROCERIES'),
+            ('30000.00', 'LEISURE'),
+            ('5000.50', 'HEALTH'),
+        ]:
+            Expense.objects.create(
+                user=self.user,
+                title='Gasto',
+                amount=Decimal(amount),
+                category=category,
+                date=date.today()
+            )
+    
+    def test_group_by_single_query(self):
+        """Test: La estrategia GROUP BY usa una sola consulta"""
+        from .stats import compute_stats
+        
+        with self.assertNumQueries(1):
+            stats = compute_stats(Expense.objects.filter(user=self.user))
+        
+        self.assertEqual(stats['total_expenses'], 4)
+        self.assertEqual(stats['total_amount'], Decimal('65000.50'))
+        self.assertEqual(stats['average_amount'], Decimal('16250.125'))
+        self.assertEqual(stats['by_category']['Comestibles'], Decimal('30000.00'))
+        self.assertEqual(stats['by_category']['Salud'], Decimal('5000.50'))
+        self.assertEqual(stats['by_category']['Ropa'], 0)
+        self.assertEqual(len(stats['by_category']), len(Expense.CATEGORY_CHOICES))
+    
+    def test_conditional_single_query(self):
+        """Test: La agregación condicional usa una sola consulta y coincide"""
+        from .stats import compute_stats
+        
+        queryset = Expense.objects.filter(user=self.user)
+        expected = compute_stats(queryset)
+        
+        with self.assertNumQueries(1):
+            stats = compute_stats(queryset, strategy='conditional')
+        
+        self.assertEqual(stats['total_expenses'], expected['total_expenses'])
+        self.assertEqual(stats['total_amount'], expected['total_amount'])
+        self.assertEqual(stats['by_category'], expected['by_category'])
+    
+    def test_empty_queryset(self):
+        """Test: Estadísticas de un queryset vacío"""
+        from .stats import compute_stats
+        
+        for strategy in ('group_by', 'conditional'):
+            stats = compute_stats(Expense.objects.none(), strategy=strategy)
+            self.assertEqual(stats['total_expenses'], 0)
+            self.assertEqual(stats['total_amount'], 0)
+            self.assertEqual(stats['average_amount'], 0)
+    
+    def test_unknown_strategy(self):
+        """Test: Estrategia desconocida debe fallar"""
+        from .stats import compute_stats
+        
+        with self.assertRaises(ValueError):
+            compute_stats(Expense.objects.none(), strategy='loop')
+
+
+class ExpenseRollupTest(TestCase):
+    """Tests para los resúmenes mensuales de gastos"""
+    
+    def setUp(self):
+        """Configuración inicial"""
+        self.client = APIClient()
+        self.user = User.objects.create_user(
+            email='rollup@example.com',
+            password='Password123!',
+            first_name='Rollup',
+            last_name='User'
+        )
+        self.today = date.today()
+        self.last_month = self.today.replace(day=1) - timedelta(days=1)
+        
+        refresh = RefreshToken.for_user(self.user)
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {refresh.access_token}')
+    
+    def get_rollup(self, category, expense_date):
+        """Helper para obtener el resumen de una categoría y mes"""
+        from .models import ExpenseRollup
+        return ExpenseRollup.objects.get(
+            user=self.user,
+            category=category,
+            month=expense_date.replace(day=1)
+        )
+    
+    def test_create_through_viewset_updates_rollup(self):
+        """Test: Crear gastos desde la API actualiza el resumen"""
+        url = reverse('expenses:expense-list')
+        for amount in ('1000.00', '2500.50'):
+            response = self.client.post(url, {
+                'title': 'Mercado',
+                'amount': amount,
+                'category': 'GROCERIES',
+                'date': str(self.today)
+            }, format='json')
+            self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        
+        rollup = self.get_rollup('GROCERIES', self.today)
+        self.assertEqual(rollup.count, 2)
+        self.assertEqual(rollup.total, Decimal('3500.50'))
+    
+    def test_update_moves_amount_between_rollups(self):
+        """Test: Cambiar categoría y fecha mueve el gasto de resumen"""
+        expense = Expense.objects.create(
+            user=self.user,
+            title='Cine',
+            amount=Decimal('20000.00'),
+            category='LEISURE',
+            date=self.today
+        )
+        
+        url = reverse('expenses:expense-detail', kwargs={'pk': expense.id})
+        response = self.client.patch(url, {
+            'category': 'OTHERS',
+            'amount': '15000.00',
+            'date': str(self.last_month)
+        }, format='json')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        
+        old_rollup = self.get_rollup('LEISURE', self.today)
+        self.assertEqual(old_rollup.count, 0)
+        self.assertEqual(old_rollup.total, Decimal('0.00'))
+        
+        new_rollup = self.get_rollup('OTHERS', self.last_month)
+        self.assertEqual(new_rollup.count, 1)
+        self.assertEqual(new_rollup.total, Decimal('15000.00'))
+    
+    def test_save_with_deferred_fields_keeps_rollup(self):
+        """Test: Guardar una instancia cargada con .only() no descuenta el gasto"""
+        expense = Expense.objects.create(
+            user=self.user,
+            title='Taxi',
+            amount=Decimal('10.00'),
+            category='OTHERS',
+            date=self.today
+        )
+        
+        partial = Expense.objects.only('title').get(pk=expense.pk)
+        partial.title = 'Taxi aeropuerto'
+        partial.save()
+        
+        rollup = self.get_rollup('OTHERS', self.today)
+        self.assertEqual(rollup.count, 1)
+        self.assertEqual(rollup.total, Decimal('10.00'))
+    
+    def test_save_with_update_fields_uses_stored_values(self):
+        """Test: Con update_fields el resumen refleja solo lo que se guardó"""
+        expense = Expense.objects.create(
+            user=self.user,
+            title='Taxi',
+            amount=Decimal('10.00'),
+            category='OTHERS',
+            date=self.today
+        )
+        
+        expense.amount = Decimal('20.00')
+        expense.save(update_fields=['title'])
+        
+        rollup = self.get_rollup('OTHERS', self.today)
+        self.assertEqual(rollup.count, 1)
+        self.assertEqual(rollup.total, Decimal('10.00'))
+        
+        expense.save(update_fields=['amount'])
+        rollup.refresh_from_db()
+        self.assertEqual(rollup.total, Decimal('20.00'))
+    
+    def test_concurrent_updates_do_not_drift(self):
+        """Test: Dos instancias con el mismo valor anterior no descuentan dos veces"""
+        expense = Expense.objects.create(
+            user=self.user,
+            title='Mercado',
+            amount=Decimal('100.00'),
+            category='GROCERIES',
+            date=self.today
+        )
+        first = Expense.objects.get(pk=expense.pk)
+        second = Expense.objects.get(pk=expense.pk)
+        
+        first.amount = Decimal('150.00')
+        first.save()
+        second.amount = Decimal('120.00')
+        second.save()
+        
+        rollup = self.get_rollup('GROCERIES', self.today)
+        self.assertEqual(rollup.count, 1)
+        self.assertEqual(rollup.total, Decimal('120.00'))
+    
+    def test_previous_values_read_with_lock(self):
+        """Test: save() y delete() leen los valores anteriores con SELECT ... FOR UPDATE"""
+        from unittest import mock
+        from django.db.models import QuerySet
+        
+        expense = Expense.objects.create(
+            user=self.user,
+            title='Luz',
+            amount=Decimal('80.00'),
+            category='UTILITIES',
+            date=self.today
+        )
+        
+        with mock.patch.object(QuerySet, 'select_for_update', autospec=True,
+                               side_effect=lambda qs, *a, **kw: qs) as lock:
+            expense.amount = Decimal('90.00')
+            expense.save()
+            expense.delete()
+        
+        self.assertEqual(lock.call_count, 2)
+    
+    def test_delete_through_viewset_updates_rollup(self):
+        """Test: Eliminar un gasto descuenta su monto del resumen"""
+        expense = Expense.objects.create(
+            user=self.user,
+            title='Farmacia',
+            amount=Decimal('8000.00'),
+            category='HEALTH',
+            date=self.today
+        )
+        Expense.objects.create(
+            user=self.user,
+            title='Consulta',
+            amount=Decimal('50000.00'),
+            category='HEALTH',
+            date=self.today
+        )
+        
+        url = reverse('expenses:expense-detail', kwargs={'pk': expense.id})
+        response = self.client.delete(url)
+        self.assertEqual(response.status_code, status.HTTP_204_NO_CONTENT)
+        
+        rollup = self.get_rollup('HEALTH', self.today)
+        self.assertEqual(rollup.count, 1)
+        self.assertEqual(rollup.total, Decimal('50000.00'))
+    
+    def test_stats_reads_rollups(self):
+        """Test: Las estadísticas se calculan desde los resúmenes"""
+        from .stats import compute_stats, stats_from_rollups
+        
+        Expense.objects.create(
+            user=self.user, title='A', amount=Decimal('100.00'),
+            category='CLOTHING', date=self.today
+        )
+        Expense.objects.create(
+            user=self.user, title='B', amount=Decimal('300.00'),
+            category='CLOTHING', date=self.last_month
+        )
+        
+        with self.assertNumQueries(1):
+            stats = stats_from_rollups(self.user)
+        
+        expected = compute_stats(Expense.objects.filter(user=self.user))
+        self.assertEqual(stats['total_expenses'], expected['total_expenses'])
+        self.assertEqual(stats['total_amount'], expected['total_amount'])
+        self.assertEqual(stats['by_category'], expected['by_category'])
+    
+    def test_rebuild_command_repairs_rollups(self):
+        """Test: El comando reconstruye resúmenes desincronizados"""
+        from django.core.management import call_command
+        from io import StringIO
+        from .models import ExpenseRollup
+        
+        Expense.objects.create(
+            user=self.user, title='A', amount=Decimal('100.00'),
+            category='UTILITIES', date=self.today
+        )
+        # Escritura que no pasa por Expense.save()
+        Expense.objects.filter(user=self.user).update(amount=Decimal('700.00'))
+        ExpenseRollup.objects.create(
+            user=self.user, category='OTHERS', month=self.last_month.replace(day=1),
+            count=5, total=Decimal('1.00')
+        )
+        
+        call_command('rebuild_expense_rollups', email=[self.user.email], stdout=StringIO())
+        
+        rollup = self.get_rollup('UTILITIES', self.today)
+        self.assertEqual(rollup.count, 1)
+        self.assertEqual(rollup.total, Decimal('700.00'))
+        self.assertFalse(
+            ExpenseRollup.objects.filter(user=self.user, category='OTHERS').exists()
+        )
+
+
+class ExpenseTimeseriesTest(TestCase):
+    """Tests para la serie de tiempo de gastos"""
+    
+    def setUp(self):
+        """Configuración inicial"""
+        self.client = APIClient()
+        self.user = User.objects.create_user(
+            email='timeseries@example.com',
+            password='Password123!',
+            first_name='Time',
+            last_name='Series'
+        )
+        
+        for amount, category, expense_date in [
+            ('1000.00', 'GROCERIES', date(2024, 1, 3)),
+            ('2000.00', 'GROCERIES', date(2024, 1, 20)),
+            ('500.00', 'LEISURE', date(2024, 1, 20)),
+            ('700.00', 'HEALTH', date(2024, 3, 5)),
+        ]:
+            Expense.objects.create(
+                user=self.user,
+                title='Gasto',
+                amount=Decimal(amount),
+                category=category,
+                date=expense_date
+            )
+        
+        refresh = RefreshToken.for_user(self.user)
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {refresh.access_token}')
+        self.url = reverse('expenses:expense-stats-timeseries')
+    
+    def test_monthly_series_zero_filled(self):
+        """Test: Serie mensual con meses vacíos en cero"""
+        response = self.client.get(self.url, {'granularity': 'month'})
+        
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['granularity'], 'month')
+        
+        results = response.data['results']
+        self.assertEqual([r['period'] for r in results], ['2024-01-01', '2024-02-01', '2024-03-01'])
+        
+        january = results[0]
+        self.assertEqual(january['total_expenses'], 3)
+        self.assertEqual(january['total_amount'], '3500.00')
+        self.assertEqual(january['by_category']['Comestibles']['total_expenses'], 2)
+        self.assertEqual(january['by_category']['Comestibles']['total_amount'], '3000.00')
+        self.assertEqual(january['by_category']['Ropa']['total_amount'], '0.00')
+        
+        february = results[1]
+        self.assertEqual(february['total_expenses'], 0)
+        self.assertEqual(february['total_amount'], '0.00')
+    
+    def test_series_single_query(self):
+        """Test: La serie se calcula con una sola consulta"""
+        from .stats import compute_timeseries
+        
+        with self.assertNumQueries(1):
+            series = compute_timeseries(Expense.objects.filter(user=self.user), 'week')
+        
+        # Del lunes 2024-01-01 al lunes 2024-03-04
+        self.assertEqual(series[0]['period'], date(2024, 1, 1))
+        self.assertEqual(series[-1]['period'], date(2024, 3, 4))
+        self.assertEqual(len(series), 10)
+    
+    def test_series_honours_filters_and_range(self):
+        """Test: La serie respeta filtros y el rango de fechas"""
+        response = self.client.get(self.url, {
+            'granularity': 'day',
+            'category': 'GROCERIES',
+            'start_date': '2024-01-19',
+            'end_date': '2024-01-21',
+        })
+        
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        results = response.data['results']
+        self.assertEqual([r['period'] for r in results], ['2024-01-19', '2024-01-20', '2024-01-21'])
+        self.assertEqual(results[1]['total_amount'], '2000.00')
+        self.assertEqual(results[1]['by_category']['Entretenimiento']['total_expenses'], 0)
+    
+    def test_series_invalid_granularity(self):
+        """Test: Granularidad inválida debe fallar"""
+        response = self.client.get(self.url, {'granularity': 'year'})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+    
+    def test_series_too_many_buckets(self):
+        """Test: Rango demasiado largo debe fallar"""
+        response = self.client.get(self.url, {
+            'granularity': 'day',
+            'start_date': '2000-01-01',
+            'end_date': '2024-01-01',
+        })
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+
+class ExpenseCursorPaginationTest(TestCase):
+    """Tests para la paginación por cursor (keyset)"""
+    
+    def setUp(self):
+        """Configuración inicial"""
+        self.client = APIClient()
+        self.user = User.objects.create_user(
+            email='cursor@example.com',
+            password='Password123!',
+            first_name='Cursor',
+            last_name='User'
+        )
+        
+        # 25 gastos con fechas y montos repetidos para probar empates
+        for i in range(25):
+            Expense.objects.create(
+                user=self.user,
+                title=f'Gasto {i}',
+                amount=Decimal(1000 + (i % 4) * 500),
+                category='OTHERS',
+                date=date.today() - timedelta(days=i % 3)
+            )
+        
+        refresh = RefreshToken.for_user(self.user)
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {refresh.access_token}')
+        self.url = reverse('expenses:expense-list')
+    
+    def collect_pages(self, params):
+        """Helper para recorrer todas las páginas siguiendo 'next'"""
+        response = self.client.get(self.url, {'pagination': 'cursor', **params})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        pages = [response.data]
+        while response.data['next']:
+            response = self.client.get(response.data['next'])
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+            pages.append(response.data)
+        return pages
+    
+    def test_cursor_pages_match_full_ordering(self):
+        """Test: Recorrer con cursor da el mismo orden para cada ordering"""
+        from .pagination import KEYSET_ORDERINGS
+        
+        for ordering, keyset in KEYSET_ORDERINGS.items():
+            pages = self.collect_pages({'ordering': ordering})
+            ids = [row['id'] for page in pages for row in page['results']]
+            
+            expected = list(
+                Expense.objects.filter(user=self.user)
+                .order_by(*keyset)
+                .values_list('id', flat=True)
+            )
+            self.assertEqual(ids, expected, ordering)
+            self.assertEqual(len(pages), 3)
+            self.assertNotIn('count', pages[0])
+    
+    def test_previous_link(self):
+        """Test: El link 'previous' vuelve a la página anterior"""
+        first = self.client.get(self.url, {'pagination': 'cursor'})
+        self.assertIsNone(first.data['previous'])
+        
+        second = self.client.get(first.data['next'])
+        back = self.client.get(second.data['previous'])
+        
+        self.assertEqual(
+            [row['id'] for row in back.data['results']],
+            [row['id'] for row in first.data['results']]
+        )
+        self.assertIsNotNone(back.data['next'])
+    
+    def test_cursor_queries_have_no_offset_or_count(self):
+        """Test: Las páginas profundas no usan OFFSET ni COUNT(*)"""
+        from django.db import connection
+        from django.test.utils import CaptureQueriesContext
+        
+        first = self.client.get(self.url, {'pagination': 'cursor'})
+        second = self.client.get(first.data['next'])
+        
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(second.data['next'])
+        
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        # Se ignora el MAX(updated_at) usado para el ETag
+        expense_queries = [
+            q['sql'] for q in queries
+            if '"expenses"' in q['sql'] and 'MAX(' not in q['sql']
+        ]
+        self.assertEqual(len(expense_queries), 1)
+        self.assertNotIn('OFFSET', expense_queries[0].upper())
+        self.assertNotIn('COUNT(', expense_queries[0].upper())
+    
+    def test_invalid_cursor(self):
+        """Test: Un cursor inválido responde 404"""
+        response = self.client.get(self.url, {'cursor': 'no-es-un-cursor'})
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+    
+    def test_page_number_pagination_is_default(self):
+        """Test: Sin ?pagination=cursor se mantiene la paginación por página"""
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['count'], 25)
+
+
+class ExpenseCountPaginationTest(TestCase):
+    """Tests para el total estimado/cacheado del listado"""
+    
+    def setUp(self):
+        """Configuración inicial"""
+        self.client = APIClient()
+        self.user = User.objects.create_user(
+            email='count@example.com',
+            password='Password123!',
+            first_name='Count',
+            last_name='User'
+        )
+        
+        for i in range(12):
+            Expense.objects.create(
+                user=self.user,
+                title=f'Gasto {i}',
+                amount=Decimal('1000.00'),
+                category='GROCERIES' if i % 2 else 'LEISURE',
+                date=date.today()
+            )
+        
+        refresh = RefreshToken.for_user(self.user)
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {refresh.access_token}')
+        self.url = reverse('expenses:expense-list')
+    
+    def expense_count_queries(self, params):
+        """Helper que retorna la respuesta y los COUNT de la paginación sobre expenses"""
+        from django.db import connection
+        from django.test.utils import CaptureQueriesContext
+        
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(self.url, params)
+        
+        # Se excluye el ETag del listado (MAX(updated_at), COUNT(id))
+        counts = [
+            q['sql'] for q in queries
+            if 'COUNT(' in q['sql'].upper() and 'FROM "expenses"' in q['sql']
+            and 'MAX(' not in q['sql'].upper()
+        ]
+        return response, counts
+    
+    def test_unfiltered_count_uses_rollups(self):
+        """Test: Sin filtros el total sale de los resúmenes, sin COUNT(*)"""
+        response, counts = self.expense_count_queries({'page': 2})
+        
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['count'], 12)
+        self.assertFalse(response.data['count_estimated'])
+        self.assertEqual(len(response.data['results']), 2)
+        self.assertIsNone(response.data['next'])
+        self.assertEqual(counts, [])
+    
+    def test_exact_count_param(self):
+        """Test: ?count=exact fuerza el COUNT(*)"""
+        response, counts = self.expense_count_queries({'count': 'exact'})
+        
+        self.assertEqual(response.data['count'], 12)
+        self.assertEqual(len(counts), 1)
+    
+    def test_filtered_count(self):
+        """Test: Con filtros el total corresponde al queryset filtrado"""
+        response = self.client.get(self.url, {'category': 'GROCERIES'})
+        
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['count'], 6)
+        self.assertFalse(response.data['count_estimated'])
+    
+    def test_underestimated_count_keeps_next_pages(self):
+        """Test: Un total estimado menor al real no oculta páginas"""
+        from .pagination import CountedPaginator
+        
+        queryset = Expense.objects.filter(user=self.user).order_by('id')
+        paginator = CountedPaginator(queryset, 5, count=3)
+        
+        first = paginator.page(1)
+        self.assertEqual(len(first), 5)
+        self.assertTrue(first.has_next())
+        
+        last = paginator.page(3)
+        self.assertEqual(len(last), 2)
+        self.assertFalse(last.has_next())
+    
+    def test_page_out_of_range(self):
+        """Test: Una página sin resultados responde 404"""
+        response = self.client.get(self.url, {'page': 5})
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+
+class ExpenseBulkCreateTest(TestCase):
+    """Tests para la creación masiva de gastos"""
+    
+    def setUp(self):
+        """Configuración inicial"""
+        self.client = APIClient()
+        self.user = User.objects.create_user(
+            email='bulk@example.com',
+            password='Password123!',
+            first_name='Bulk',
+            last_name='User'
+        )
+        
+        refresh = RefreshToken.for_user(self.user)
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {refresh.access_token}')
+        self.url = reverse('expenses:expense-bulk-create')
+    
+    def build_items(self, count):
+        """Helper para construir gastos válidos"""
+        return [
+            {
+                'title': f'Gasto offline {i}',
+                'amount': '1500.00',
+                'category': 'GROCERIES',
+                'date': str(date.today())
+            }
+            for i in range(count)
+        ]
+    
+    def test_bulk_create_success(self):
+        """Test: Crear varios gastos en una petición"""
+        from django.db import connection
+        from django.test.utils import CaptureQueriesContext
+        from .models import ExpenseRollup
+        
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.post(self.url, self.build_items(20), format='json')
+        
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(response.data['created'], 20)
+        self.assertEqual(len(response.data['results']), 20)
+        self.assertEqual(response.data['results'][0]['user_email'], self.user.email)
+        self.assertEqual(Expense.objects.filter(user=self.user).count(), 20)
+        
+        # Un solo INSERT para los 20 gastos
+        inserts = [q for q in queries if q['sql'].startswith('INSERT INTO "expenses"')]
+        self.assertEqual(len(inserts), 1)
+        
+        rollup = ExpenseRollup.objects.get(user=self.user, category='GROCERIES')
+        self.assertEqual(rollup.count, 20)
+        self.assertEqual(rollup.total, Decimal('30000.00'))
+    
+    def test_bulk_create_reports_item_errors(self):
+        """Test: Un gasto inválido cancela todo y se reporta su posición"""
+        items = self.build_items(3)
+        items[1]['date'] = str(date.today() + timedelta(days=1))
+        items[2]['amount'] = '2000000.00'  # Sin descripción
+        
+        response = self.client.post(self.url, items, format='json')
+        
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual([item['index'] for item in response.data['items']], [1, 2])
+        self.assertIn('date', response.data['items'][0]['errors'])
+        self.assertIn('description', response.data['items'][1]['errors'])
+        self.assertFalse(Expense.objects.filter(user=self.user).exists())
+    
+    def test_bulk_create_limits(self):
+        """Test: La lista no puede estar vacía ni superar el máximo"""
+        from .views import ExpenseViewSet
+        
+        response = self.client.post(self.url, [], format='json')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        
+        items = self.build_items(ExpenseViewSet.bulk_max_items + 1)
+        response = self.client.post(self.url, items, format='json')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        
+        response = self.client.post(self.url, self.build_items(1)[0], format='json')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+
+class ExpenseBulkUpdateDeleteTest(TestCase):
+    """Tests para la actualización y eliminación masiva de gastos"""
+    
+    def setUp(self):
+        """Configuración inicial"""
+        self.client = APIClient()
+        self.user = User.objects.create_user(
+            email='bulkops@example.com',
+            password='Password123!',
+            first_name='Bulk',
+            last_name='Ops'
+        )
+        self.other = User.objects.create_user(
+            email='bulkother@example.com',
+            password='Password123!',
+            first_name='Bulk',
+            last_name='Other'
+        )
+        
+        self.expenses = [
+            Expense.objects.create(
+                user=self.user,
+                title=f'Gasto {i}',
+                amount=Decimal('1000.00'),
+                category='LEISURE',
+                date=date.today()
+            )
+            for i in range(5)
+        ]
+        self.other_expense = Expense.objects.create(
+            user=self.other,
+            title='Gasto ajeno',
+            amount=Decimal('1000.00'),
+            category='LEISURE',
+            date=date.today()
+        )
+        
+        refresh = RefreshToken.for_user(self.user)
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {refresh.access_token}')
+        self.url = reverse('expenses:expense-bulk-create')
+    
+    def test_bulk_update(self):
+        """Test: Recategorizar varios gastos con un solo UPDATE"""
+        from django.db import connection
+        from django.test.utils import CaptureQueriesContext
+        from .models import ExpenseRollup
+        
+        ids = [expense.id for expense in self.expenses[:3]] + [self.other_expense.id]
+        
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.patch(self.url, {
+                'ids': ids,
+                'changes': {'category': 'OTHERS'}
+            }, format='json')
+        
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['updated'], 3)
+        
+        updates = [q for q in queries if q['sql'].startswith('UPDATE "expenses"')]
+        self.assertEqual(len(updates), 1)
+        
+        self.assertEqual(
+            Expense.objects.filter(user=self.user, category='OTHERS').count(), 3
+        )
+        self.other_expense.refresh_from_db()
+        self.assertEqual(self.other_expense.category, 'LEISURE')
+        
+        leisure = ExpenseRollup.objects.get(user=self.user, category='LEISURE')
+        others = ExpenseRollup.objects.get(user=self.user, category='OTHERS')
+        self.assertEqual((leisure.count, leisure.total), (2, Decimal('2000.00')))
+        self.assertEqual((others.count, others.total), (3, Decimal('3000.00')))
+    
+    def test_bulk_update_validates_changes(self):
+        """Test: Los cambios se validan como en PATCH individual"""
+        ids = [expense.id for expense in self.expenses]
+        
+        response = self.client.patch(self.url, {
+            'ids': ids,
+            'changes': {'date': str(date.today() + timedelta(days=1))}
+        }, format='json')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn('changes', response.data)
+        
+        response = self.client.patch(self.url, {'ids': ids, 'changes': {}}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+    
+    def test_bulk_delete(self):
+        """Test: Eliminar varios gastos con un solo DELETE"""
+        from django.db import connection
+        from django.test.utils import CaptureQueriesContext
+        from .models import ExpenseRollup
+        
+        ids = [expense.id for expense in self.expenses[:4]] + [self.other_expense.id]
+        
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.delete(self.url, {'ids': ids}, format='json')
+        
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['deleted'], 4)
+        
+        deletes = [q for q in queries if q['sql'].startswith('DELETE FROM "expenses"')]
+        self.assertEqual(len(deletes), 1)
+        
+        self.assertEqual(Expense.objects.filter(user=self.user).count(), 1)
+        self.assertTrue(Expense.objects.filter(id=self.other_expense.id).exists())
+        
+        rollup = ExpenseRollup.objects.get(user=self.user, category='LEISURE')
+        self.assertEqual((rollup.count, rollup.total), (1, Decimal('1000.00')))
+    
+    def test_bulk_delete_requires_ids(self):
+        """Test: Eliminar sin ids debe fallar"""
+        response = self.client.delete(self.url, {'ids': []}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+
+class ExpenseExportTest(TestCase):
+    """Tests para la exportación de gastos"""
+    
+    def setUp(self):
+        """Configuración inicial"""
+        self.client = APIClient()
+        self.user = User.objects.create_user(
+            email='export@example.com',
+            password='Password123!',
+            first_name='Export',
+            last_name='User'
+        )
+        other = User.objects.create_user(
+            email='exportother@example.com',
+            password='Password123!',
+            first_name='Export',
+            last_name='Other'
+        )
+        
+        self.groceries = Expense.objects.create(
+            user=self.user,
+            title='Mercado, "semanal"',
+            amount=Decimal('45000.00'),
+            category='GROCERIES',
+            description='Frutas y verduras',
+            date=date.today()
+        )
+        self.netflix = Expense.objects.create(
+            user=self.user,
+            title='Netflix',
+            amount=Decimal('38900.00'),
+            category='LEISURE',
+            date=date.today() - timedelta(days=3)
+        )
+        Expense.objects.create(
+            user=other,
+            title='Gasto ajeno',
+            amount=Decimal('1000.00'),
+            category='OTHERS',
+            date=date.today()
+        )
+        
+        refresh = RefreshToken.for_user(self.user)
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {refresh.access_token}')
+        self.url = reverse('expenses:expense-export')
+    
+    def read_stream(self, response):
+        """Helper para leer el contenido de una respuesta streaming"""
+        return b''.join(response.streaming_content).decode('utf-8')
+    
+    def test_export_csv(self):
+        """Test: Exportar en CSV"""
+        import csv
+        import io
+        
+        response = self.client.get(self.url)
+        
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertTrue(response.streaming)
+        self.assertTrue(response['Content-Type'].startswith('text/csv'))
+        self.assertIn('gastos.csv', response['Content-Disposition'])
+        
+        rows = list(csv.DictReader(io.StringIO(self.read_stream(response))))
+        self.assertEqual(len(rows), 2)
+        self.assertEqual(rows[0]['title'], 'Mercado, "semanal"')
+        self.assertEqual(rows[0]['amount'], '45000.00')
+        self.assertEqual(rows[0]['category_display'], 'Comestibles')
+        self.assertEqual(rows[1]['description'], '')
+    
+    def test_export_ndjson_honours_filters(self):
+        """Test: Exportar en NDJSON respetando filtros y búsqueda"""
+        import json
+        
+        response = self.client.get(self.url, {
+            'export_format': 'ndjson',
+            'search': 'netflix',
+        })
+        
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        lines = self.read_stream(response).splitlines()
+        self.assertEqual(len(lines), 1)
+        
+        row = json.loads(lines[0])
+        self.assertEqual(row['id'], self.netflix.id)
+        self.assertEqual(row['amount'], '38900.00')
+        self.assertEqual(row['date'], str(self.netflix.date))
+    
+    def test_export_invalid_format(self):
+        """Test: Formato no soportado debe fallar"""
+        response = self.client.get(self.url, {'export_format': 'xlsx'})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+
+class ExpenseImportTest(TestCase):
+    """Tests para la importación de gastos desde CSV"""
+    
+    def setUp(self):
+        """Configuración inicial"""
+        self.client = APIClient()
+        self.user = User.objects.create_user(
+            email='import@example.com',
+            password='Password123!',
+            first_name='Import',
+            last_name='User'
+        )
+        
+        refresh = RefreshToken.for_user(self.user)
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {refresh.access_token}')
+        self.url = reverse('expenses:expense-import')
+        
+        today = date.today()
+        self.csv_content = (
+            '\ufefftitle,amount,category,description,date\n'
+            f'Mercado,45000.00,GROCERIES,,{today}\n'
+            f'Futuro,1000.00,GROCERIES,,{today + timedelta(days=1)}\n'
+            f'Cine,-5.00,LEISURE,,{today}\n'
+            f'Portátil,2500000.00,ELECTRONICS,Trabajo,{today}\n'
+            f'Televisor,3000000.00,ELECTRONICS,,{today}\n'
+        ).encode('utf-8')
+    
+    def test_import_endpoint_reports_row_errors(self):
+        """Test: Importar CSV crea las filas válidas y reporta las inválidas"""
+        from django.core.files.uploadedfile import SimpleUploadedFile
+        
+        upload = SimpleUploadedFile('gastos.csv', self.csv_content, content_type='text/csv')
+        response = self.client.post(self.url, {'file': upload}, format='multipart')
+        
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['created'], 2)
+        self.assertEqual(response.data['failed'], 3)
+        
+        errors = {error['row']: error['errors'] for error in response.data['errors']}
+        self.assertIn('date', errors[3])
+        self.assertIn('amount', errors[4])
+        self.assertIn('description', errors[6])
+        
+        titles = set(Expense.objects.filter(user=self.user).values_list('title', flat=True))
+        self.assertEqual(titles, {'Mercado', 'Portátil'})
+    
+    def test_import_inserts_in_batches(self):
+        """Test: Las filas válidas se insertan en lotes"""
+        import io
+        from django.db import connection
+        from django.test.utils import CaptureQueriesContext
+        from .imports import import_expenses_csv
+        from .models import ExpenseRollup
+        
+        lines = ['title,amount,category,date']
+        lines += [f'Gasto {i},100.00,OTHERS,{date.today()}' for i in range(25)]
+        content = io.BytesIO('\n'.join(lines).encode('utf-8'))
+        
+        with CaptureQueriesContext(connection) as queries:
+            report = import_expenses_csv(self.user, content, batch_size=10)
+        
+        self.assertEqual(report, {'created': 25, 'failed': 0, 'errors': []})
+        inserts = [q for q in queries if q['sql'].startswith('INSERT INTO "expenses"')]
+        self.assertEqual(len(inserts), 3)
+        
+        rollup = ExpenseRollup.objects.get(user=self.user, category='OTHERS')
+        self.assertEqual(rollup.count, 25)
+        self.assertFalse(content.closed)
+    
+    def test_import_missing_columns(self):
+        """Test: CSV sin columnas obligatorias debe fallar"""
+        from django.core.files.uploadedfile import SimpleUploadedFile
+        
+        upload = SimpleUploadedFile('gastos.csv', b'title,amount\nMercado,100\n')
+        response = self.client.post(self.url, {'file': upload}, format='multipart')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        
+        response = self.client.post(self.url, {}, format='multipart')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_import_unreadable_field_returns_400(self):
+        """Test: Un campo que el módulo csv no puede leer responde 400, no 500"""
+        import csv
+        from django.core.files.uploadedfile import SimpleUploadedFile
+
+        too_long = 'x' * (csv.field_size_limit() + 1)
+        content = f'title,amount,category,date\n{too_long},100.00,OTHERS,{date.today()}\n'
+        upload = SimpleUploadedFile('gastos.csv', content.encode('utf-8'))
+        response = self.client.post(self.url, {'file': upload}, format='multipart')
+
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(response.data['row'], 2)
+        self.assertEqual(response.data['created'], 0)
+        self.assertFalse(Expense.objects.filter(user=self.user).exists())
+
+    def test_import_stops_at_invalid_encoding(self):
+        """Test: Bytes inválidos a mitad del archivo informan la línea y lo ya creado"""
+        from django.core.files.uploadedfile import SimpleUploadedFile
+
+        lines = ['title,amount,category,date']
+        lines += [f'Gasto {i},100.00,OTHERS,{date.today()}' for i in range(500)]
+        content = '\n'.join(lines).encode('utf-8') + b'\nCaf\xe9,100.00,OTHERS,2024-01-01\n'
+        upload = SimpleUploadedFile('gastos.csv', content)
+        response = self.client.post(self.url, {'file': upload}, format='multipart')
+
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn('error', response.data)
+        self.assertGreater(response.data['created'], 0)
+        # Todas las filas anteriores a 'row' quedaron creadas y ninguna posterior
+        self.assertEqual(response.data['created'], response.data['row'] - 2)
+        self.assertEqual(
+            Expense.objects.filter(user=self.user).count(),
+            response.data['created'],
+        )
+
+    def test_import_command(self):
+        """Test: Comando de importación"""
+        import tempfile
+        from io import StringIO
+        from django.core.management import call_command
+        
+        with tempfile.NamedTemporaryFile(suffix='.csv') as csv_file:
+            csv_file.write(self.csv_content)
+            csv_file.flush()
+            
+            out, err = StringIO(), StringIO()
+            call_command('import_expenses', self.user.email, csv_file.name, stdout=out, stderr=err)
+        
+        self.assertIn('Gastos importados: 2', out.getvalue())
+        self.assertIn('Fila 3', err.getvalue())
+        self.assertEqual(Expense.objects.filter(user=self.user).count(), 2)
+
+
+class ExpenseFullTextSearchTest(TestCase):
+    """Tests para la búsqueda con ?q="""
+    
+    def setUp(self):
+        """Configuración inicial"""
+        self.client = APIClient()
+        self.user = User.objects.create_user(
+            email='search@example.com',
+            password='Password123!',
+            first_name='Search',
+            last_name='User'
+        )
+        
+        self.pharmacy = Expense.objects.create(
+            user=self.user,
+            title='Farmacia del barrio',
+            amount=Decimal('12000.00'),
+            category='HEALTH',
+            date=date.today()
+        )
+        self.market = Expense.objects.create(
+            user=self.user,
+            title='Mercado',
+            amount=Decimal('80000.00'),
+            category='GROCERIES',
+            description='Incluye algo de la farmacia',
+            date=date.today()
+        )
+        Expense.objects.create(
+            user=self.user,
+            title='Cine',
+            amount=Decimal('20000.00'),
+            category='LEISURE',
+            date=date.today()
+        )
+        
+        refresh = RefreshToken.for_user(self.user)
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {refresh.access_token}')
+        self.url = reverse('expenses:expense-list')
+    
+    def test_q_matches_title_and_description(self):
+        """Test: ?q= busca en título y descripción"""
+        response = self.client.get(self.url, {'q': 'farmacia'})
+        
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        ids = {row['id'] for row in response.data['results']}
+        self.assertEqual(ids, {self.pharmacy.id, self.market.id})
+    
+    def test_substring_mode(self):
+        """Test: ?search_mode=substring usa búsqueda por subcadena"""
+        response = self.client.get(self.url, {'q': 'armac', 'search_mode': 'substring'})
+        
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(response.data['results']), 2)
+    
+    def test_invalid_search_mode(self):
+        """Test: Modo de búsqueda desconocido debe fallar"""
+        response = self.client.get(self.url, {'q': 'cine', 'search_mode': 'regex'})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+    
+    def test_search_vector_not_loaded(self):
+        """Test: search_vector no se carga en las consultas de gastos"""
+        expense = Expense.objects.get(id=self.pharmacy.id)
+        self.assertIn('search_vector', expense.get_deferred_fields())
+    
+    def test_benchmark_command(self):
+        """Test: El comando de benchmark se ejecuta y limpia sus datos"""
+        from io import StringIO
+        from django.core.management import call_command
+        
+        out = StringIO()
+        call_command('benchmark_expenses', 'search', rows=30, repeat=1, stdout=out)
+        
+        self.assertIn('substring', out.getvalue())
+        self.assertFalse(User.objects.filter(email__startswith='benchmark-').exists())
+
+
+class ExpenseFuzzySearchTest(TestCase):
+    """Tests para la búsqueda aproximada por trigramas"""
+    
+    def setUp(self):
+        """Configuración inicial"""
+        self.client = APIClient()
+        self.user = User.objects.create_user(
+            email='fuzzy@example.com',
+            password='Password123!',
+            first_name='Fuzzy',
+            last_name='User'
+        )
+        self.pharmacy = Expense.objects.create(
+            user=self.user,
+            title='Farmacia Pasteur',
+            amount=Decimal('12000.00'),
+            category='HEALTH',
+            date=date.today()
+        )
+        Expense.objects.create(
+            user=self.user,
+            title='Panadería',
+            amount=Decimal('5000.00'),
+            category='GROCERIES',
+            date=date.today()
+        )
+        
+        refresh = RefreshToken.for_user(self.user)
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {refresh.access_token}')
+        self.url = reverse('expenses:expense-list')
+    
+    def test_fuzzy_mode(self):
+        """Test: ?search_mode=fuzzy encuentra el título (con typo en PostgreSQL)"""
+        from django.db import connection
+        
+        term = 'Farmcia' if connection.vendor == 'postgresql' else 'Farmacia'
+        response = self.client.get(self.url, {'q': term, 'search_mode': 'fuzzy'})
+        
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            [row['id'] for row in response.data['results']],
+            [self.pharmacy.id]
+        )
+    
+    def test_fuzzy_query_uses_trigram_operator(self):
+        """Test: El modo fuzzy filtra con el operador de trigramas"""
+        from .search import ExpenseFullTextSearchFilter
+        
+        queryset = ExpenseFullTextSearchFilter().fuzzy_search(
+            Expense.objects.filter(user=self.user), 'farmcia', None
+        )
+        lookup = queryset.query.where.children[-1]
+        self.assertEqual(lookup.lookup_name, 'trigram_word_similar')
+        self.assertIn('rank', queryset.query.annotations)
+
+
+@override_settings(EXPENSES_CACHE_TIMEOUT=60)
+class ExpenseResponseCacheTest(TestCase):
+    """Tests para el cache de respuestas GET por usuario"""
+    
+    def setUp(self):
+        """Configuración inicial"""
+        from django.core.cache import cache
+        from config import metrics
+        
+        cache.clear()
+        metrics.reset()
+        
+        self.client = APIClient()
+        self.user = User.objects.create_user(
+            email='cache@example.com',
+            password='Password123!',
+            first_name='Cache',
+            last_name='User'
+        )
+        self.expense = Expense.objects.create(
+            user=self.user,
+            title='Mercado',
+            amount=Decimal('50000.00'),
+            category='GROCERIES',
+            date=date.today()
+        )
+        
+        refresh = RefreshToken.for_user(self.user)
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {refresh.access_token}')
+        self.list_url = reverse('expenses:expense-list')
+        self.stats_url = reverse('expenses:expense-stats')
+    
+    def counters(self):
+        """Helper para leer los contadores de hits y misses"""
+        from config import metrics
+        
+        return metrics.get('expenses.cache.hit'), metrics.get('expenses.cache.miss')
+    
+    def test_second_request_is_served_from_cache(self):
+        """Test: La segunda petición igual es un hit y devuelve lo mismo"""
+        first = self.client.get(self.list_url, {'category': 'GROCERIES', 'ordering': '-amount'})
+        second = self.client.get(self.list_url, {'ordering': '-amount', 'category': 'GROCERIES'})
+        
+        self.assertEqual(first.status_code, status.HTTP_200_OK)
+        self.assertEqual(second.status_code, status.HTTP_200_OK)
+        self.assertEqual(first.content, second.content)
+        self.assertEqual(self.counters(), (1, 1))
+    
+    def test_write_invalidates_list_and_stats(self):
+        """Test: Crear un gasto invalida el listado y las estadísticas"""
+        self.client.get(self.list_url)
+        self.client.get(self.stats_url)
+        
+        self.client.post(self.list_url, {
+            'title': 'Cine',
+            'amount': '20000.00',
+            'category': 'LEISURE',
+            'date': str(date.today())
+        }, format='json')
+        
+        response = self.client.get(self.list_url)
+        self.assertEqual(response.data['count'], 2)
+        
+        response = self.client.get(self.stats_url)
+        self.assertEqual(response.data['total_expenses'], 2)
+        self.assertEqual(self.counters(), (0, 4))
+    
+    def test_update_invalidates_detail(self):
+        """Test: Actualizar un gasto invalida su detalle cacheado"""
+        url = reverse('expenses:expense-detail', kwargs={'pk': self.expense.pk})
+        self.client.get(url)
+        
+        self.client.patch(url, {'title': 'Supermercado'}, format='json')
+        response = self.client.get(url)
+        
+        self.assertEqual(response.data['title'], 'Supermercado')
+    
+    def test_bulk_delete_invalidates_cache(self):
+        """Test: La eliminación masiva invalida el listado"""
+        self.client.get(self.list_url)
+        
+        self.client.delete(
+            reverse('expenses:expense-bulk-create'),
+            {'ids': [self.expense.id]},
+            format='json'
+        )
+        response = self.client.get(self.list_url)
+        
+        self.assertEqual(response.data['count'], 0)
+    
+    def test_cache_is_per_user(self):
+        """Test: Otro usuario con la misma URL no recibe la respuesta cacheada"""
+        self.client.get(self.list_url)
+        
+        other = User.objects.create_user(
+            email='cache2@example.com',
+            password='Password123!',
+            first_name='Other',
+            last_name='User'
+        )
+        refresh = RefreshToken.for_user(other)
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {refresh.access_token}')
+        response = self.client.get(self.list_url)
+        
+        self.assertEqual(response.data['count'], 0)
+        self.assertEqual(self.counters(), (0, 2))
+
+    def test_user_signals_reset_generation(self):
+        """Test: Eliminar un usuario descarta su generación; actualizarlo no"""
+        from .cache import get_cache, generation_key
+
+        self.client.get(self.list_url)
+        key = generation_key(self.user.pk)
+        self.assertIsNotNone(get_cache().get(key))
+
+        self.user.first_name = 'Renombrado'
+        self.user.save()
+        self.assertIsNotNone(get_cache().get(key))
+
+        user_id = self.user.pk
+        self.user.delete()
+        self.assertIsNone(get_cache().get(generation_key(user_id)))
+
+    def test_cache_can_be_disabled(self):
+        """Test: EXPENSES_CACHE_TIMEOUT=0 desactiva el cache"""
+        from django.test import override_settings
+        
+        with override_settings(EXPENSES_CACHE_TIMEOUT=0):
+            self.client.get(self.list_url)
+            self.client.get(self.list_url)
+        
+        self.assertEqual(self.counters(), (0, 0))
+    
+    def test_metrics_endpoint_admin_only(self):
+        """Test: /api/metrics/ solo está disponible para administradores"""
+        self.client.get(self.list_url)
+        url = reverse('metrics')
+        
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+        
+        self.user.is_staff = True
+        self.user.save()
+        response = self.client.get(url)
+        
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['expenses.cache.miss'], 1)
+
+
+class ExpenseConditionalRequestTest(TestCase):
+    """Tests para ETag / Last-Modified y peticiones condicionales"""
+    
+    def setUp(self):
+        """Configuración inicial"""
+        self.client = APIClient()
+        self.user = User.objects.create_user(
+            email='etag@example.com',
+            password='Password123!',
+            first_name='Etag',
+            last_name='User'
+        )
+        self.expense = Expense.objects.create(
+            user=self.user,
+            title='Internet',
+            amount=Decimal('90000.00'),
+            category='UTILITIES',
+            date=date.today()
+        )
+        
+        refresh = RefreshToken.for_user(self.user)
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {refresh.access_token}')
+        self.list_url = reverse('expenses:expense-list')
+        self.detail_url = reverse('expenses:expense-detail', kwargs={'pk': self.expense.pk})
+    
+    def test_list_not_modified(self):
+        """Test: El listado responde 304 con un ETag vigente"""
+        response = self.client.get(self.list_url)
+        etag = response['ETag']
+        
+        response = self.client.get(self.list_url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+        self.assertEqual(response['ETag'], etag)
+        self.assertEqual(response.content, b'')
+    
+    def test_list_etag_from_database(self):
+        """Test: El ETag del listado cambia aunque la generación del cache no cambie"""
+        from unittest import mock
+        
+        response = self.client.get(self.list_url)
+        etag = response['ETag']
+        self.assertIn('Last-Modified', response)
+        
+        # Escritura hecha por otro worker: no invalida el cache de este proceso
+        with mock.patch('expenses.cache.invalidate_user'):
+            self.expense.title = 'Internet fibra'
+            self.expense.save()
+        
+        response = self.client.get(self.list_url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertNotEqual(response['ETag'], etag)
+    
+    def test_list_etag_depends_on_filters(self):
+        """Test: Cada combinación de filtros tiene su propio ETag"""
+        etag = self.client.get(self.list_url)['ETag']
+        
+        response = self.client.get(self.list_url, {'category': 'UTILITIES'}, HTTP_IF_NONE_MATCH=etag)
+        
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+    
+    def test_list_etag_changes_after_delete(self):
+        """Test: Eliminar un gasto cambia el ETag del listado"""
+        other = Expense.objects.create(
+            user=self.user,
+            title='Gas',
+            amount=Decimal('30000.00'),
+            category='UTILITIES',
+            date=date.today() - timedelta(days=1)
+        )
+        etag = self.client.get(self.list_url)['ETag']
+        
+        self.client.delete(reverse('expenses:expense-detail', kwargs={'pk': other.pk}))
+        response = self.client.get(self.list_url, HTTP_IF_NONE_MATCH=etag)
+        
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['count'], 1)
+    
+    def test_detail_not_modified_without_serializing(self):
+        """Test: El detalle responde 304 con If-None-Match sin serializar"""
+        from unittest import mock
+        
+        etag = self.client.get(self.detail_url)['ETag']
+        
+        with mock.patch('expenses.views.ExpenseSerializer.to_representation') as to_representation:
+            response = self.client.get(self.detail_url, HTTP_IF_NONE_MATCH=etag)
+        
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+        to_representation.assert_not_called()
+    
+    def test_detail_if_modified_since(self):
+        """Test: El detalle responde 304 con If-Modified-Since vigente"""
+        last_modified = self.client.get(self.detail_url)['Last-Modified']
+        
+        response = self.client.get(self.detail_url, HTTP_IF_MODIFIED_SINCE=last_modified)
+        
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+    
+    def test_detail_etag_changes_after_update(self):
+        """Test: Actualizar el gasto cambia su ETag"""
+        etag = self.client.get(self.detail_url)['ETag']
+        
+        response = self.client.patch(self.detail_url, {'title': 'Fibra óptica'}, format='json')
+        self.assertNotEqual(response['ETag'], etag)
+        
+        response = self.client.get(self.detail_url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+    
+    def test_if_match_current_etag(self):
+        """Test: PATCH con If-Match vigente se aplica y devuelve el nuevo ETag"""
+        etag = self.client.get(self.detail_url)['ETag']
+        
+        response = self.client.patch(
+            self.detail_url, {'amount': '95000.00'}, format='json', HTTP_IF_MATCH=etag
+        )
+        
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        new_etag = response['ETag']
+        response = self.client.get(self.detail_url, HTTP_IF_NONE_MATCH=new_etag)
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+    
+    def test_if_match_stale_etag(self):
+        """Test: PUT con If-Match desactualizado responde 412 sin modificar"""
+        etag = self.client.get(self.detail_url)['ETag']
+        self.client.patch(self.detail_url, {'title': 'Cambio concurrente'}, format='json')
+        
+        response = self.client.put(self.detail_url, {
+            'title': 'Internet hogar',
+            'amount': '90000.00',
+            'category': 'UTILITIES',
+            'date': str(date.today())
+        }, format='json', HTTP_IF_MATCH=etag)
+        
+        self.assertEqual(response.status_code, status.HTTP_412_PRECONDITION_FAILED)
+        self.assertIn('error', response.data)
+        self.expense.refresh_from_db()
+        self.assertEqual(self.expense.title, 'Cambio concurrente')
+
+
+@override_settings(EXPENSES_SYNC_SAFETY_MARGIN=0)
+class ExpenseSyncTest(TestCase):
+    """Tests para la sincronización incremental (cambios y eliminaciones)"""
+    
+    def setUp(self):
+        """Configuración inicial"""
+        self.client = APIClient()
+        self.user = User.objects.create_user(
+            email='sync@example.com',
+            password='Password123!',
+            first_name='Sync',
+            last_name='User'
+        )
+        self.expenses = [
+            Expense.objects.create(
+                user=self.user,
+                title=f'Gasto {i}',
+                amount=Decimal('1000.00'),
+                category='OTHERS',
+                date=date.today()
+            )
+            for i in range(3)
+        ]
+        
+        refresh = RefreshToken.for_user(self.user)
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {refresh.access_token}')
+        self.url = reverse('expenses:expense-sync')
+    
+    def test_initial_sync_returns_everything(self):
+        """Test: Sin since se devuelven todos los gastos"""
+        response = self.client.get(self.url)
+        
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            [row['id'] for row in response.data['changed']],
+            [expense.id for expense in self.expenses]
+        )
+        self.assertEqual(response.data['deleted'], [])
+        self.assertFalse(response.data['has_more'])
+        self.assertIn('description', response.data['changed'][0])
+    
+    def test_sync_returns_only_changes(self):
+        """Test: Con el cursor anterior solo llegan cambios y eliminaciones nuevas"""
+        cursor = self.client.get(self.url).data['cursor']
+        
+        updated = self.expenses[0]
+        self.client.patch(
+            reverse('expenses:expense-detail', kwargs={'pk': updated.pk}),
+            {'title': 'Gasto editado'},
+            format='json'
+        )
+        deleted = self.expenses[1]
+        self.client.delete(reverse('expenses:expense-detail', kwargs={'pk': deleted.pk}))
+        
+        response = self.client.get(self.url, {'since': cursor})
+        
+        self.assertEqual([row['id'] for row in response.data['changed']], [updated.id])
+        self.assertEqual(response.data['changed'][0]['title'], 'Gasto editado')
+        self.assertEqual(response.data['deleted'], [deleted.id])
+        
+        # Sin cambios nuevos: respuesta vacía
+        response = self.client.get(self.url, {'since': response.data['cursor']})
+        self.assertEqual(response.data['changed'], [])
+        self.assertEqual(response.data['deleted'], [])
+    
+    def test_sync_margin_withholds_recent_changes(self):
+        """Test: Los cambios y eliminaciones dentro del margen no se entregan todavía"""
+        self.expenses[2].delete()
+        
+        with override_settings(EXPENSES_SYNC_SAFETY_MARGIN=60):
+            response = self.client.get(self.url)
+        
+        self.assertEqual(response.data['changed'], [])
+        self.assertEqual(response.data['deleted'], [])
+        self.assertFalse(response.data['has_more'])
+    
+    def test_sync_page_boundary_inside_margin(self):
+        """Test: Una página con has_more no deja el cursor dentro del margen"""
+        now = timezone.now()
+        ages = [timedelta(hours=2), timedelta(seconds=20), timedelta(seconds=10)]
+        for expense, age in zip(self.expenses, ages):
+            Expense.objects.filter(pk=expense.pk).update(updated_at=now - age)
+        
+        with override_settings(EXPENSES_SYNC_SAFETY_MARGIN=60):
+            response = self.client.get(self.url, {'limit': 1})
+            self.assertEqual(
+                [row['id'] for row in response.data['changed']], [self.expenses[0].id]
+            )
+            self.assertFalse(response.data['has_more'])
+            cursor = response.data['cursor']
+            
+            # Transacción que guardó antes que las filas ya leídas pero
+            # confirmó después de la sincronización
+            late = Expense.objects.create(
+                user=self.user,
+                title='Confirmado tarde',
+                amount=Decimal('1000.00'),
+                category='OTHERS',
+                date=date.today()
+            )
+            Expense.objects.filter(pk=late.pk).update(updated_at=now - timedelta(seconds=30))
+        
+        # Pasado el margen llegan todos, incluido el que confirmó tarde
+        seen = []
+        params = {'limit': 1, 'since': cursor}
+        while True:
+            response = self.client.get(self.url, params)
+            seen.extend(row['id'] for row in response.data['changed'])
+            if not response.data['has_more']:
+                break
+            params = {'limit': 1, 'since': response.data['cursor']}
+        
+        self.assertEqual(seen, [late.id, self.expenses[1].id, self.expenses[2].id])
+    
+    def test_bulk_delete_writes_tombstones(self):
+        """Test: La eliminación masiva también se informa en la sincronización"""
+        cursor = self.client.get(self.url).data['cursor']
+        ids = [self.expenses[0].id, self.expenses[2].id]
+        
+        self.client.delete(reverse('expenses:expense-bulk-create'), {'ids': ids}, format='json')
+        response = self.client.get(self.url, {'since': cursor})
+        
+        self.assertEqual(sorted(response.data['deleted']), sorted(ids))
+    
+    def test_sync_pages_with_limit(self):
+        """Test: Con limit se entregan los cambios por partes sin repetir"""
+        seen = []
+        params = {'limit': 2}
+        
+        while True:
+            response = self.client.get(self.url, params)
+            seen.extend(row['id'] for row in response.data['changed'])
+            if not response.data['has_more']:
+                break
+            params = {'limit': 2, 'since': response.data['cursor']}
+        
+        self.assertEqual(seen, [expense.id for expense in self.expenses])
+    
+    def test_since_accepts_iso_datetime(self):
+        """Test: since acepta una fecha ISO 8601"""
+        since = (timezone.now() + timedelta(minutes=1)).isoformat()
+        
+        response = self.client.get(self.url, {'since': since})
+        
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['changed'], [])
+    
+    def test_invalid_since(self):
+        """Test: Un cursor inválido responde 400"""
+        response = self.client.get(self.url, {'since': 'no-es-un-cursor'})
+        
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn('since', response.data)
+    
+    def test_sync_only_own_expenses(self):
+        """Test: La sincronización no incluye gastos ni eliminaciones de otros usuarios"""
+        other = User.objects.create_user(
+            email='sync2@example.com',
+            password='Password123!',
+            first_name='Other',
+            last_name='User'
+        )
+        expense = Expense.objects.create(
+            user=other,
+            title='Ajeno',
+            amount=Decimal('1000.00'),
+            category='OTHERS',
+            date=date.today()
+        )
+        expense.delete()
+        
+        response = self.client.get(self.url)
+        
+        self.assertEqual(len(response.data['changed']), 3)
+        self.assertEqual(response.data['deleted'], [])
+
+
+class ExpenseQueryCountTest(TestCase):
+    """Tests de regresión: consultas por acción (sin consultar la tabla users)"""
+    
+    def setUp(self):
+        """Configuración inicial"""
+        self.client = APIClient()
+        self.user = User.objects.create_user(
+            email='queries@example.com',
+            password='Password123!',
+            first_name='Query',
+            last_name='User'
+        )
+        self.expense = Expense.objects.create(
+            user=self.user,
+            title='Arriendo',
+            amount=Decimal('900000.00'),
+            category='UTILITIES',
+            date=date.today()
+        )
+        
+        # force_authenticate: sin la consulta del usuario que hace JWTAuthentication
+        self.client.force_authenticate(self.user)
+        self.list_url = reverse('expenses:expense-list')
+        self.detail_url = reverse('expenses:expense-detail', kwargs={'pk': self.expense.pk})
+        self.payload = {
+            'title': 'Arriendo apartamento',
+            'amount': '950000.00',
+            'category': 'UTILITIES',
+            'date': str(date.today())
+        }
+    
+    def assertQueriesWithoutUsers(self, expected, func):
+        """Helper: ejecuta func con expected consultas, ninguna a la tabla users"""
+        from django.db import connection
+        from django.test.utils import CaptureQueriesContext
+        
+        with CaptureQueriesContext(connection) as queries:
+            with self.assertNumQueries(expected):
+                response = func()
+        
+        self.assertFalse([q['sql'] for q in queries if '"users"' in q['sql']])
+        return response
+    
+    def test_retrieve_queries(self):
+        """Test: El detalle hace 1 consulta (el gasto) e incluye user_email"""
+        response = self.assertQueriesWithoutUsers(1, lambda: self.client.get(self.detail_url))
+        
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['user_email'], 'queries@example.com')
+    
+    def test_create_queries(self):
+        """Test: Crear hace INSERT + UPDATE del resumen (+ savepoint)"""
+        response = self.assertQueriesWithoutUsers(
+            4, lambda: self.client.post(self.list_url, self.payload, format='json')
+        )
+        
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(response.data['user_email'], 'queries@example.com')
+    
+    def test_update_queries(self):
+        """Test: PUT hace SELECT + SELECT FOR UPDATE + UPDATE + resúmenes (+ savepoint)"""
+        response = self.assertQueriesWithoutUsers(
+            6, lambda: self.client.put(self.detail_url, self.payload, format='json')
+        )
+        
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['user_email'], 'queries@example.com')
+    
+    def test_partial_update_queries(self):
+        """Test: PATCH sin cambios de monto/categoría/fecha no toca los resúmenes"""
+        response = self.assertQueriesWithoutUsers(
+            5, lambda: self.client.patch(self.detail_url, {'title': 'Renta'}, format='json')
+        )
+        
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['user_email'], 'queries@example.com')
+    
+    def test_destroy_queries(self):
+        """Test: Eliminar hace SELECT + SELECT FOR UPDATE + DELETE + resumen + registro de eliminación"""
+        response = self.assertQueriesWithoutUsers(7, lambda: self.client.delete(self.detail_url))
+        
+        self.assertEqual(response.status_code, status.HTTP_204_NO_CONTENT)
+    
+    @override_settings(EXPENSES_SYNC_SAFETY_MARGIN=0)
+    def test_sync_queries(self):
+        """Test: La sincronización no consulta users por cada gasto"""
+        response = self.assertQueriesWithoutUsers(
+            2, lambda: self.client.get(reverse('expenses:expense-sync'))
+        )
+        
+        self.assertEqual(response.data['changed'][0]['user_email'], 'queries@example.com')
+
+
+class ExpenseFastListTest(TestCase):
+    """Tests para el listado rápido con .values()"""
+    
+    def setUp(self):
+        """Configuración inicial"""
+        self.client = APIClient()
+        self.user = User.objects.create_user(
+            email='fastlist@example.com',
+            password='Password123!',
+            first_name='Fast',
+            last_name='User'
+        )
+        amounts = ['1000.50', '0.01', '99999999.99', '25000.00']
+        for i, (code, name) in enumerate(Expense.CATEGORY_CHOICES):
+            Expense.objects.create(
+                user=self.user,
+                title=f'Gasto {name}',
+                amount=Decimal(amounts[i % len(amounts)]),
+                category=code,
+                date=date.today() - timedelta(days=i)
+            )
+        
+        refresh = RefreshToken.for_user(self.user)
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {refresh.access_token}')
+        self.url = reverse('expenses:expense-list')
+    
+    def test_same_output_as_list_serializer(self):
+        """Test: La versión rápida produce exactamente el mismo JSON"""
+        from .serializers import ExpenseListSerializer, ExpenseListValuesSerializer
+        
+        expenses = Expense.objects.filter(user=self.user)
+        expected = ExpenseListSerializer(expenses, many=True).data
+        fast = ExpenseListValuesSerializer(
+            expenses.values(*ExpenseListValuesSerializer.VALUES_FIELDS), many=True
+        ).data
+        
+        self.assertEqual(fast, expected)
+    
+    def test_same_output_in_utc(self):
+        """Test: created_at se formatea igual con la zona horaria UTC ('Z')"""
+        from django.test import override_settings
+        from .serializers import ExpenseListSerializer, ExpenseListValuesSerializer
+        
+        with override_settings(TIME_ZONE='UTC'):
+            expenses = Expense.objects.filter(user=self.user)
+            expected = ExpenseListSerializer(expenses, many=True).data
+            fast = ExpenseListValuesSerializer(
+                expenses.values(*ExpenseListValuesSerializer.VALUES_FIELDS), many=True
+            ).data
+        
+        self.assertTrue(fast[0]['created_at'].endswith('Z'))
+        self.assertEqual(fast, expected)
+    
+    def test_list_endpoint_uses_values(self):
+        """Test: El listado no carga description ni instancias del modelo"""
+        from django.db import connection
+        from django.test.utils import CaptureQueriesContext
+        
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(self.url, {'ordering': 'amount'})
+        
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['results'][0]['amount'], '0.01')
+        page_query = [q['sql'] for q in queries if 'LIMIT' in q['sql'] and '"expenses"' in q['sql']]
+        self.assertNotIn('"description"', page_query[0])
+    
+    def test_fallback_with_custom_decimal_format(self):
+        """Test: Con COERCE_DECIMAL_TO_STRING=False se usa el serializer normal"""
+        from django.test import override_settings
+        
+        rest_framework = {'COERCE_DECIMAL_TO_STRING': False}
+        with override_settings(REST_FRAMEWORK=rest_framework):
+            response = self.client.get(self.url, {'ordering': 'amount'})
+        
+        self.assertEqual(response.data['results'][0]['amount'], Decimal('0.01'))
+    
+    def test_cursor_pagination_with_values(self):
+        """Test: La paginación por cursor funciona con filas .values()"""
+        for i in range(5):
+            Expense.objects.create(
+                user=self.user,
+                title=f'Extra {i}',
+                amount=Decimal('100.00'),
+                category='OTHERS',
+                date=date.today()
+            )
+        
+        first = self.client.get(self.url, {'pagination': 'cursor'})
+        second = self.client.get(first.data['next'])
+        
+        self.assertEqual(second.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(second.data['results']), 2)
+        self.assertEqual(second.data['results'][0]['category_display'], 'Salud')
+    
+    def test_benchmark_command(self):
+        """Test: La suite de benchmark del listado se ejecuta"""
+        from io import StringIO
+        from django.core.management import call_command
+        
+        out = StringIO()
+        call_command('benchmark_expenses', 'list', rows=20, repeat=1, stdout=out)
+        
+        self.assertIn('speedup', out.getvalue())
+
+
+class ExpenseSparseFieldsTest(TestCase):
+    """Tests para los campos parciales (?fields= / ?omit=)"""
+    
+    def setUp(self):
+        """Configuración inicial"""
+        self.client = APIClient()
+        self.user = User.objects.create_user(
+            email='sparse@example.com',
+            password='Password123!',
+            first_name='Sparse',
+            last_name='User'
+        )
+        for i in range(12):
+            self.expense = Expense.objects.create(
+                user=self.user,
+                title=f'Gasto {i}',
+                amount=Decimal('1000.00') + i,
+                category='OTHERS',
+                description='Descripción larga ' * 20,
+                date=date.today() - timedelta(days=i)
+            )
+        
+        refresh = RefreshToken.for_user(self.user)
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {refresh.access_token}')
+        self.list_url = reverse('expenses:expense-list')
+        self.detail_url = reverse('expenses:expense-detail', kwargs={'pk': self.expense.pk})
+    
+    def get_with_queries(self, url, params):
+        """Helper: GET que retorna la respuesta y las consultas SQL"""
+        from django.db import connection
+        from django.test.utils import CaptureQueriesContext
+        
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(url, params)
+        return response, [q['sql'] for q in queries if 'FROM "expenses"' in q['sql']]
+    
+    def test_list_fields(self):
+        """Test: ?fields= limita el JSON y las columnas del SELECT"""
+        response, queries = self.get_with_queries(self.list_url, {'fields': 'id,amount,date'})
+        
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(set(response.data['results'][0]), {'id', 'amount', 'date'})
+        page_query = [sql for sql in queries if 'LIMIT' in sql][0]
+        self.assertNotIn('"title"', page_query)
+        self.assertNotIn('"category"', page_query)
+    
+    def test_list_omit(self):
+        """Test: ?omit= quita campos del listado"""
+        response = self.client.get(self.list_url, {'omit': 'category_display,created_at'})
+        
+        self.assertEqual(
+            set(response.data['results'][0]),
+            {'id', 'title', 'amount', 'category', 'date'}
+        )
+    
+    def test_category_display_only(self):
+        """Test: category_display se calcula aunque no se pida category"""
+        response = self.client.get(self.list_url, {'fields': 'category_display'})
+        
+        self.assertEqual(response.data['results'][0], {'category_display': 'Otros'})
+    
+    def test_detail_omit_description(self):
+        """Test: ?omit=description no lee la descripción de la BD"""
+        response, queries = self.get_with_queries(self.detail_url, {'omit': 'description'})
+        
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertNotIn('description', response.data)
+        self.assertEqual(response.data['user_email'], 'sparse@example.com')
+        self.assertTrue(all('"description"' not in sql for sql in queries))
+    
+    def test_invalid_field(self):
+        """Test: Un campo inexistente responde 400"""
+        response = self.client.get(self.list_url, {'fields': 'id,password'})
+        
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn('fields', response.data)
+    
+    def test_list_fields_are_list_fields(self):
+        """Test: El listado no permite campos que solo tiene el detalle"""
+        response = self.client.get(self.list_url, {'fields': 'description'})
+        
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+    
+    def test_cursor_pagination_with_fields(self):
+        """Test: La paginación por cursor funciona sin pedir las columnas de orden"""
+        first = self.client.get(self.list_url, {'pagination': 'cursor', 'fields': 'title'})
+        second = self.client.get(first.data['next'])
+        
+        self.assertEqual(first.data['results'][0], {'title': 'Gasto 0'})
+        self.assertEqual([row['title'] for row in second.data['results']], ['Gasto 10', 'Gasto 11'])
+    
+    def test_fields_keep_cheap_count(self):
+        """Test: ?fields= no cuenta como filtro para el total de la paginación"""
+        response = self.client.get(self.list_url, {'fields': 'id'})
+        
+        self.assertEqual(response.data['count'], 12)
+        self.assertFalse(response.data['count_estimated'])
+    
+    def test_writes_ignore_fields(self):
+        """Test: Los parámetros no afectan las escrituras"""
+        response = self.client.patch(
+            self.detail_url + '?fields=id', {'title': 'Nuevo'}, format='json'
+        )
+        
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertIn('title', response.data)
+
+
+class ExpensePageSizeTest(TestCase):
+    """Tests para el tamaño de página configurable (?page_size=)"""
+    
+    def setUp(self):
+        """Configuración inicial"""
+        self.client = APIClient()
+        self.user = User.objects.create_user(
+            email='pagesize@example.com',
+            password='Password123!',
+            first_name='Page',
+            last_name='User'
+        )
+        Expense.objects.bulk_create([
+            Expense(
+                user=self.user,
+                title=f'Gasto {i}',
+                amount=Decimal('100.00'),
+                category='OTHERS',
+                date=date.today() - timedelta(days=i)
+            )
+            for i in range(30)
+        ])
+        
+        refresh = RefreshToken.for_user(self.user)
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {refresh.access_token}')
+        self.url = reverse('expenses:expense-list')
+    
+    def test_default_page_size(self):
+        """Test: Sin page_size se usa PAGE_SIZE (10)"""
+        response = self.client.get(self.url)
+        self.assertEqual(len(response.data['results']), 10)
+    
+    def test_custom_page_size(self):
+        """Test: ?page_size= cambia el tamaño de página"""
+        response = self.client.get(self.url, {'page_size': 25})
+        
+        self.assertEqual(len(response.data['results']), 25)
+        self.assertIn('page_size=25', response.data['next'])
+    
+    def test_page_size_is_capped(self):
+        """Test: El servidor recorta page_size al máximo configurado"""
+        from django.test import override_settings
+        
+        with override_settings(EXPENSES_MAX_PAGE_SIZE=20):
+            response = self.client.get(self.url, {'page_size': 1000000})
+        
+        self.assertEqual(len(response.data['results']), 20)
+    
+    def test_page_size_max(self):
+        """Test: ?page_size=max usa el máximo configurado"""
+        from django.test import override_settings
+        
+        with override_settings(EXPENSES_MAX_PAGE_SIZE=15):
+            response = self.client.get(self.url, {'page_size': 'max'})
+        
+        self.assertEqual(len(response.data['results']), 15)
+    
+    def test_invalid_page_size_uses_default(self):
+        """Test: Un page_size inválido usa el tamaño por defecto"""
+        for value in ['0', '-5', 'abc']:
+            response = self.client.get(self.url, {'page_size': value})
+            self.assertEqual(len(response.data['results']), 10)
+    
+    def test_cursor_pagination_page_size(self):
+        """Test: La paginación por cursor también acepta page_size y lo limita"""
+        from django.test import override_settings
+        
+        with override_settings(EXPENSES_MAX_PAGE_SIZE=20):
+            response = self.client.get(self.url, {'pagination': 'cursor', 'page_size': 500})
+            second = self.client.get(response.data['next'])
+        
+        self.assertEqual(len(response.data['results']), 20)
+        self.assertEqual(len(second.data['results']), 10)
+    
+    def test_benchmark_command(self):
+        """Test: La suite de benchmark de page_size se ejecuta"""
+        from io import StringIO
+        from django.core.management import call_command
+        
+        out = StringIO()
+        call_command('benchmark_expenses', 'page_size', rows=30, repeat=1, stdout=out)
+        
+        self.assertIn('peticiones', out.getvalue())
+
+
+class FastJSONRendererTest(TestCase):
+    """Tests para el renderer/parser JSON con orjson y su fallback"""
+    
+    def setUp(self):
+        """Configuración inicial"""
+        from datetime import datetime, timezone as dt_timezone
+        from django.utils.translation import gettext_lazy
+        
+        self.data = {
+            'amount': Decimal('1500.50'),
+            'created_at': datetime(2024, 1, 15, 10, 30, 0, 123456, tzinfo=dt_timezone.utc),
+            'local': timezone.localtime(timezone.now()),
+            'date': date(2024, 1, 15),
+            'title': 'Café\u2028línea\u2029párrafo',
+            'label': gettext_lazy('Otros'),
+            'nested': [{'id': 1, 'values': (1, 2)}],
+            2024: 'clave numérica',
+        }
+    
+    def test_same_bytes_as_drf_renderer(self):
+        """Test: FastJSONRenderer produce los mismos bytes que JSONRenderer"""
+        from rest_framework.renderers import JSONRenderer
+        from config.renderers import FastJSONRenderer
+        
+        self.assertEqual(FastJSONRenderer().render(self.data), JSONRenderer().render(self.data))
+    
+    def test_fallback_without_orjson(self):
+        """Test: Sin orjson se usa json estándar con el mismo resultado"""
+        from unittest import mock
+        from rest_framework.renderers import JSONRenderer
+        from config import renderers
+        
+        with mock.patch.object(renderers, 'orjson', None):
+            rendered = renderers.FastJSONRenderer().render(self.data)
+        
+        self.assertEqual(rendered, JSONRenderer().render(self.data))
+    
+    def test_indent_uses_drf_renderer(self):
+        """Test: Con indentación se usa el renderer de DRF"""
+        from rest_framework.renderers import JSONRenderer
+        from config.renderers import FastJSONRenderer
+        
+        media_type = 'application/json; indent=4'
+        self.assertEqual(
+            FastJSONRenderer().render(self.data, media_type),
+            JSONRenderer().render(self.data, media_type)
+        )
+    
+    def test_big_integers_fall_back(self):
+        """Test: Enteros fuera de 64 bits se codifican con json estándar"""
+        from config.renderers import FastJSONRenderer
+        
+        self.assertEqual(FastJSONRenderer().render({'n': 2 ** 70}), b'{"n":1180591620717411303424}')
+    
+    def test_parser(self):
+        """Test: FastJSONParser lee JSON y reporta errores como ParseError"""
+        from io import BytesIO
+        from rest_framework.exceptions import ParseError
+        from config.renderers import FastJSONParser
+        
+        parser = FastJSONParser()
+        data = parser.parse(BytesIO('{"title": "Café", "amount": "10.00"}'.encode()))
+        
+        self.assertEqual(data, {'title': 'Café', 'amount': '10.00'})
+        with self.assertRaises(ParseError):
+            parser.parse(BytesIO(b'{"title": NaN}'))
+    
+    def test_parser_big_integers(self):
+        """Test: Un entero de más de 64 bits se lee igual que con json estándar"""
+        from io import BytesIO
+        from config.renderers import FastJSONParser
+        
+        from unittest import mock
+        from config import renderers
+        
+        data = FastJSONParser().parse(BytesIO(b'{"amount": 100000000000000000000000}'))
+        self.assertEqual(data, {'amount': 10 ** 23})
+        
+        # Lo que orjson rechaza se reintenta con json estándar
+        error = renderers.orjson.JSONDecodeError('rechazado', '', 0)
+        with mock.patch.object(renderers.orjson, 'loads', side_effect=error):
+            data = FastJSONParser().parse(BytesIO(b'{"amount": 5}'))
+        self.assertEqual(data, {'amount': 5})
+        
+        user = User.objects.create_user(
+            email='bigint@example.com',
+            password='Password123!',
+            first_name='Big',
+            last_name='Int'
+        )
+        client = APIClient()
+        client.force_authenticate(user)
+        response = client.post(
+            reverse('expenses:expense-list'),
+            b'{"title": "Grande", "amount": 100000000000000000000000,'
+            b' "category": "OTHERS", "date": "2024-01-01"}',
+            content_type='application/json',
+        )
+        
+        # Error de validación del campo, no ParseError
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn('amount', response.data)
+    
+    def test_api_response_matches(self):
+        """Test: Las respuestas de la API son idénticas con ambos renderers"""
+        from rest_framework.renderers import JSONRenderer
+        
+        user = User.objects.create_user(
+            email='renderer@example.com',
+            password='Password123!',
+            first_name='Render',
+            last_name='User'
+        )
+        expense = Expense.objects.create(
+            user=user,
+            title='Librería',
+            amount=Decimal('45000.00'),
+            category='OTHERS',
+            date=date.today()
+        )
+        client = APIClient()
+        client.force_authenticate(user)
+        
+        response = client.get(reverse('expenses:expense-detail', kwargs={'pk': expense.pk}))
+        
+        self.assertEqual(response.content, JSONRenderer().render(response.data))
+    
+    def test_benchmark_command(self):
+        """Test: La suite de benchmark del renderer se ejecuta"""
+        from io import StringIO
+        from django.core.management import call_command
+        
+        out = StringIO()
+        call_command('benchmark_expenses', 'renderer', rows=20, repeat=1, stdout=out)
+        
+        self.assertIn('speedup', out.getvalue())
+        self.assertNotIn('no coinciden', out.getvalue())
+
+
+class CompressionMiddlewareTest(TestCase):
+    """Tests para la compresión gzip de respuestas"""
+    
+    def setUp(self):
+        """Configuración inicial"""
+        from config import metrics
+        
+        metrics.reset()
+        self.client = APIClient()
+        self.user = User.objects.create_user(
+            email='gzip@example.com',
+            password='Password123!',
+            first_name='Gzip',
+            last_name='User'
+        )
+        Expense.objects.bulk_create([
+            Expense(
+                user=self.user,
+                title=f'Gasto comprimible {i}',
+                amount=Decimal('1000.00') + i,
+                category='OTHERS',
+                description='Descripción repetida para comprimir',
+                date=date.today() - timedelta(days=i % 30)
+            )
+            for i in range(60)
+        ])
+        self.client.force_authenticate(self.user)
+        self.list_url = reverse('expenses:expense-list')
+        self.export_url = reverse('expenses:expense-export')
+    
+    def test_compresses_large_json(self):
+        """Test: Un listado grande se envía con gzip y se reporta el ahorro"""
+        import gzip
+        from config import metrics
+        
+        plain = self.client.get(self.list_url, {'page_size': 50})
+        response = self.client.get(self.list_url, {'page_size': 50}, HTTP_ACCEPT_ENCODING='gzip')
+        
+        self.assertEqual(response['Content-Encoding'], 'gzip')
+        self.assertIn('Accept-Encoding', response['Vary'])
+        self.assertEqual(gzip.decompress(response.content), plain.content)
+        self.assertEqual(metrics.get('compression.bytes_in'), len(plain.content))
+        self.assertEqual(metrics.get('compression.bytes_out'), len(response.content))
+        self.assertGreater(metrics.get('compression.bytes_saved'), 0)
+    
+    def test_skips_without_accept_encoding(self):
+        """Test: Sin Accept-Encoding: gzip la respuesta va sin comprimir"""
+        response = self.client.get(self.list_url, {'page_size': 50})
+        
+        self.assertFalse(response.has_header('Content-Encoding'))
+        self.assertEqual(response.json()['results'][0]['category'], 'OTHERS')
+    
+    def test_skips_small_responses(self):
+        """Test: Las respuestas menores al umbral no se comprimen"""
+        from config import metrics
+        
+        expense = Expense.objects.filter(user=self.user).first()
+        url = reverse('expenses:expense-detail', kwargs={'pk': expense.pk})
+        response = self.client.get(url, HTTP_ACCEPT_ENCODING='gzip')
+        
+        self.assertFalse(response.has_header('Content-Encoding'))
+        self.assertEqual(metrics.get('compression.responses'), 0)
+
+    def test_if_match_with_compressed_etag(self):
+        """Test: El ETag de una respuesta comprimida (W/) sirve para If-Match"""
+        from django.test import override_settings
+
+        expense = Expense.objects.filter(user=self.user).first()
+        expense.description = 'Descripción repetida para comprimir. ' * 10
+        expense.save()
+        url = reverse('expenses:expense-detail', kwargs={'pk': expense.pk})
+
+        with override_settings(COMPRESSION_MIN_LENGTH=0):
+            response = self.client.get(url, HTTP_ACCEPT_ENCODING='gzip')
+            etag = response['ETag']
+            self.assertEqual(response['Content-Encoding'], 'gzip')
+            self.assertTrue(etag.startswith('W/'))
+
+            response = self.client.patch(
+                url, {'title': 'Editado'}, format='json',
+                HTTP_ACCEPT_ENCODING='gzip', HTTP_IF_MATCH=etag
+            )
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+            # El mismo ETag ya no es la versión actual
+            response = self.client.patch(
+                url, {'title': 'Otro'}, format='json',
+                HTTP_ACCEPT_ENCODING='gzip', HTTP_IF_MATCH=etag
+            )
+            self.assertEqual(response.status_code, status.HTTP_412_PRECONDITION_FAILED)
+
+        expense.refresh_from_db()
+        self.assertEqual(expense.title, 'Editado')
+
+    def test_skips_html_and_excluded_paths(self):
+        """Test: La API navegable (HTML) y /api/auth/ no se comprimen"""
+        from django.test import override_settings
+        
+        response = self.client.get(self.list_url, {'format': 'api'}, HTTP_ACCEPT_ENCODING='gzip')
+        self.assertFalse(response.has_header('Content-Encoding'))
+        
+        with override_settings(COMPRESSION_MIN_LENGTH=0):
+            response = self.client.post(reverse('users:login'), {
+                'email': 'gzip@example.com',
+                'password': 'Password123!'
+            }, HTTP_ACCEPT_ENCODING='gzip')
+        
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertFalse(response.has_header('Content-Encoding'))
+    
+    def test_streaming_export_compressed_in_chunks(self):
+        """Test: La exportación NDJSON se comprime por bloques"""
+        import gzip
+        from django.test import override_settings
+        from config import metrics
+        
+        plain = b''.join(self.client.get(self.export_url, {'export_format': 'ndjson'}).streaming_content)
+        
+        with override_settings(COMPRESSION_STREAM_FLUSH_SIZE=1024):
+            response = self.client.get(
+                self.export_url, {'export_format': 'ndjson'}, HTTP_ACCEPT_ENCODING='gzip'
+            )
+            chunks = [chunk for chunk in response.streaming_content if chunk]
+        
+        self.assertEqual(response['Content-Encoding'], 'gzip')
+        self.assertFalse(response.has_header('Content-Length'))
+        self.assertGreater(len(chunks), 3)
+        self.assertEqual(gzip.decompress(b''.join(chunks)), plain)
+        self.assertEqual(metrics.get('compression.bytes_in'), len(plain))
+        self.assertEqual(metrics.get('compression.bytes_out'), len(b''.join(chunks)))
+
+
+class ExpenseAdminDeleteTest(TestCase):
+    """Tests para la acción "Eliminar seleccionados" del admin de gastos"""
+    
+    def setUp(self):
+        """Configuración inicial"""
+        from django.test import Client
+        
+        self.admin = User.objects.create_superuser(
+            email='admin@example.com',
+            password='Password123!',
+            first_name='Admin',
+            last_name='User'
+        )
+        self.users = [
+            User.objects.create_user(
+                email=f'admindelete{i}@example.com',
+                password='Password123!',
+                first_name='Admin',
+                last_name='Delete'
+            )
+            for i in range(2)
+        ]
+        self.expenses = [
+            Expense.objects.create(
+                user=user,
+                title=f'Gasto {i}',
+                amount=Decimal('100.00'),
+                category='OTHERS',
+                date=date.today()
+            )
+            for user in self.users
+            for i in range(2)
+        ]
+        self.client = Client()
+        self.client.force_login(self.admin)
+    
+    def test_delete_selected_updates_rollups_and_sync(self):
+        """Test: Eliminar desde el admin actualiza resúmenes, sync y cache"""
+        from .cache import get_generation
+        from .models import ExpenseDeletion, ExpenseRollup
+        
+        selected = [self.expenses[0], self.expenses[2]]
+        generations = [get_generation(user.id) for user in self.users]
+        
+        response = self.client.post(reverse('admin:expenses_expense_changelist'), {
+            'action': 'delete_selected',
+            '_selected_action': [expense.pk for expense in selected],
+            'post': 'yes',
+        })
+        
+        self.assertEqual(response.status_code, 302)
+        self.assertEqual(Expense.objects.count(), 2)
+        for user, generation in zip(self.users, generations):
+            rollup = ExpenseRollup.objects.get(user=user, category='OTHERS')
+            self.assertEqual(rollup.count, 1)
+            self.assertEqual(rollup.total, Decimal('100.00'))
+            self.assertNotEqual(get_generation(user.id), generation)
+        self.assertEqual(
+            sorted(ExpenseDeletion.objects.values_list('expense_id', flat=True)),
+            sorted(expense.pk for expense in selected)
+        )
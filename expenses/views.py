@@ -1,15 +1,40 @@
-from rest_framework import viewsets, status
+from django.http import StreamingHttpResponse
+from rest_framework import viewsets, status, serializers
 from rest_framework.decorators import action
 from rest_framework.response import Response
 from rest_framework.permissions import IsAuthenticated
-from django.db.models import Sum, Avg, Count
+from rest_framework.parsers import MultiPartParser, FormParser
 from django_filters.rest_framework import DjangoFilterBackend
+from drf_spectacular.utils import extend_schema
 from rest_framework.filters import SearchFilter, OrderingFilter
 
+from users.authentication import TokenClaimsAuthentication
+
 from .models import Expense
-from .serializers import ExpenseSerializer, ExpenseListSerializer, ExpenseStatsSerializer
+from .serializers import (
+    ExpenseSerializer,
+    ExpenseListSerializer,
+    ExpenseListValuesSerializer,
+    ExpenseStatsSerializer,
+    ExpenseTimeseriesQuerySerializer,
+    ExpenseTimeseriesSerializer,
+    ExpenseBulkUpdateSerializer,
+    ExpenseBulkDeleteSerializer,
+    ExpenseSyncQuerySerializer,
+    ExpenseSyncSerializer,
+    BULK_MAX_ITEMS,
+)
 from .permissions import IsOwner
 from .filters import ExpenseFilter
+from .exports import EXPORT_FORMATS
+from .imports import CSVImportError, import_expenses_csv
+from .bulk import bulk_create_expenses, bulk_update_expenses, bulk_delete_expenses
+from .search import ExpenseFullTextSearchFilter
+from .cache import cache_response
+from .conditional import conditional_response, queryset_validators, object_validators
+from .pagination import ExpensePageNumberPagination, ExpenseCursorPagination
+from .stats import stats_from_rollups, compute_timeseries
+from .sync import changes_since
 
 
 class ExpenseViewSet(viewsets.ModelViewSet):
@@ -29,13 +54,44 @@ class ExpenseViewSet(viewsets.ModelViewSet):
     serializer_class = ExpenseSerializer
     permission_classes = [IsAuthenticated, IsOwner]
     
+    # Lecturas sin consultar users si USERS_AUTH_TOKEN_CLAIMS está activo.
+    # Las vistas solo usan request.user.id (y email en user_email).
+    authentication_classes = [TokenClaimsAuthentication]
+    
+    # Acciones que aceptan el usuario de los claims. export y sync quedan
+    # afuera: devuelven todos los gastos y deben rechazar cuentas inactivas.
+    claims_auth_actions = ('list', 'retrieve', 'stats', 'timeseries')
+    
     # Configuración de filtros
-    filter_backends = [DjangoFilterBackend, SearchFilter, OrderingFilter]
+    filter_backends = [DjangoFilterBackend, SearchFilter, OrderingFilter, ExpenseFullTextSearchFilter]
     filterset_class = ExpenseFilter
-    search_fields = ['title', 'description']  # Búsqueda en estos campos
+    search_fields = ['title', 'description']  # Búsqueda en estos campos (?search= y ?q=)
     ordering_fields = ['date', 'amount', 'created_at']  # Ordenamiento permitido
     ordering = ['-date']  # Ordenamiento por defecto
     
+    # Máximo de gastos por petición en las operaciones masivas
+    bulk_max_items = BULK_MAX_ITEMS
+    
+    # Campos parciales (?fields=id,amount / ?omit=description) en GET
+    fields_param = 'fields'
+    omit_param = 'omit'
+    sparse_fields_actions = ('list', 'retrieve')
+    
+    # Columna del modelo que necesita cada campo calculado
+    sparse_field_columns = {
+        'user_email': 'user',
+        'category_display': 'category',
+    }
+    
+    # Listado rápido: filas de .values() serializadas sin la maquinaria
+    # de campos de DRF (mismo JSON que ExpenseListSerializer)
+    fast_list = True
+    
+    # Paginación por página con total estimado/cacheado, y por cursor
+    # (keyset) con ?pagination=cursor
+    pagination_class = ExpensePageNumberPagination
+    cursor_pagination_class = ExpenseCursorPagination
+    
     def get_queryset(self):
         """
         Sobrescribe el queryset para filtrar solo gastos del usuario autenticado.
@@ -46,7 +102,105 @@ class ExpenseViewSet(viewsets.ModelViewSet):
             QuerySet: Gastos del usuario autenticado
         """
         # Solo retornar gastos del usuario autenticado
-        return Expense.objects.filter(user=self.request.user)
+        queryset = Expense.objects.filter(user_id=self.request.user.id)
+        
+        # Con ?fields= / ?omit= no se leen las columnas que no se devuelven
+        columns = self.get_sparse_columns()
+        if columns is not None:
+            queryset = queryset.only(*columns)
+        
+        return queryset
+    
+    def get_sparse_fields(self):
+        """
+        Retorna los campos pedidos con ?fields= y/o ?omit= (solo en GET).
+        
+        GET /api/expenses/?fields=id,amount,date
+        GET /api/expenses/{id}/?omit=description,user_email
+        
+        Returns:
+            set | None: Nombres de los campos a devolver (None = todos)
+            
+        Raises:
+            ValidationError: Si se pide un campo que no existe
+        """
+        if hasattr(self, '_sparse_fields'):
+            return self._sparse_fields
+        
+        self._sparse_fields = None
+        if self.action not in self.sparse_fields_actions:
+            return None
+        
+        params = self.request.query_params
+        if not params.get(self.fields_param) and not params.get(self.omit_param):
+            return None
+        
+        available = (
+            ExpenseListSerializer.Meta.fields if self.action == 'list'
+            else ExpenseSerializer.Meta.fields
+        )
+        selected = set(available)
+        
+        for param in (self.fields_param, self.omit_param):
+            names = {name.strip() for name in params.get(param, '').split(',') if name.strip()}
+            unknown = names - set(available)
+            if unknown:
+                raise serializers.ValidationError({
+                    param: f'Campos no válidos: {", ".join(sorted(unknown))}. '
+                           f'Opciones: {", ".join(available)}.'
+                })
+            if names:
+                selected = selected & names if param == self.fields_param else selected - names
+        
+        self._sparse_fields = selected
+        return selected
+    
+    def get_sparse_columns(self):
+        """
+        Retorna las columnas del modelo necesarias para los campos pedidos.
+        
+        Siempre incluye id, user (permisos y user_email) y updated_at
+        (ETag), y las columnas de ordenamiento si se pagina por cursor.
+        
+        Returns:
+            list | None: Columnas para .only() (None = todas)
+        """
+        fields = self.get_sparse_fields()
+        if fields is None:
+            return None
+        
+        columns = {'id', 'user', 'updated_at'} | self.get_cursor_columns()
+        columns.update(self.sparse_field_columns.get(name, name) for name in fields)
+        return sorted(columns)
+    
+    def get_cursor_columns(self):
+        """
+        Retorna las columnas que la paginación por cursor lee de cada fila.
+        """
+        if self.action != 'list' or not isinstance(self.paginator, ExpenseCursorPagination):
+            return set()
+        ordering = self.paginator.get_ordering(self.request, None, self)
+        return {field.lstrip('-') for field in ordering}
+    
+    @property
+    def paginator(self):
+        """
+        Retorna el paginador según el modo pedido por el cliente.
+        
+        Por defecto se usa la paginación por número de página. Con
+        ?pagination=cursor (o al seguir un link con ?cursor=) se usa
+        la paginación keyset, cuyo costo no crece con la página.
+        
+        Returns:
+            BasePagination: Instancia del paginador
+        """
+        if not hasattr(self, '_paginator'):
+            params = self.request.query_params if self.request else {}
+            if params.get('pagination') == 'cursor' or 'cursor' in params:
+                self._paginator = self.cursor_pagination_class()
+            else:
+                self._paginator = super().paginator
+        return self._paginator
     
     def get_serializer_class(self):
         """
@@ -56,10 +210,99 @@ class ExpenseViewSet(viewsets.ModelViewSet):
             Serializer: La clase de serializer apropiada
         """
         if self.action == 'list':
-            # Para listar, usar serializer simplificado
+            # Para listar, usar serializer simplificado (o su versión rápida)
+            if self.use_fast_list():
+                return ExpenseListValuesSerializer
             return ExpenseListSerializer
+        if self.action == 'bulk_update':
+            return ExpenseBulkUpdateSerializer
+        if self.action == 'bulk_delete':
+            return ExpenseBulkDeleteSerializer
         return ExpenseSerializer
     
+    def get_object(self):
+        """
+        Retorna el gasto de la URL, cargándolo una sola vez por petición.
+        
+        Los validadores condicionales (ETag) y la acción usan la misma instancia.
+        """
+        if getattr(self, '_object', None) is None:
+            self._object = super().get_object()
+        return self._object
+    
+    def get_list_validators(self, request):
+        """
+        ETag y Last-Modified del listado filtrado (MAX(updated_at) y COUNT(id)).
+        """
+        return queryset_validators(request, self.filter_queryset(self.get_queryset()))
+    
+    def get_object_validators(self, request):
+        """
+        ETag y Last-Modified del gasto (updated_at).
+        """
+        return object_validators(request, self.get_object())
+    
+    def get_serializer_context(self):
+        """
+        Agrega los campos pedidos con ?fields= / ?omit= al contexto.
+        """
+        context = super().get_serializer_context()
+        context['fields'] = self.get_sparse_fields()
+        return context
+    
+    def use_fast_list(self):
+        """
+        Indica si el listado usa ExpenseListValuesSerializer.
+        """
+        return self.fast_list and ExpenseListValuesSerializer.is_compatible()
+    
+    @extend_schema(responses=ExpenseListSerializer(many=True))
+    # En el listado solo se evalúa If-None-Match: eliminar un gasto no
+    # cambia MAX(updated_at), pero sí el ETag (incluye COUNT(id))
+    @conditional_response(get_list_validators, use_last_modified=False)
+    @cache_response
+    def list(self, request, *args, **kwargs):
+        """
+        Lista los gastos del usuario.
+        
+        Responde 304 si el ETag enviado en If-None-Match sigue vigente, y
+        usa la respuesta cacheada si no hubo escrituras desde la última.
+        En el modo rápido la página se pide con .values() (solo las
+        columnas del listado) y se serializa sin instancias del modelo.
+        """
+        queryset = self.filter_queryset(self.get_queryset())
+        if self.use_fast_list():
+            columns = ExpenseListValuesSerializer.values_fields_for(self.get_sparse_fields())
+            queryset = queryset.values(*columns, *(self.get_cursor_columns() - set(columns)))
+        
+        page = self.paginate_queryset(queryset)
+        if page is not None:
+            serializer = self.get_serializer(page, many=True)
+            return self.get_paginated_response(serializer.data)
+        
+        serializer = self.get_serializer(queryset, many=True)
+        return Response(serializer.data)
+    
+    @conditional_response(get_object_validators)
+    @cache_response
+    def retrieve(self, request, *args, **kwargs):
+        """
+        Detalle de un gasto.
+        
+        Responde 304 con If-None-Match / If-Modified-Since vigentes.
+        """
+        return super().retrieve(request, *args, **kwargs)
+    
+    @conditional_response(get_object_validators)
+    def update(self, request, *args, **kwargs):
+        """
+        Actualiza un gasto (PUT y PATCH).
+        
+        Con If-Match, responde 412 si el gasto cambió desde que el
+        cliente obtuvo su ETag (evita pisar cambios de otra petición).
+        """
+        return super().update(request, *args, **kwargs)
+    
     def perform_create(self, serializer):
         """
         Sobrescribe la creación para asignar automáticamente el usuario.
@@ -71,6 +314,7 @@ class ExpenseViewSet(viewsets.ModelViewSet):
         serializer.save(user=self.request.user)
     
     @action(detail=False, methods=['get'])
+    @cache_response
     def stats(self, request):
         """
         Endpoint personalizado para obtener estadísticas.
@@ -80,38 +324,241 @@ class ExpenseViewSet(viewsets.ModelViewSet):
         Returns:
             Response: Estadísticas de gastos del usuario
         """
-        # Obtener gastos del usuario
-        expenses = self.get_queryset()
+        # Calcular totales y breakdown por categoría desde los resúmenes
+        # mensuales (no recorre todos los gastos del usuario)
+        stats = stats_from_rollups(request.user)
+        
+        # Serializar
+        serializer = ExpenseStatsSerializer(stats)
+        
+        return Response(serializer.data)
+    
+    @action(detail=False, methods=['get'], url_path='stats/timeseries', url_name='stats-timeseries')
+    @cache_response
+    def timeseries(self, request):
+        """
+        Serie de tiempo de gastos agrupada por día, semana o mes.
+        
+        GET /api/expenses/stats/timeseries/?granularity=month
+        
+        Acepta los mismos filtros que el listado (category, start_date,
+        end_date, min_amount, max_amount, period, search). Los períodos
+        sin gastos se devuelven en cero.
+        
+        Returns:
+            Response: Lista de períodos con totales por categoría
+        """
+        params = ExpenseTimeseriesQuerySerializer(data=request.query_params)
+        params.is_valid(raise_exception=True)
+        
+        expenses = self.filter_queryset(self.get_queryset())
+        
+        try:
+            series = compute_timeseries(
+                expenses,
+                params.validated_data['granularity'],
+                start=params.validated_data.get('start_date'),
+                end=params.validated_data.get('end_date'),
+            )
+        except ValueError as e:
+            raise serializers.ValidationError({'granularity': str(e)})
+        
+        serializer = ExpenseTimeseriesSerializer(series, many=True)
+        
+        return Response({
+            'granularity': params.validated_data['granularity'],
+            'results': serializer.data,
+        })
+    
+    @action(detail=False, methods=['get'])
+    def sync(self, request):
+        """
+        Sincronización incremental para clientes offline.
+        
+        GET /api/expenses/sync/                      → primera sincronización
+        GET /api/expenses/sync/?since=<cursor>       → cambios desde el cursor
+        GET /api/expenses/sync/?since=2024-01-15T10:30:00Z
+        
+        Devuelve los gastos creados o modificados (ordenados por
+        updated_at) y los ids de los gastos eliminados desde el cursor.
+        Si has_more es true, repetir con el nuevo cursor. Los cambios de
+        los últimos EXPENSES_SYNC_SAFETY_MARGIN segundos se entregan en la
+        siguiente llamada.
+        
+        Returns:
+            Response: {'changed', 'deleted', 'cursor', 'has_more'}
+        """
+        params = ExpenseSyncQuerySerializer(data=request.query_params)
+        params.is_valid(raise_exception=True)
         
-        # Calcular estadísticas
-        stats = expenses.aggregate(
-            total_expenses=Count('id'),
-            total_amount=Sum('amount'),
-            average_amount=Avg('amount')
+        changes = changes_since(
+            request.user,
+            params.validated_data['since'],
+            limit=params.validated_data['limit'],
         )
         
-        # Manejar valores None cuando no hay gastos
-        if stats['total_amount'] is None:
-            stats['total_amount'] = 0
-        if stats['average_amount'] is None:
-            stats['average_amount'] = 0
-        
-        # Gastos por categoría
-        by_category = {}
-        for choice in Expense.CATEGORY_CHOICES:
-            category_code = choice[0]
-            category_name = choice[1]
-            
-            category_total = expenses.filter(
-                category=category_code
-            ).aggregate(total=Sum('amount'))
+        serializer = ExpenseSyncSerializer(changes, context=self.get_serializer_context())
+        
+        return Response(serializer.data)
+    
+    @action(detail=False, methods=['post'], url_path='bulk', url_name='bulk-create')
+    def bulk_create(self, request):
+        """
+        Crea varios gastos en una sola petición.
+        
+        POST /api/expenses/bulk/
+        Body: [{"title": ..., "amount": ..., "category": ..., "date": ...}, ...]
+        
+        Cada gasto se valida con las mismas reglas que en la creación
+        individual. Si alguno es inválido no se crea ninguno y se
+        devuelven los errores con su posición en la lista.
+        
+        Returns:
+            Response: Gastos creados o errores por gasto
+        """
+        serializer = self.get_serializer(
+            data=request.data,
+            many=True,
+            allow_empty=False,
+            max_length=self.bulk_max_items,
+        )
+        
+        if not serializer.is_valid():
+            errors = serializer.errors
+            if isinstance(errors, dict):
+                # Error de la lista completa (no es lista, vacía o muy larga)
+                return Response(errors, status=status.HTTP_400_BAD_REQUEST)
             
-            by_category[category_name] = category_total['total'] or 0
+            return Response({
+                'error': 'Algunos gastos no son válidos. No se creó ninguno.',
+                'items': [
+                    {'index': index, 'errors': item_errors}
+                    for index, item_errors in enumerate(errors)
+                    if item_errors
+                ],
+            }, status=status.HTTP_400_BAD_REQUEST)
         
-        # Agregar breakdown por categoría
-        stats['by_category'] = by_category
+        created = bulk_create_expenses(request.user, serializer.validated_data)
         
-        # Serializar
-        serializer = ExpenseStatsSerializer(stats)
+        return Response({
+            'created': len(created),
+            'results': self.get_serializer(created, many=True).data,
+        }, status=status.HTTP_201_CREATED)
+    
+    @bulk_create.mapping.patch
+    def bulk_update(self, request):
+        """
+        Aplica los mismos cambios a varios gastos.
+        
+        PATCH /api/expenses/bulk/
+        Body: {"ids": [1, 2, 3], "changes": {"category": "OTHERS"}}
+        
+        Se ejecuta un solo UPDATE limitado a los gastos del usuario
+        autenticado; los ids de otros usuarios se ignoran.
+        
+        Returns:
+            Response: Cantidad de gastos actualizados
+        """
+        serializer = self.get_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        
+        updated = bulk_update_expenses(
+            request.user,
+            serializer.validated_data['ids'],
+            serializer.validated_data['changes'],
+        )
+        
+        return Response({'updated': updated}, status=status.HTTP_200_OK)
+    
+    @bulk_create.mapping.delete
+    def bulk_delete(self, request):
+        """
+        Elimina varios gastos.
+        
+        DELETE /api/expenses/bulk/
+        Body: {"ids": [1, 2, 3]}
+        
+        Se ejecuta un solo DELETE limitado a los gastos del usuario
+        autenticado; los ids de otros usuarios se ignoran.
+        
+        Returns:
+            Response: Cantidad de gastos eliminados
+        """
+        serializer = self.get_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        
+        deleted = bulk_delete_expenses(request.user, serializer.validated_data['ids'])
+        
+        return Response({'deleted': deleted}, status=status.HTTP_200_OK)
+    
+    @action(detail=False, methods=['get'])
+    def export(self, request):
+        """
+        Exporta todos los gastos del usuario en CSV o NDJSON.
+        
+        GET /api/expenses/export/?export_format=csv
+        GET /api/expenses/export/?export_format=ndjson
+        
+        Acepta los mismos filtros, búsqueda y ordenamiento que el listado.
+        La respuesta se genera por partes (streaming), sin paginación.
+        
+        Returns:
+            StreamingHttpResponse: Archivo con los gastos
+        """
+        export_format = request.query_params.get('export_format', 'csv')
+        
+        if export_format not in EXPORT_FORMATS:
+            return Response({
+                'error': f'Formato no soportado. Opciones: {", ".join(EXPORT_FORMATS)}.'
+            }, status=status.HTTP_400_BAD_REQUEST)
+        
+        stream, content_type, extension = EXPORT_FORMATS[export_format]
+        expenses = self.filter_queryset(self.get_queryset())
+        
+        response = StreamingHttpResponse(stream(expenses), content_type=content_type)
+        response['Content-Disposition'] = f'attachment; filename="gastos.{extension}"'
+        return response
+    
+    @action(
+        detail=False,
+        methods=['post'],
+        url_path='import',
+        url_name='import',
+        parser_classes=[MultiPartParser, FormParser],
+    )
+    def import_csv(self, request):
+        """
+        Importa gastos desde un archivo CSV.
+        
+        POST /api/expenses/import/  (multipart/form-data, campo 'file')
+        
+        Columnas: title, amount, category, description (opcional), date.
+        Las filas válidas se crean y las inválidas se reportan con su
+        número de línea.
+        
+        Returns:
+            Response: Reporte con gastos creados y errores por fila
+        """
+        csv_file = request.FILES.get('file')
+        
+        if csv_file is None:
+            return Response({
+                'error': 'Se requiere el archivo CSV en el campo "file".'
+            }, status=status.HTTP_400_BAD_REQUEST)
+        
+        try:
+            report = import_expenses_csv(request.user, csv_file.file)
+        except CSVImportError as e:
+            # Las filas anteriores a e.row ya se crearon: se informan para
+            # que el cliente reintente desde esa línea sin duplicarlas
+            return Response({
+                'error': f'Archivo CSV inválido: {e}',
+                'row': e.row,
+                **e.report,
+            }, status=status.HTTP_400_BAD_REQUEST)
+        except ValueError as e:
+            return Response({
+                'error': f'Archivo CSV inválido: {e}'
+            }, status=status.HTTP_400_BAD_REQUEST)
         
-        return Response(serializer.data)
\ No newline at end of file
+        return Response(report, status=status.HTTP_200_OK)
@@ -1,6 +1,32 @@
 from django.apps import AppConfig
+from django.db.models.signals import post_delete, post_save
 
 
 class UsersConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'users'
+
+    def ready(self):
+        from rest_framework_simplejwt.token_blacklist.models import BlacklistedToken
+        from .authentication import reset_cached_user
+        from .blacklist import cache_blacklisted_token
+        from .models import CustomUser
+
+        # Invalidar el usuario cacheado por CachedJWTAuthentication
+        post_save.connect(
+            reset_cached_user,
+            sender=CustomUser,
+            dispatch_uid='users_reset_cached_user_save',
+        )
+        post_delete.connect(
+            reset_cached_user,
+            sender=CustomUser,
+            dispatch_uid='users_reset_cached_user_delete',
+        )
+
+        # Guardar en cache los refresh tokens revocados
+        post_save.connect(
+            cache_blacklisted_token,
+            sender=BlacklistedToken,
+            dispatch_uid='users_cache_blacklisted_token',
+        )
@@ -0,0 +1,246 @@
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import caches
+from django.db import router, transaction
+from django.utils.functional import cached_property
+from django.utils.translation import gettext_lazy as _
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import AuthenticationFailed, InvalidToken
+from rest_framework_simplejwt.models import TokenUser
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.utils import get_md5_hash_password
+
+from config import metrics
+
+
+def get_cache():
+    """
+    Retorna el backend de cache configurado en USERS_AUTH_CACHE_ALIAS.
+    """
+    return caches[getattr(settings, 'USERS_AUTH_CACHE_ALIAS', 'default')]
+
+
+def get_timeout():
+    """
+    Retorna el TTL en segundos de los usuarios cacheados (0 = desactivado).
+    """
+    return getattr(settings, 'USERS_AUTH_CACHE_TIMEOUT', 0)
+
+
+# Campos del usuario que se guardan en cache. El hash de la contraseña
+# nunca se guarda: el cache puede ser un Redis compartido
+CACHED_USER_FIELDS = ('id', 'email', 'is_active', 'is_staff')
+
+
+def user_cache_key(user_id):
+    return f'users:auth:user:{user_id}'
+
+
+def user_to_cache(user):
+    """
+    Proyección mínima del usuario para guardar en cache.
+
+    Con CHECK_REVOKE_TOKEN se agrega el hash MD5 del hash de la
+    contraseña (el mismo valor del claim del token), no el hash original.
+    """
+    data = {field: getattr(user, field) for field in CACHED_USER_FIELDS}
+    if api_settings.CHECK_REVOKE_TOKEN:
+        data['revoke_claim'] = get_md5_hash_password(user.password)
+    return data
+
+
+def user_from_cache(user_model, data):
+    """
+    Reconstruye el usuario desde la proyección del cache.
+
+    Se arma con from_db(), como si viniera de .only(*CACHED_USER_FIELDS):
+    los demás campos quedan diferidos y se cargan de la BD si una vista
+    los usa, y save() solo escribe los campos cargados.
+    """
+    return user_model.from_db(
+        router.db_for_read(user_model),
+        list(CACHED_USER_FIELDS),
+        [data[field] for field in CACHED_USER_FIELDS],
+    )
+
+
+def _invalidate(user_ids):
+    get_cache().delete_many([user_cache_key(user_id) for user_id in user_ids])
+
+
+def invalidate_cached_user(*user_ids):
+    """
+    Descarta los usuarios cacheados por CachedJWTAuthentication.
+
+    Se invalida de inmediato y otra vez al confirmar la transacción, para
+    que una petición concurrente no vuelva a cachear la versión anterior
+    al COMMIT.
+
+    Args:
+        user_ids: Ids de los usuarios que cambiaron
+    """
+    user_ids = set(user_ids)
+    if not user_ids:
+        return
+    _invalidate(user_ids)
+    transaction.on_commit(lambda: _invalidate(user_ids))
+
+
+def reset_cached_user(sender, instance, **kwargs):
+    """
+    Receptor de post_save/post_delete del usuario.
+
+    Cubre la actualización del perfil (UserProfileView), el cambio de
+    contraseña (ChangePasswordView) y la desactivación desde el admin,
+    que guardan el usuario con save().
+    """
+    invalidate_cached_user(instance.pk)
+
+
+class CachedJWTAuthentication(JWTAuthentication):
+    """
+    JWTAuthentication que cachea el usuario por id.
+
+    JWTAuthentication consulta la tabla users en cada petición. Aquí una
+    proyección del usuario (CACHED_USER_FIELDS, sin la contraseña) se
+    guarda en cache por USERS_AUTH_CACHE_TIMEOUT segundos y se invalida
+    cada vez que se guarda o elimina (ver reset_cached_user). Las
+    validaciones de is_active y de revocación por cambio de contraseña se
+    hacen sobre la proyección, igual que en JWTAuthentication.
+
+    Las vistas que usan otros campos (ej: el perfil) cargan el usuario
+    completo de la BD.
+
+    Los cambios hechos con QuerySet.update() no disparan señales: se
+    aplican cuando vence el TTL.
+
+    Uso en settings.REST_FRAMEWORK['DEFAULT_AUTHENTICATION_CLASSES']:
+        'users.authentication.CachedJWTAuthentication'
+    """
+
+    def get_user(self, validated_token):
+        timeout = get_timeout()
+        if not timeout:
+            return super().get_user(validated_token)
+
+        try:
+            user_id = validated_token[api_settings.USER_ID_CLAIM]
+        except KeyError as e:
+            raise InvalidToken(
+                _('Token contained no recognizable user identification')
+            ) from e
+
+        cache = get_cache()
+        key = user_cache_key(user_id)
+        data = cache.get(key)
+        user = None
+
+        if data is not None:
+            metrics.incr('users.auth_cache.hit')
+        else:
+            metrics.incr('users.auth_cache.miss')
+            try:
+                user = self.user_model.objects.get(**{api_settings.USER_ID_FIELD: user_id})
+            except self.user_model.DoesNotExist as e:
+                raise AuthenticationFailed(
+                    _('User not found'), code='user_not_found'
+                ) from e
+            data = user_to_cache(user)
+            cache.set(key, data, timeout)
+
+        if api_settings.CHECK_USER_IS_ACTIVE and not data['is_active']:
+            raise AuthenticationFailed(_('User is inactive'), code='user_inactive')
+
+        if api_settings.CHECK_REVOKE_TOKEN:
+            if validated_token.get(api_settings.REVOKE_TOKEN_CLAIM) != data.get('revoke_claim'):
+                raise AuthenticationFailed(
+                    _("The user's password has been changed."), code='password_changed'
+                )
+
+        return user if user is not None else user_from_cache(self.user_model, data)
+
+
+class ClaimsUser(TokenUser):
+    """
+    TokenUser con el id convertido al tipo de la clave primaria.
+
+    simplejwt guarda user_id como texto en el token; las vistas comparan
+    obj.user_id == request.user.id, que debe ser un entero.
+    """
+
+    @cached_property
+    def id(self):
+        return get_user_model()._meta.pk.to_python(self.token[api_settings.USER_ID_CLAIM])
+
+    @cached_property
+    def pk(self):
+        return self.id
+
+
+def token_claims_enabled():
+    """
+    Indica si está activo el modo sin BD para lecturas (USERS_AUTH_TOKEN_CLAIMS).
+    """
+    return getattr(settings, 'USERS_AUTH_TOKEN_CLAIMS', False)
+
+
+class TokenClaimsAuthentication(CachedJWTAuthentication):
+    """
+    Autenticación que, en lecturas, arma el usuario desde los claims del JWT.
+
+    Con USERS_AUTH_TOKEN_CLAIMS activo, las peticiones GET/HEAD/OPTIONS
+    reciben un ClaimsUser construido con el access token validado, sin
+    consultar la BD ni el cache: request.user.id sale del claim user_id y
+    request.user.email del claim email (ver users.tokens.tokens_for_user).
+    Las escrituras y los tokens sin esos claims cargan el CustomUser
+    completo con CachedJWTAuthentication.
+
+    Solo se aplica a las acciones listadas en claims_auth_actions de la
+    vista (ej: list, retrieve). Las lecturas sensibles, como export o
+    sync, que devuelven todos los gastos de la cuenta, no van en esa
+    lista y siempre validan is_active con el usuario completo.
+
+    En el modo sin BD una cuenta desactivada puede seguir leyendo las
+    acciones permitidas hasta que venza su access token
+    (JWT_ACCESS_TOKEN_LIFETIME).
+
+    Se usa solo en vistas que dependen de request.user.id (ExpenseViewSet):
+    ClaimsUser no tiene nombre, is_staff ni permisos reales.
+    """
+
+    safe_methods = ('GET', 'HEAD', 'OPTIONS')
+    required_claims = ('email',)
+
+    def allows_claims(self, request):
+        """
+        Indica si la petición se puede autenticar solo con los claims.
+
+        La vista llega en request.parser_context; su atributo
+        claims_auth_actions indica qué acciones aceptan un ClaimsUser.
+        """
+        if not token_claims_enabled() or request.method not in self.safe_methods:
+            return False
+        view = (getattr(request, 'parser_context', None) or {}).get('view')
+        return getattr(view, 'action', None) in getattr(view, 'claims_auth_actions', ())
+
+    def authenticate(self, request):
+        if not self.allows_claims(request):
+            return super().authenticate(request)
+
+        header = self.get_header(request)
+        if header is None:
+            return None
+
+        raw_token = self.get_raw_token(header)
+        if raw_token is None:
+            return None
+
+        validated_token = self.get_validated_token(raw_token)
+
+        if api_settings.USER_ID_CLAIM not in validated_token or any(
+            claim not in validated_token for claim in self.required_claims
+        ):
+            return self.get_user(validated_token), validated_token
+
+        metrics.incr('users.auth_claims')
+        return ClaimsUser(validated_token), validated_token
@@ -0,0 +1,36 @@
+from django.contrib.auth import get_user_model
+from django.contrib.auth.backends import ModelBackend
+
+UserModel = get_user_model()
+
+
+class EmailBackend(ModelBackend):
+    """
+    ModelBackend que puede devolver usuarios inactivos en el login.
+
+    Con authenticate(..., allow_inactive=True) retorna el usuario si la
+    contraseña es correcta aunque is_active sea False. Así LoginView
+    distingue "cuenta desactivada" (403) de "credenciales inválidas" (401)
+    con una sola consulta a la tabla users.
+
+    Sin allow_inactive se comporta igual que ModelBackend: el admin y las
+    sesiones siguen rechazando a los usuarios inactivos.
+    """
+
+    def authenticate(self, request, username=None, password=None, allow_inactive=False, **kwargs):
+        if username is None:
+            username = kwargs.get(UserModel.USERNAME_FIELD)
+        if username is None or password is None:
+            return None
+
+        try:
+            user = UserModel._default_manager.get_by_natural_key(username)
+        except UserModel.DoesNotExist:
+            # Igual que ModelBackend: ejecutar el hasher para que el tiempo
+            # de respuesta no revele si el email existe
+            UserModel().set_password(password)
+            return None
+
+        if user.check_password(password) and (allow_inactive or self.user_can_authenticate(user)):
+            return user
+        return None
@@ -0,0 +1,142 @@
+from django.conf import settings
+from django.core.cache import caches
+from django.core.cache.backends.dummy import DummyCache
+from django.core.cache.backends.locmem import LocMemCache
+from django.utils import timezone
+from rest_framework_simplejwt.token_blacklist.models import BlacklistedToken
+
+from config import metrics
+
+
+def get_cache():
+    """
+    Retorna el backend de cache configurado en USERS_BLACKLIST_CACHE_ALIAS.
+    """
+    return caches[getattr(settings, 'USERS_BLACKLIST_CACHE_ALIAS', 'default')]
+
+
+# Marca de que el cache tiene todos los refresh tokens revocados vigentes.
+# Vence cada hora y se vuelve a cargar: acota el efecto de una entrada
+# desalojada del cache
+COMPLETE_KEY = 'users:blacklist:complete'
+COMPLETE_TIMEOUT = 3600
+
+
+def blacklist_key(jti):
+    return f'users:blacklist:{jti}'
+
+
+def cache_is_shared(cache):
+    """
+    Indica si el cache lo comparten todos los workers (ej: Redis).
+
+    LocMem es por proceso y DummyCache no guarda nada: con ellos el
+    conjunto de tokens revocados no puede estar completo.
+    """
+    return not isinstance(cache, (LocMemCache, DummyCache))
+
+
+def remember_blacklisted(jti, expires_at):
+    """
+    Guarda en cache que el token está en la blacklist hasta que venza.
+
+    Args:
+        jti: Identificador del token
+        expires_at: Vencimiento del token (datetime)
+    """
+    timeout = int((expires_at - timezone.now()).total_seconds()) + 1
+    if timeout > 0:
+        get_cache().set(blacklist_key(jti), True, timeout)
+
+
+def warm_blacklist():
+    """
+    Carga en cache todos los refresh tokens revocados que siguen vigentes.
+
+    Al terminar guarda COMPLETE_KEY: desde ahí un jti que no está en
+    cache no está revocado. Los tokens revocados durante la carga no se
+    pierden porque cache_blacklisted_token los guarda por su cuenta.
+    """
+    cache = get_cache()
+    revoked = (
+        BlacklistedToken.objects
+        .filter(token__expires_at__gt=timezone.now())
+        .values_list('token__jti', 'token__expires_at')
+    )
+    for jti, expires_at in revoked.iterator():
+        remember_blacklisted(jti, expires_at)
+
+    cache.set(COMPLETE_KEY, True, COMPLETE_TIMEOUT)
+    metrics.incr('users.blacklist.warm')
+
+
+def is_blacklisted(jti):
+    """
+    Indica si un refresh token está en la blacklist.
+
+    La tabla BlacklistedToken es la fuente de verdad.
+
+    - En cache -> revocado, sin consultar la BD (ej: reintentos con un
+      token ya rotado o cerrado con logout).
+    - Con un cache compartido (Redis) el cache guarda el conjunto
+      completo de revocados (ver warm_blacklist): un jti que no está en
+      cache no está revocado, así cada refresh válido tampoco consulta
+      la BD. El alias USERS_BLACKLIST_CACHE_ALIAS no debe desalojar
+      entradas por memoria (ej: Redis con maxmemory-policy noeviction).
+    - Con LocMem o DummyCache el conjunto no puede estar completo en cada
+      worker: se consulta la tabla y, si está revocado, se guarda en
+      cache hasta su vencimiento.
+
+    Las filas de BlacklistedToken creadas sin post_save (bulk_create o
+    SQL directo) solo se ven en cache después de la siguiente carga.
+
+    Args:
+        jti: Identificador del token
+
+    Returns:
+        bool: True si el token fue revocado
+    """
+    cache = get_cache()
+    key = blacklist_key(jti)
+
+    if cache_is_shared(cache):
+        cached = cache.get_many([key, COMPLETE_KEY])
+        if not cached.get(COMPLETE_KEY) and not cached.get(key):
+            warm_blacklist()
+            cached[key] = cache.get(key)
+        if cached.get(key):
+            metrics.incr('users.blacklist.cache_hit')
+            return True
+        metrics.incr('users.blacklist.cache_negative')
+        return False
+
+    if cache.get(key):
+        metrics.incr('users.blacklist.cache_hit')
+        return True
+
+    metrics.incr('users.blacklist.db_check')
+    expires_at = (
+        BlacklistedToken.objects
+        .filter(token__jti=jti)
+        .values_list('token__expires_at', flat=True)
+        .first()
+    )
+    if expires_at is None:
+        return False
+
+    remember_blacklisted(jti, expires_at)
+    return True
+
+
+def cache_blacklisted_token(sender, instance, created, **kwargs):
+    """
+    Receptor de post_save de BlacklistedToken.
+
+    Cubre la rotación de refresh tokens, el logout y la blacklist desde
+    el admin. No hay receptor de post_delete: quitar un token de la
+    blacklist en el admin se aplica cuando vence la entrada del cache
+    (el token sigue rechazado, que es el lado seguro), y así los DELETE
+    en cascada al podar tokens vencidos no cargan cada fila.
+    """
+    if created:
+        remember_blacklisted(instance.token.jti, instance.token.expires_at)
@@ -0,0 +1,124 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+from rest_framework_simplejwt.token_blacklist.models import BlacklistedToken, OutstandingToken
+
+from users.token_pruning import DEFAULT_BATCH_SIZE, prune_expired_tokens
+
+
+class Command(BaseCommand):
+    """
+    Elimina los refresh tokens vencidos de las tablas de token_blacklist.
+
+    Cada login, registro y refresh (con ROTATE_REFRESH_TOKENS) agrega una
+    fila a OutstandingToken, y cada rotación o logout una a
+    BlacklistedToken. Un token vencido ya no pasa la validación de
+    simplejwt, así que sus filas se pueden borrar sin efecto en la
+    blacklist. Las filas de BlacklistedToken se eliminan en cascada.
+
+    Borra por lotes acotados (ver users.token_pruning), con pausa entre
+    lotes, así que se puede correr sobre la BD en producción. Con --loop
+    repite la poda cada --interval segundos; si --max-batches corta una
+    pasada, la siguiente continúa desde el último id recorrido y vuelve
+    al inicio al llegar al final de la tabla.
+
+    Uso:
+        python manage.py prune_tokens
+        python manage.py prune_tokens --dry-run
+        python manage.py prune_tokens --batch-size 500 --sleep 0.5
+        python manage.py prune_tokens --loop --interval 3600
+        python manage.py prune_tokens --loop --interval 60 --max-batches 10
+    """
+
+    help = 'Elimina los tokens JWT vencidos (outstanding y blacklist).'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--dry-run',
+            action='store_true',
+            help='Solo mostrar cuántos tokens se eliminarían.',
+        )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=DEFAULT_BATCH_SIZE,
+            help=f'Filas recorridas por lote (por defecto {DEFAULT_BATCH_SIZE}).',
+        )
+        parser.add_argument(
+            '--sleep',
+            type=float,
+            default=0.1,
+            help='Segundos de pausa entre lotes (por defecto 0.1).',
+        )
+        parser.add_argument(
+            '--max-batches',
+            type=int,
+            default=None,
+            help='Máximo de lotes por pasada (por defecto toda la tabla).',
+        )
+        parser.add_argument(
+            '--loop',
+            action='store_true',
+            help='Repetir la poda hasta interrumpir el comando (Ctrl+C).',
+        )
+        parser.add_argument(
+            '--interval',
+            type=float,
+            default=3600,
+            help='Segundos entre pasadas con --loop (por defecto 3600).',
+        )
+
+    def handle(self, *args, **options):
+        if options['batch_size'] < 1:
+            raise CommandError('--batch-size debe ser mayor que 0.')
+
+        if options['dry_run']:
+            expired = OutstandingToken.objects.filter(expires_at__lt=timezone.now())
+            blacklisted = BlacklistedToken.objects.filter(token__in=expired).count()
+            self.stdout.write(
+                f'Tokens vencidos: {expired.count()} (en blacklist: {blacklisted})'
+            )
+            return
+
+        start_id = 0
+        try:
+            while True:
+                result = self.prune(options, start_id)
+                start_id = 0 if result.finished else result.last_id
+                if not options['loop']:
+                    break
+                time.sleep(options['interval'])
+        except KeyboardInterrupt:
+            self.stdout.write('Poda interrumpida.')
+
+    def prune(self, options, start_id=0):
+        """
+        Ejecuta una pasada desde start_id y muestra el resultado.
+
+        Returns:
+            PruneResult: Totales de la pasada
+        """
+        def progress(result):
+            if options['verbosity'] > 1:
+                self.stdout.write(
+                    f'Lote {result.batches}: {result.scanned} revisados, '
+                    f'{result.outstanding} eliminados (hasta id {result.last_id})'
+                )
+
+        result = prune_expired_tokens(
+            batch_size=options['batch_size'],
+            sleep=options['sleep'],
+            max_batches=options['max_batches'],
+            start_id=start_id,
+            progress=progress,
+        )
+
+        self.stdout.write(self.style.SUCCESS(
+            f'Tokens eliminados: {result.outstanding} '
+            f'(en blacklist: {result.blacklisted}, lotes: {result.batches})'
+        ))
+        if not result.finished:
+            self.stdout.write(f'Pasada incompleta: continúa después del id {result.last_id}.')
+
+        return result
@@ -2,6 +2,9 @@ from rest_framework import serializers
 from django.contrib.auth import get_user_model
 from django.contrib.auth.password_validation import validate_password
 from rest_framework.validators import UniqueValidator
+from rest_framework_simplejwt.serializers import TokenRefreshSerializer
+
+from .tokens import CachedRefreshToken
 
 User = get_user_model()
 
@@ -160,4 +163,15 @@ class ChangePasswordSerializer(serializers.Serializer):
             raise serializers.ValidationError({
                 "new_password": "Las contraseñas no coinciden."
             })
-        return attrs
\ No newline at end of file
+        return attrs
+
+
+class CachedTokenRefreshSerializer(TokenRefreshSerializer):
+    """
+    Serializer de POST /api/auth/token/refresh/.
+    
+    Igual al de simplejwt, pero revisa la blacklist con cache
+    (CachedRefreshToken). Se configura en SIMPLE_JWT['TOKEN_REFRESH_SERIALIZER'].
+    """
+    
+    token_class = CachedRefreshToken
@@ -381,3 +381,638 @@ class ChangePasswordViewTest(TestCase):
         self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
 
 
+class CachedJWTAuthenticationTest(TestCase):
+    """Tests para el cache del usuario autenticado por JWT"""
+    
+    def setUp(self):
+        """Configuración inicial"""
+        from config import metrics
+        
+        metrics.reset()
+        self.client = APIClient()
+        self.user = User.objects.create_user(
+            email='cached@example.com',
+            password='OldPassword123!',
+            first_name='Cached',
+            last_name='User'
+        )
+        refresh = RefreshToken.for_user(self.user)
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {refresh.access_token}')
+        self.url = reverse('users:user-profile')
+        self.expenses_url = reverse('expenses:expense-list')
+    
+    def user_queries(self):
+        """Helper: hace GET /api/expenses/ y retorna las consultas a la tabla users"""
+        from django.db import connection
+        from django.test.utils import CaptureQueriesContext
+        
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.get(self.expenses_url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return [q['sql'] for q in ctx.captured_queries if '"users"' in q['sql']]
+    
+    def test_second_request_skips_users_query(self):
+        """Test: Después de la primera petición el usuario sale del cache"""
+        from config import metrics
+        
+        self.assertEqual(len(self.user_queries()), 1)
+        self.assertEqual(self.user_queries(), [])
+        self.assertEqual(metrics.get('users.auth_cache.miss'), 1)
+        self.assertEqual(metrics.get('users.auth_cache.hit'), 1)
+    
+    def test_cache_stores_projection_without_password(self):
+        """Test: El cache guarda solo id, email, is_active e is_staff"""
+        from users.authentication import get_cache, user_cache_key
+        
+        self.user_queries()
+        cached = get_cache().get(user_cache_key(self.user.pk))
+        
+        self.assertEqual(cached, {
+            'id': self.user.pk,
+            'email': 'cached@example.com',
+            'is_active': True,
+            'is_staff': False,
+        })
+        self.assertNotIn(self.user.password, str(cached))
+    
+    def test_profile_loads_full_user(self):
+        """Test: El perfil con el usuario del cache muestra todos los campos"""
+        self.user_queries()
+        
+        response = self.client.get(self.url)
+        
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['first_name'], 'Cached')
+        self.assertEqual(response.data['last_name'], 'User')
+    
+    def test_profile_update_invalidates(self):
+        """Test: Actualizar el perfil se refleja en la siguiente petición"""
+        self.user_queries()
+        
+        response = self.client.patch(self.url, {'first_name': 'Nuevo'})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        
+        response = self.client.get(self.url)
+        self.assertEqual(response.data['first_name'], 'Nuevo')
+    
+    def test_change_password_invalidates(self):
+        """Test: Cambiar la contraseña descarta el usuario cacheado"""
+        from users.authentication import get_cache, user_cache_key
+        
+        self.user_queries()
+        self.assertIsNotNone(get_cache().get(user_cache_key(self.user.pk)))
+        
+        response = self.client.post(reverse('users:change-password'), {
+            'old_password': 'OldPassword123!',
+            'new_password': 'NewPassword123!',
+            'new_password2': 'NewPassword123!'
+        })
+        
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertIsNone(get_cache().get(user_cache_key(self.user.pk)))
+        self.assertEqual(len(self.user_queries()), 1)
+    
+    def test_deactivation_takes_effect(self):
+        """Test: Un usuario desactivado deja de autenticarse de inmediato"""
+        self.user_queries()
+        
+        self.user.is_active = False
+        self.user.save()
+        
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+    
+    def test_deleted_user_rejected(self):
+        """Test: Un usuario eliminado no se autentica con el cache"""
+        self.user_queries()
+        
+        self.user.delete()
+        
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+    
+    def test_disabled_with_zero_timeout(self):
+        """Test: Con USERS_AUTH_CACHE_TIMEOUT=0 se consulta siempre la BD"""
+        from django.test import override_settings
+        
+        with override_settings(USERS_AUTH_CACHE_TIMEOUT=0):
+            self.assertEqual(len(self.user_queries()), 1)
+            self.assertEqual(len(self.user_queries()), 1)
+
+
+class TokenClaimsAuthenticationTest(TestCase):
+    """Tests para el modo de lecturas autenticadas con los claims del JWT"""
+    
+    def setUp(self):
+        """Configuración inicial"""
+        from decimal import Decimal
+        from config import metrics
+        from expenses.models import Expense
+        from users.tokens import tokens_for_user
+        
+        metrics.reset()
+        self.client = APIClient()
+        self.user = User.objects.create_user(
+            email='claims@example.com',
+            password='Password123!',
+            first_name='Claims',
+            last_name='User'
+        )
+        self.expense = Expense.objects.create(
+            user=self.user,
+            title='Almuerzo',
+            amount=Decimal('25000.00'),
+            category='GROCERIES',
+            date=datetime.now().date()
+        )
+        self.access = tokens_for_user(self.user)['access']
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {self.access}')
+        self.list_url = reverse('expenses:expense-list')
+        self.detail_url = reverse('expenses:expense-detail', kwargs={'pk': self.expense.pk})
+    
+    def captured(self, method, url, data=None):
+        """Helper: ejecuta la petición y retorna (response, consultas a users)"""
+        from django.db import connection
+        from django.test.utils import CaptureQueriesContext
+        
+        with CaptureQueriesContext(connection) as ctx:
+            response = getattr(self.client, method)(url, data)
+        return response, [q['sql'] for q in ctx.captured_queries if '"users"' in q['sql']]
+    
+    def test_access_token_has_email_claim(self):
+        """Test: Los tokens del login incluyen el email en el access token"""
+        from rest_framework_simplejwt.tokens import AccessToken
+        
+        response = self.client.post(reverse('users:login'), {
+            'email': 'claims@example.com',
+            'password': 'Password123!'
+        })
+        
+        self.assertEqual(AccessToken(response.data['tokens']['access'])['email'], 'claims@example.com')
+    
+    def test_reads_skip_database_user(self):
+        """Test: Con el modo activo las lecturas no consultan users ni el cache"""
+        from django.test import override_settings
+        from config import metrics
+        
+        with override_settings(USERS_AUTH_TOKEN_CLAIMS=True, EXPENSES_CACHE_TIMEOUT=0):
+            response, user_queries = self.captured('get', self.detail_url)
+            list_response, list_user_queries = self.captured('get', self.list_url)
+        
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['user_email'], 'claims@example.com')
+        self.assertEqual(list_response.data['count'], 1)
+        self.assertEqual(user_queries + list_user_queries, [])
+        self.assertEqual(metrics.get('users.auth_claims'), 2)
+        self.assertEqual(metrics.get('users.auth_cache.miss'), 0)
+    
+    def test_other_users_expenses_hidden(self):
+        """Test: El usuario de los claims solo ve sus propios gastos"""
+        from django.test import override_settings
+        from users.tokens import tokens_for_user
+        
+        other = User.objects.create_user(
+            email='claimsother@example.com',
+            password='Password123!',
+            first_name='Other',
+            last_name='User'
+        )
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {tokens_for_user(other)["access"]}')
+        
+        with override_settings(USERS_AUTH_TOKEN_CLAIMS=True):
+            response = self.client.get(self.detail_url)
+        
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+    
+    def test_writes_load_full_user(self):
+        """Test: Las escrituras cargan el CustomUser completo"""
+        from django.test import override_settings
+        from config import metrics
+        
+        with override_settings(USERS_AUTH_TOKEN_CLAIMS=True):
+            response = self.client.patch(self.detail_url, {'title': 'Almuerzo ejecutivo'})
+        
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(metrics.get('users.auth_claims'), 0)
+        self.assertEqual(metrics.get('users.auth_cache.miss'), 1)
+
+    def test_sensitive_reads_load_full_user(self):
+        """Test: export y sync cargan el usuario aunque el modo esté activo"""
+        from django.test import override_settings
+        from config import metrics
+
+        with override_settings(USERS_AUTH_TOKEN_CLAIMS=True):
+            export_response = self.client.get(reverse('expenses:expense-export'))
+            sync_response = self.client.get(reverse('expenses:expense-sync'))
+
+        self.assertEqual(export_response.status_code, status.HTTP_200_OK)
+        self.assertEqual(sync_response.status_code, status.HTTP_200_OK)
+        self.assertEqual(metrics.get('users.auth_claims'), 0)
+
+    def test_inactive_user_cannot_export(self):
+        """Test: Una cuenta desactivada no puede exportar con un token vigente"""
+        from django.test import override_settings
+
+        self.user.is_active = False
+        self.user.save()
+
+        with override_settings(USERS_AUTH_TOKEN_CLAIMS=True):
+            response = self.client.get(reverse('expenses:expense-export'))
+            list_response = self.client.get(self.list_url)
+
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+        # El listado sigue aceptando los claims hasta que venza el token
+        self.assertEqual(list_response.status_code, status.HTTP_200_OK)
+
+    def test_token_without_claims_falls_back(self):
+        """Test: Un access token sin el claim email carga el usuario"""
+        from django.test import override_settings
+        from config import metrics
+        
+        refresh = RefreshToken.for_user(self.user)
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {refresh.access_token}')
+        
+        with override_settings(USERS_AUTH_TOKEN_CLAIMS=True):
+            response = self.client.get(self.detail_url)
+        
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(metrics.get('users.auth_claims'), 0)
+        self.assertEqual(metrics.get('users.auth_cache.miss'), 1)
+    
+    def test_disabled_by_default(self):
+        """Test: Sin USERS_AUTH_TOKEN_CLAIMS las lecturas cargan el usuario"""
+        from config import metrics
+        
+        response = self.client.get(self.detail_url)
+        
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(metrics.get('users.auth_claims'), 0)
+    
+    def test_benchmark_command(self):
+        """Test: La suite de benchmark de autenticación se ejecuta"""
+        from io import StringIO
+        from django.core.management import call_command
+        
+        out = StringIO()
+        call_command('benchmark_expenses', 'auth', rows=20, repeat=1, stdout=out)
+        
+        self.assertIn('claims', out.getvalue())
+
+
+class TokenBlacklistCacheTest(TestCase):
+    """Tests para la revisión de la blacklist con cache y la poda de tokens"""
+    
+    def setUp(self):
+        """Configuración inicial"""
+        from config import metrics
+        from users.tokens import tokens_for_user
+        
+        metrics.reset()
+        self.client = APIClient()
+        self.user = User.objects.create_user(
+            email='blacklist@example.com',
+            password='Password123!',
+            first_name='Black',
+            last_name='List'
+        )
+        self.tokens = tokens_for_user(self.user)
+        self.refresh_url = reverse('users:token_refresh')
+    
+    def blacklist_queries(self, data):
+        """Helper: hace POST /token/refresh/ y retorna (response, consultas a la blacklist)"""
+        from django.db import connection
+        from django.test.utils import CaptureQueriesContext
+        
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.post(self.refresh_url, data, format='json')
+        return response, [
+            q['sql'] for q in ctx.captured_queries
+            if 'blacklistedtoken' in q['sql'] and q['sql'].startswith('SELECT')
+        ]
+    
+    def test_rotation_and_reuse(self):
+        """Test: Un refresh token rotado se rechaza desde el cache"""
+        from config import metrics
+        
+        response = self.client.post(self.refresh_url, {'refresh': self.tokens['refresh']}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertIn('refresh', response.data)
+        
+        response, queries = self.blacklist_queries({'refresh': self.tokens['refresh']})
+        
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+        self.assertEqual(queries, [])
+        self.assertEqual(metrics.get('users.blacklist.cache_hit'), 1)
+    
+    def test_logout_then_refresh(self):
+        """Test: Un refresh token cerrado con logout ya no sirve"""
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {self.tokens["access"]}')
+        response = self.client.post(reverse('users:logout'), {'refresh': self.tokens['refresh']}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_205_RESET_CONTENT)
+        
+        response, queries = self.blacklist_queries({'refresh': self.tokens['refresh']})
+        
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+        self.assertEqual(queries, [])
+    
+    def test_table_is_source_of_truth(self):
+        """Test: Sin la entrada en cache, la tabla sigue rechazando el token"""
+        from config import metrics
+        from users.blacklist import get_cache
+        from users.tokens import CachedRefreshToken
+        
+        CachedRefreshToken(self.tokens['refresh']).blacklist()
+        get_cache().clear()
+        metrics.reset()
+        
+        response, queries = self.blacklist_queries({'refresh': self.tokens['refresh']})
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+        self.assertEqual(len(queries), 1)
+        self.assertEqual(metrics.get('users.blacklist.db_check'), 1)
+        
+        response, queries = self.blacklist_queries({'refresh': self.tokens['refresh']})
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+        self.assertEqual(queries, [])
+
+    def test_shared_cache_answers_valid_tokens(self):
+        """Test: Con un cache compartido los tokens válidos no consultan la blacklist"""
+        import tempfile
+        from django.db import connection
+        from django.test import override_settings
+        from django.test.utils import CaptureQueriesContext
+        from rest_framework_simplejwt.tokens import RefreshToken as SimpleRefreshToken
+        from config import metrics
+        from users.blacklist import is_blacklisted
+
+        valid_jti = SimpleRefreshToken(self.tokens['refresh'])['jti']
+
+        with tempfile.TemporaryDirectory() as path, override_settings(
+            CACHES={
+                'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'},
+                'shared': {'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache', 'LOCATION': path},
+            },
+            USERS_BLACKLIST_CACHE_ALIAS='shared',
+        ):
+            # Primera consulta: carga el conjunto de revocados
+            with CaptureQueriesContext(connection) as ctx:
+                self.assertFalse(is_blacklisted(valid_jti))
+            self.assertEqual(len(ctx.captured_queries), 1)
+
+            with CaptureQueriesContext(connection) as ctx:
+                self.assertFalse(is_blacklisted(valid_jti))
+            self.assertEqual(ctx.captured_queries, [])
+
+            # La rotación revoca el token y el cache lo sabe sin consultar
+            response = self.client.post(self.refresh_url, {'refresh': self.tokens['refresh']}, format='json')
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+            with CaptureQueriesContext(connection) as ctx:
+                self.assertTrue(is_blacklisted(valid_jti))
+            self.assertEqual(ctx.captured_queries, [])
+
+        self.assertEqual(metrics.get('users.blacklist.warm'), 1)
+        self.assertEqual(metrics.get('users.blacklist.db_check'), 0)
+
+    def test_local_cache_checks_table_for_valid_tokens(self):
+        """Test: Con LocMem un token válido se revisa en la tabla"""
+        from config import metrics
+        from rest_framework_simplejwt.tokens import RefreshToken as SimpleRefreshToken
+        from users.blacklist import is_blacklisted
+
+        jti = SimpleRefreshToken(self.tokens['refresh'])['jti']
+        metrics.reset()
+
+        self.assertFalse(is_blacklisted(jti))
+        self.assertFalse(is_blacklisted(jti))
+
+        self.assertEqual(metrics.get('users.blacklist.db_check'), 2)
+        self.assertEqual(metrics.get('users.blacklist.warm'), 0)
+
+    def test_prune_tokens_command(self):
+        """Test: prune_tokens elimina solo los tokens vencidos"""
+        from datetime import timedelta
+        from io import StringIO
+        from django.core.management import call_command
+        from django.utils import timezone
+        from rest_framework_simplejwt.token_blacklist.models import BlacklistedToken, OutstandingToken
+        
+        expired = OutstandingToken.objects.create(
+            user=self.user,
+            jti='expired-jti',
+            token='expired',
+            expires_at=timezone.now() - timedelta(days=1)
+        )
+        BlacklistedToken.objects.create(token=expired)
+        
+        out = StringIO()
+        call_command('prune_tokens', '--dry-run', stdout=out)
+        self.assertIn('Tokens vencidos: 1 (en blacklist: 1)', out.getvalue())
+        self.assertTrue(OutstandingToken.objects.filter(jti='expired-jti').exists())
+        
+        out = StringIO()
+        call_command('prune_tokens', stdout=out)
+        
+        self.assertIn('Tokens eliminados: 1 (en blacklist: 1', out.getvalue())
+        self.assertFalse(OutstandingToken.objects.filter(jti='expired-jti').exists())
+        self.assertEqual(OutstandingToken.objects.filter(user=self.user).count(), 1)
+
+
+class TokenPruningTest(TestCase):
+    """Tests para la poda por lotes de tokens vencidos"""
+    
+    def setUp(self):
+        """Configuración inicial: 7 tokens vencidos (3 en blacklist) y 5 vigentes (1 en blacklist)"""
+        from datetime import timedelta
+        from django.utils import timezone
+        from config import metrics
+        from rest_framework_simplejwt.token_blacklist.models import BlacklistedToken, OutstandingToken
+        
+        metrics.reset()
+        self.user = User.objects.create_user(
+            email='prune@example.com',
+            password='Password123!',
+            first_name='Prune',
+            last_name='User'
+        )
+        now = timezone.now()
+        for i in range(12):
+            # Vigentes intercalados con vencidos
+            expires_at = now + timedelta(days=1) if i % 5 == 2 or i >= 9 else now - timedelta(days=1)
+            token = OutstandingToken.objects.create(
+                user=self.user,
+                jti=f'jti-{i}',
+                token=f'token-{i}',
+                expires_at=expires_at
+            )
+            if i in (0, 4, 7, 8):
+                BlacklistedToken.objects.create(token=token)
+        self.live = set(
+            OutstandingToken.objects.filter(expires_at__gt=now).values_list('jti', flat=True)
+        )
+    
+    def test_prunes_in_batches(self):
+        """Test: Se recorre la tabla por ventanas y solo se borran los vencidos"""
+        from django.db import connection
+        from django.test.utils import CaptureQueriesContext
+        from config import metrics
+        from rest_framework_simplejwt.token_blacklist.models import BlacklistedToken, OutstandingToken
+        from users.token_pruning import prune_expired_tokens
+        
+        progress = []
+        with CaptureQueriesContext(connection) as ctx:
+            result = prune_expired_tokens(batch_size=5, progress=progress.append)
+        
+        self.assertEqual(result.batches, 3)
+        self.assertEqual(result.scanned, 12)
+        self.assertEqual(result.outstanding, 7)
+        self.assertEqual(result.blacklisted, 3)
+        self.assertEqual([p.batches for p in progress], [1, 2, 3])
+        self.assertEqual(set(OutstandingToken.objects.values_list('jti', flat=True)), self.live)
+        self.assertEqual(BlacklistedToken.objects.count(), 1)
+        self.assertEqual(metrics.get('users.token_pruning.outstanding'), 7)
+        self.assertEqual(metrics.get('users.token_pruning.scanned'), 12)
+        
+        windows = [q['sql'] for q in ctx.captured_queries if 'ORDER BY' in q['sql'] and 'LIMIT 5' in q['sql']]
+        self.assertEqual(len(windows), 3)
+    
+    def test_resume_with_max_batches(self):
+        """Test: Con max_batches la pasada se puede continuar desde last_id"""
+        from users.token_pruning import prune_expired_tokens
+        
+        first = prune_expired_tokens(batch_size=4, max_batches=1)
+        second = prune_expired_tokens(batch_size=4, start_id=first.last_id)
+        
+        self.assertEqual(first.batches, 1)
+        self.assertEqual(first.outstanding + second.outstanding, 7)
+    
+    def test_cutoff_is_rechecked(self):
+        """Test: Un token no vencido a la fecha de corte no se borra"""
+        from datetime import timedelta
+        from django.utils import timezone
+        from rest_framework_simplejwt.token_blacklist.models import OutstandingToken
+        from users.token_pruning import prune_batch
+        
+        ids = list(OutstandingToken.objects.values_list('id', flat=True))
+        outstanding, blacklisted = prune_batch(ids, timezone.now() - timedelta(days=2))
+        
+        self.assertEqual((outstanding, blacklisted), (0, 0))
+        self.assertEqual(OutstandingToken.objects.count(), 12)
+    
+    def test_command_with_progress(self):
+        """Test: prune_tokens muestra el avance por lote con --verbosity 2"""
+        from io import StringIO
+        from django.core.management import call_command
+        
+        out = StringIO()
+        call_command('prune_tokens', batch_size=5, sleep=0, verbosity=2, stdout=out)
+        
+        self.assertIn('Lote 3: 12 revisados, 7 eliminados', out.getvalue())
+        self.assertIn('Tokens eliminados: 7 (en blacklist: 3, lotes: 3)', out.getvalue())
+
+    def test_command_loop_resumes_after_max_batches(self):
+        """Test: Con --loop y --max-batches cada pasada continúa desde la anterior"""
+        from io import StringIO
+        from unittest import mock
+        from django.core.management import call_command
+        from rest_framework_simplejwt.token_blacklist.models import OutstandingToken
+        from users.token_pruning import prune_expired_tokens
+
+        ids = list(OutstandingToken.objects.order_by('pk').values_list('pk', flat=True))
+        out = StringIO()
+        with mock.patch(
+            'users.management.commands.prune_tokens.prune_expired_tokens',
+            wraps=prune_expired_tokens,
+        ) as prune, mock.patch(
+            'users.management.commands.prune_tokens.time.sleep',
+            side_effect=[None, None, None, KeyboardInterrupt],
+        ):
+            call_command(
+                'prune_tokens', batch_size=5, sleep=0, max_batches=1,
+                loop=True, interval=0, stdout=out,
+            )
+
+        # Tres pasadas recorren la tabla; la cuarta vuelve al inicio
+        start_ids = [call.kwargs['start_id'] for call in prune.call_args_list]
+        self.assertEqual(start_ids, [0, ids[4], ids[9], 0])
+        self.assertEqual(set(OutstandingToken.objects.values_list('jti', flat=True)), self.live)
+        self.assertIn('continúa después del id', out.getvalue())
+
+
+class LoginQueryCountTest(TestCase):
+    """Tests para el login con una sola consulta a users"""
+    
+    def setUp(self):
+        """Configuración inicial"""
+        self.client = APIClient()
+        self.login_url = reverse('users:login')
+        self.user = User.objects.create_user(
+            email='single@example.com',
+            password='Password123!',
+            first_name='Single',
+            last_name='Lookup'
+        )
+    
+    def login(self, email, password):
+        """Helper: hace el login y retorna (response, consultas a users)"""
+        from django.db import connection
+        from django.test.utils import CaptureQueriesContext
+        
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.post(self.login_url, {
+                'email': email,
+                'password': password
+            }, format='json')
+        return response, [q['sql'] for q in ctx.captured_queries if 'FROM "users"' in q['sql']]
+    
+    def test_success_single_query(self):
+        """Test: Login exitoso con una consulta a users"""
+        response, queries = self.login('single@example.com', 'Password123!')
+        
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(queries), 1)
+    
+    def test_wrong_password_single_query(self):
+        """Test: Contraseña incorrecta con una consulta a users"""
+        response, queries = self.login('single@example.com', 'WrongPassword123!')
+        
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+        self.assertEqual(len(queries), 1)
+    
+    def test_nonexistent_single_query(self):
+        """Test: Email inexistente con una consulta a users"""
+        response, queries = self.login('nobody@example.com', 'Password123!')
+        
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+        self.assertEqual(len(queries), 1)
+    
+    def test_inactive_single_query(self):
+        """Test: Cuenta desactivada responde 403 con una consulta a users"""
+        self.user.is_active = False
+        self.user.save()
+        
+        response, queries = self.login('single@example.com', 'Password123!')
+        
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+        self.assertEqual(response.data['error'], 'Esta cuenta está desactivada.')
+        self.assertEqual(len(queries), 1)
+    
+    def test_inactive_wrong_password(self):
+        """Test: Con contraseña incorrecta no se revela que la cuenta está desactivada"""
+        self.user.is_active = False
+        self.user.save()
+        
+        response, _ = self.login('single@example.com', 'WrongPassword123!')
+        
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+    
+    def test_backend_rejects_inactive_by_default(self):
+        """Test: Sin allow_inactive el backend rechaza usuarios inactivos (admin, sesiones)"""
+        from django.contrib.auth import authenticate
+        
+        self.user.is_active = False
+        self.user.save()
+        
+        self.assertIsNone(authenticate(username='single@example.com', password='Password123!'))
+        self.assertEqual(
+            authenticate(username='single@example.com', password='Password123!', allow_inactive=True),
+            self.user
+        )
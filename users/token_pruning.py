@@ -0,0 +1,122 @@
+import time
+from collections import namedtuple
+
+from django.db import transaction
+from django.utils import timezone
+from rest_framework_simplejwt.token_blacklist.models import BlacklistedToken, OutstandingToken
+
+from config import metrics
+
+
+# Resultado de una pasada de poda
+PruneResult = namedtuple('PruneResult', [
+    'batches',       # Ventanas de ids recorridas
+    'scanned',       # Filas de OutstandingToken leídas
+    'outstanding',   # Filas de OutstandingToken eliminadas
+    'blacklisted',   # Filas de BlacklistedToken eliminadas
+    'last_id',       # Último id recorrido (para continuar desde ahí)
+    'finished',      # True si la pasada llegó al final de la tabla
+])
+
+# Filas por ventana: cada lote lee y borra como máximo esta cantidad
+DEFAULT_BATCH_SIZE = 1000
+
+
+def prune_batch(ids, cutoff):
+    """
+    Elimina los tokens vencidos de una ventana de ids en una transacción corta.
+
+    El vencimiento se vuelve a filtrar en el DELETE, así que una fila que
+    no estaba vencida al leer la ventana nunca se borra. Las filas de
+    BlacklistedToken se eliminan en cascada con un solo DELETE.
+
+    Un token vencido no pasa la validación de simplejwt: ningún refresh ni
+    logout concurrente puede agregarlo a la blacklist mientras se poda.
+
+    Args:
+        ids: Ids de OutstandingToken vencidos
+        cutoff: Fecha de corte (expires_at < cutoff)
+
+    Returns:
+        tuple: (outstanding, blacklisted) filas eliminadas
+    """
+    with transaction.atomic():
+        _, per_model = OutstandingToken.objects.filter(
+            pk__in=ids, expires_at__lt=cutoff
+        ).delete()
+    return (
+        per_model.get(OutstandingToken._meta.label, 0),
+        per_model.get(BlacklistedToken._meta.label, 0),
+    )
+
+
+def prune_expired_tokens(batch_size=DEFAULT_BATCH_SIZE, sleep=0, max_batches=None,
+                         start_id=0, cutoff=None, progress=None):
+    """
+    Elimina los refresh tokens vencidos por lotes acotados.
+
+    Recorre OutstandingToken por keyset sobre la clave primaria:
+
+        SELECT id, expires_at FROM token_blacklist_outstandingtoken
+        WHERE id > <último id> ORDER BY id LIMIT <batch_size>
+
+    y borra los vencidos de cada ventana en su propia transacción. Cada
+    lote lee y bloquea como máximo batch_size filas, así se puede correr
+    sobre la BD en producción sin bloqueos largos ni transacciones que
+    retengan el VACUUM.
+
+    Args:
+        batch_size: Filas por ventana
+        sleep: Segundos de pausa entre lotes (limita la carga sobre la BD)
+        max_batches: Máximo de ventanas por pasada (None = toda la tabla)
+        start_id: Continuar después de este id (ver PruneResult.last_id)
+        cutoff: Fecha de corte; por defecto el momento en que empieza
+        progress: Función opcional (PruneResult) llamada después de cada lote
+
+    Returns:
+        PruneResult: Totales de la pasada
+    """
+    cutoff = cutoff or timezone.now()
+    batches = scanned = outstanding = blacklisted = 0
+    last_id = start_id
+    finished = False
+
+    while max_batches is None or batches < max_batches:
+        window = list(
+            OutstandingToken.objects
+            .filter(pk__gt=last_id)
+            .order_by('pk')
+            .values_list('pk', 'expires_at')[:batch_size]
+        )
+        if not window:
+            finished = True
+            break
+
+        last_id = window[-1][0]
+        expired = [pk for pk, expires_at in window if expires_at < cutoff]
+
+        deleted_outstanding = deleted_blacklisted = 0
+        if expired:
+            deleted_outstanding, deleted_blacklisted = prune_batch(expired, cutoff)
+
+        batches += 1
+        scanned += len(window)
+        outstanding += deleted_outstanding
+        blacklisted += deleted_blacklisted
+
+        metrics.incr('users.token_pruning.batches')
+        metrics.incr('users.token_pruning.scanned', len(window))
+        metrics.incr('users.token_pruning.outstanding', deleted_outstanding)
+        metrics.incr('users.token_pruning.blacklisted', deleted_blacklisted)
+
+        if progress is not None:
+            progress(PruneResult(batches, scanned, outstanding, blacklisted, last_id, False))
+
+        if len(window) < batch_size:
+            finished = True
+            break
+
+        if sleep:
+            time.sleep(sleep)
+
+    return PruneResult(batches, scanned, outstanding, blacklisted, last_id, finished)
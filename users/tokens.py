@@ -0,0 +1,45 @@
+from django.utils.translation import gettext_lazy as _
+from rest_framework_simplejwt.exceptions import TokenError
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from .blacklist import is_blacklisted
+
+
+class CachedRefreshToken(RefreshToken):
+    """
+    RefreshToken que revisa la blacklist con cache (ver users.blacklist).
+
+    Las tablas de token_blacklist siguen siendo la fuente de verdad:
+    blacklist() y outstand() son los de simplejwt.
+    """
+
+    def check_blacklist(self):
+        if is_blacklisted(self.payload[api_settings.JTI_CLAIM]):
+            raise TokenError(_('Token is blacklisted'))
+
+
+def tokens_for_user(user):
+    """
+    Genera el par de tokens JWT de un usuario.
+
+    El access token incluye el claim 'email', que TokenClaimsAuthentication
+    usa para responder lecturas sin consultar la tabla users. El refresh
+    token no lo lleva: los access tokens obtenidos con /token/refresh/ no
+    tienen el claim y se autentican cargando el usuario, así un cambio de
+    email no queda congelado por la duración del refresh token.
+
+    Args:
+        user: Usuario autenticado
+
+    Returns:
+        dict: {'refresh': str, 'access': str}
+    """
+    refresh = CachedRefreshToken.for_user(user)
+    access = refresh.access_token
+    access['email'] = user.email
+
+    return {
+        'refresh': str(refresh),
+        'access': str(access),
+    }
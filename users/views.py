@@ -2,9 +2,9 @@ from rest_framework import status, generics
 from rest_framework.response import Response
 from rest_framework.views import APIView
 from rest_framework.permissions import AllowAny, IsAuthenticated
-from rest_framework_simplejwt.tokens import RefreshToken
 from django.contrib.auth import authenticate, get_user_model
 
+from .tokens import CachedRefreshToken, tokens_for_user
 from .serializers import (
     UserSerializer,
     RegisterSerializer,
@@ -42,18 +42,12 @@ class RegisterView(generics.CreateAPIView):
         # Crear usuario
         user = serializer.save()
         
-        # Generar tokens JWT
-        refresh = RefreshToken.for_user(user)
-        
         # Serializar datos del usuario
         user_serializer = UserSerializer(user)
         
         return Response({
             'user': user_serializer.data,
-            'tokens': {
-                'refresh': str(refresh),
-                'access': str(refresh.access_token),
-            },
+            'tokens': tokens_for_user(user),
             'message': 'Usuario registrado exitosamente'
         }, status=status.HTTP_201_CREATED)
 
@@ -86,31 +80,22 @@ class LoginView(APIView):
         email = serializer.validated_data['email']
         password = serializer.validated_data['password']
         
-        # Verificar si el usuario existe primero
-        try:
-            user = User.objects.get(email=email)
-            # Si el usuario existe pero está inactivo
-            if not user.is_active:
-                return Response({
-                    'error': 'Esta cuenta está desactivada.'
-                }, status=status.HTTP_403_FORBIDDEN)
-        except User.DoesNotExist:
-            user = None
+        # Autenticar usuario con una sola consulta (ver users.backends.EmailBackend).
+        # allow_inactive devuelve también las cuentas desactivadas con la
+        # contraseña correcta, para responder 403 en lugar de 401.
+        user = authenticate(request, username=email, password=password, allow_inactive=True)
         
-        # Autenticar usuario
-        user = authenticate(request, username=email, password=password)
+        if user is not None and not user.is_active:
+            return Response({
+                'error': 'Esta cuenta está desactivada.'
+            }, status=status.HTTP_403_FORBIDDEN)
         
         if user is not None:
-            # Generar tokens
-            refresh = RefreshToken.for_user(user)
             user_serializer = UserSerializer(user)
             
             return Response({
                 'user': user_serializer.data,
-                'tokens': {
-                    'refresh': str(refresh),
-                    'access': str(refresh.access_token),
-                },
+                'tokens': tokens_for_user(user),
                 'message': 'Login exitoso'
             }, status=status.HTTP_200_OK)
         else:
@@ -149,7 +134,7 @@ class LogoutView(APIView):
                 }, status=status.HTTP_400_BAD_REQUEST)
             
             # Agregar token a la blacklist
-            token = RefreshToken(refresh_token)
+            token = CachedRefreshToken(refresh_token)
             token.blacklist()
             
             return Response({
@@ -182,10 +167,13 @@ class UserProfileView(generics.RetrieveUpdateAPIView):
         """
         Retorna el usuario autenticado actual.
         
+        Se carga completo de la BD: el usuario de la autenticación puede
+        venir del cache con solo algunos campos (ver CachedJWTAuthentication).
+        
         Returns:
             User: Usuario de la petición
         """
-        return self.request.user
+        return User.objects.get(pk=self.request.user.pk)
 
 
 class ChangePasswordView(APIView):
@@ -212,7 +200,8 @@ class ChangePasswordView(APIView):
         serializer = ChangePasswordSerializer(data=request.data)
         serializer.is_valid(raise_exception=True)
         
-        user = request.user
+        # Usuario completo: el cacheado no incluye la contraseña
+        user = User.objects.get(pk=request.user.pk)
         
         # Verificar contraseña actual
         if not user.check_password(serializer.validated_data['old_password']):